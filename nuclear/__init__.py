@@ -1,8 +1,10 @@
 from .cli.builder.builder import CliBuilder
 from .cli.builder.rule_factory import subcommand, flag, dictionary, parameter, primary_option, argument, arguments, \
     default_action
-from .shell.shell_utils import shell, shell_output, sh, CommandError
+from .shell.shell_utils import shell, shell_output, shell_stream, sh, CommandError
 from .shell.background_cmd import BackgroundCommand
+from .shell.parallel import shell_many
+from .shell.async_shell import ashell, AsyncBackgroundCommand
 from .sublog.catch import error_handler
 from .sublog.logging import logger, log, log_exception, add_context, get_logger, init_logs
 from .sublog.exception import exception_details, unwrap
@@ -16,8 +18,8 @@ name = "nuclear"
 __all__ = [
     'CliBuilder',
     'subcommand', 'flag', 'dictionary', 'parameter', 'primary_option', 'argument', 'arguments', 'default_action',
-    'shell', 'shell_output', 'sh', 'CommandError',
-    'BackgroundCommand',
+    'shell', 'shell_output', 'shell_stream', 'sh', 'CommandError',
+    'BackgroundCommand', 'shell_many', 'ashell', 'AsyncBackgroundCommand',
     'error_handler',
     'logger', 'log', 'log_exception', 'add_context', 'get_logger', 'init_logs',
     'exception_details', 'unwrap',
@@ -45,6 +45,16 @@ class ArgsQue:
         self.reset()
         return all_args
 
+    def pop_front(self, count: int) -> List[str]:
+        front = self.__args[:count]
+        self.__args = self.__args[count:]
+        self.reset()
+        return front
+
+    def put_all(self, args: List[str]):
+        self.__args = args
+        self.reset()
+
     def reset(self) -> 'ArgsQue':
         self.__current_index = 0
         self.__next_index = 0
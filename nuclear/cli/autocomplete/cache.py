@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import sys
+import sysconfig
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from nuclear.cli.builder.rule import CliRule, FlagRule, ParameterRule, DictionaryRule, PositionalArgumentRule, \
+    ManyArgumentsRule, SubcommandRule, PrimaryOptionRule, LazySubcommandRule, ValueRule
+from nuclear.cli.parser.value import generate_value_choices
+from nuclear.sublog import log
+from nuclear.version import __version__
+from .autocomplete import find_matching_completions
+
+_DYNAMIC_CHOICES = 'dynamic'
+_BUILTIN_TYPES = {'str': str, 'int': int, 'float': float, 'bool': bool}
+
+
+class LiveCompletionRequired(RuntimeError):
+    """
+    Completion can't be answered from the index, because it needs the live application:
+    a call to a choices provider or the rules of a lazy sub-command, which haven't been loaded yet
+    """
+
+
+def autocomplete_from_index(cmdline: str, word_idx: Optional[int], app_version: Optional[str]) -> bool:
+    """
+    Print matching completions based on the stored completion index, without building the CLI.
+    :return: whether completions were found in the index. Otherwise live completion is needed.
+    """
+    index_path = completion_index_path()
+    key = completion_index_key(app_version)
+    if index_path is None or key is None or not index_path.is_file():
+        return False
+    try:
+        index: Dict[str, Any] = json.loads(index_path.read_text())
+        if index.get('key') != key or not _sources_unchanged(index.get('sources', {})):
+            return False
+        rules = _deserialize_rules(index['rules'])
+        completions = find_matching_completions(cmdline, rules, word_idx)
+    except LiveCompletionRequired:
+        return False
+    except (ValueError, KeyError, OSError):
+        return False
+    print('\n'.join(completions))
+    return True
+
+
+def save_completion_index(rules: List[CliRule], app_version: Optional[str]):
+    """Store serialized keywords, subcommands tree and static choices for the fast completion"""
+    index_path = completion_index_path()
+    key = completion_index_key(app_version)
+    if index_path is None or key is None:
+        return
+    index = {
+        'key': key,
+        'sources': _loaded_source_mtimes(),
+        'rules': _serialize_rules(rules),
+    }
+    try:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = index_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(index, default=str))
+        tmp_path.replace(index_path)
+    except OSError as e:
+        log.warn(f'failed to save completion index: {e}')
+
+
+def is_completion_index_valid(app_version: Optional[str]) -> bool:
+    index_path = completion_index_path()
+    key = completion_index_key(app_version)
+    if index_path is None or key is None or not index_path.is_file():
+        return False
+    try:
+        index: Dict[str, Any] = json.loads(index_path.read_text())
+        return index.get('key') == key and _sources_unchanged(index.get('sources', {}))
+    except (ValueError, OSError):
+        return False
+
+
+def completion_index_path() -> Optional[Path]:
+    script_path = _script_path()
+    if script_path is None:
+        return None
+    cache_dir = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache')
+    script_hash = hashlib.sha1(script_path.encode()).hexdigest()[:16]
+    return cache_dir / 'nuclear' / 'completion' / f'{script_hash}.json'
+
+
+def completion_index_key(app_version: Optional[str]) -> Optional[str]:
+    """Index is valid as long as the script, nuclear version and application version haven't changed"""
+    script_path = _script_path()
+    if script_path is None:
+        return None
+    try:
+        mtime = os.stat(script_path).st_mtime_ns
+    except OSError:
+        return None
+    key = f'{script_path}:{mtime}:{__version__}:{app_version}'
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _loaded_source_mtimes() -> Dict[str, int]:
+    """
+    Modification times of the loaded modules outside the standard library,
+    so the index gets stale when the commands defined in the imported modules change
+    """
+    paths = sysconfig.get_paths()
+    stdlib_dirs = tuple({os.path.join(paths[name], '') for name in ('stdlib', 'platstdlib')})
+    mtimes: Dict[str, int] = {}
+    for module in list(sys.modules.values()):
+        module_file = getattr(module, '__file__', None)
+        if not module_file or module_file.startswith(stdlib_dirs):
+            continue
+        try:
+            mtimes[module_file] = os.stat(module_file).st_mtime_ns
+        except OSError:
+            continue
+    return mtimes
+
+
+def _sources_unchanged(mtimes: Dict[str, int]) -> bool:
+    for module_file, mtime in mtimes.items():
+        try:
+            if os.stat(module_file).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _script_path() -> Optional[str]:
+    main_file = getattr(sys.modules.get('__main__'), '__file__', None)
+    if not main_file:
+        return None
+    return os.path.realpath(main_file)
+
+
+def _serialize_rules(rules: List[CliRule]) -> List[Dict[str, Any]]:
+    serialized = []
+    for rule in rules:
+        if isinstance(rule, FlagRule):
+            serialized.append({'kind': 'flag', 'keywords': sorted(rule.keywords), 'multiple': rule.multiple})
+        elif isinstance(rule, ParameterRule):
+            serialized.append({
+                'kind': 'parameter', 'keywords': sorted(rule.keywords), 'name': rule.name,
+                'type': _serialize_type(rule), 'choices': _serialize_choices(rule), 'multiple': rule.multiple,
+            })
+        elif isinstance(rule, DictionaryRule):
+            serialized.append({'kind': 'dictionary', 'keywords': sorted(rule.keywords), 'name': rule.name})
+        elif isinstance(rule, PositionalArgumentRule):
+            serialized.append({
+                'kind': 'argument', 'name': rule.name,
+                'type': _serialize_type(rule), 'choices': _serialize_choices(rule),
+            })
+        elif isinstance(rule, ManyArgumentsRule):
+            serialized.append({
+                'kind': 'arguments', 'name': rule.name,
+                'type': _serialize_type(rule), 'choices': _serialize_choices(rule),
+                'count': rule.count, 'min_count': rule.min_count, 'max_count': rule.max_count,
+            })
+        elif isinstance(rule, LazySubcommandRule) and not rule.loaded:
+            # don't import the lazy sub-command just to index it, it's loaded once the typed words enter it
+            serialized.append({'kind': 'lazy_subcommand', 'keywords': sorted(rule.keywords), 'help': rule.help})
+        elif isinstance(rule, SubcommandRule):
+            serialized.append({
+                'kind': 'subcommand', 'keywords': sorted(rule.keywords), 'subrules': _serialize_rules(rule.subrules),
+            })
+        elif isinstance(rule, PrimaryOptionRule):
+            serialized.append({
+                'kind': 'primary_option', 'keywords': sorted(rule.keywords),
+                'subrules': _serialize_rules(rule.subrules),
+            })
+    return serialized
+
+
+def _serialize_type(rule: ValueRule) -> Optional[str]:
+    for name, builtin_type in _BUILTIN_TYPES.items():
+        if rule.type is builtin_type:
+            return name
+    return None
+
+
+def _serialize_choices(rule: ValueRule) -> Any:
+    if callable(rule.choices):
+        return _DYNAMIC_CHOICES
+    if not rule.choices:
+        return None
+    return generate_value_choices(rule)
+
+
+def _deserialize_rules(serialized: List[Dict[str, Any]]) -> List[CliRule]:
+    rules: List[CliRule] = []
+    for item in serialized:
+        kind = item['kind']
+        if kind == 'flag':
+            rules.append(FlagRule(keywords=set(item['keywords']), multiple=item['multiple']))
+        elif kind == 'parameter':
+            rules.append(ParameterRule(
+                keywords=set(item['keywords']), name=item['name'], type=_deserialize_type(item['type']),
+                choices=_deserialize_choices(item['choices']), multiple=item['multiple'],
+            ))
+        elif kind == 'dictionary':
+            rules.append(DictionaryRule(keywords=set(item['keywords']), name=item['name']))
+        elif kind == 'argument':
+            rules.append(PositionalArgumentRule(
+                name=item['name'], type=_deserialize_type(item['type']),
+                choices=_deserialize_choices(item['choices']),
+            ))
+        elif kind == 'arguments':
+            rules.append(ManyArgumentsRule(
+                name=item['name'], type=_deserialize_type(item['type']),
+                choices=_deserialize_choices(item['choices']),
+                count=item['count'], min_count=item['min_count'], max_count=item['max_count'],
+            ))
+        elif kind == 'subcommand':
+            rules.append(SubcommandRule(keywords=set(item['keywords']), subrules=_deserialize_rules(item['subrules'])))
+        elif kind == 'lazy_subcommand':
+            rules.append(LazySubcommandRule(
+                keywords=set(item['keywords']), help=item['help'], loader=_require_live_completion,
+            ))
+        elif kind == 'primary_option':
+            rules.append(PrimaryOptionRule(
+                keywords=set(item['keywords']), subrules=_deserialize_rules(item['subrules']),
+            ))
+    return rules
+
+
+def _deserialize_type(type_name: Optional[str]):
+    return _BUILTIN_TYPES.get(type_name) if type_name else None
+
+
+def _deserialize_choices(choices: Any):
+    if choices == _DYNAMIC_CHOICES:
+        return _require_live_completion
+    return choices
+
+
+def _require_live_completion(current: Optional[str] = None) -> Any:
+    raise LiveCompletionRequired()
@@ -0,0 +1,145 @@
+import os
+import socket
+import socketserver
+from typing import Callable, List, Optional
+
+from nuclear.cli.builder.rule import CliRule, ValueRule, ParentRule, LazySubcommandRule, SubcommandRule
+from nuclear.cli.parser.choices import CachedChoices
+from nuclear.sublog import log
+from .autocomplete import find_matching_completions
+from .cache import completion_index_key
+
+
+def completion_socket_path(app_name: str) -> str:
+    """Unix socket of the completion daemon, known both to the application and to the bash hook"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or '/tmp'
+    return os.path.join(runtime_dir, f'nuclear-completion-{os.getuid()}-{app_name}.sock')
+
+
+def live_completion_lines(app_name: str) -> List[str]:
+    """
+    Bash lines filling COMPREPLY with completions of the running application.
+    Completion daemon is asked first (if its socket exists), otherwise the application is run with --autocomplete.
+    Daemon is reached with socat, or with OpenBSD netcat, as other netcat variants can't talk to Unix sockets
+    or don't close the connection after sending the request.
+    """
+    socket_path = f'"${{XDG_RUNTIME_DIR:-/tmp}}/nuclear-completion-$UID-{app_name}.sock"'
+    request = '''printf '%s\\n%s\\n' "${COMP_LINE}" "${COMP_CWORD}"'''
+    return [
+        f'local socket={socket_path}',
+        'if [ -S "$socket" ]; then',
+        '    if command -v socat >/dev/null 2>&1; then',
+        f'        COMPREPLY=($({request} | socat -t 5 - "UNIX-CONNECT:$socket" 2>/dev/null)) && return',
+        "    elif command -v nc >/dev/null 2>&1 && nc -h 2>&1 | grep -q -- '^[[:space:]]*-N'; then",
+        f'        COMPREPLY=($({request} | nc -U -N "$socket" 2>/dev/null)) && return',
+        '    fi',
+        'fi',
+        f'COMPREPLY=($({app_name} --autocomplete "${{COMP_LINE}}" ${{COMP_CWORD}}))',
+    ]
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class CompletionServer:
+    def __init__(self,
+                 rules: List[CliRule],
+                 socket_path: str,
+                 choices_ttl: float = 60,
+                 app_version: Optional[str] = None,
+                 ):
+        """
+        Long-lived completion server answering autocompletion requests over a Unix socket.
+        It keeps the rules tree loaded (lazy sub-commands once they're completed for the first time)
+        and choice providers results memoized between subsequent completions.
+        Request consists of two lines: command line and index of the current word.
+        Server stops itself when the application script has been modified, so the bash hook falls back to live calls.
+        :param rules: all CLI rules of the application
+        :param socket_path: path of the Unix socket to listen on
+        :param choices_ttl: number of seconds to keep results of every choice provider
+        :param app_version: version of the application, used to detect that the script has been modified
+        """
+        self.rules: List[CliRule] = rules
+        self.socket_path: str = socket_path
+        self.__app_version: Optional[str] = app_version
+        self.__key: Optional[str] = completion_index_key(app_version)
+        _memoize_choices(rules, choices_ttl)
+        self.__server: Optional[_UnixServer] = None
+
+    def complete(self, cmdline: str, word_idx: Optional[int]) -> List[str]:
+        return find_matching_completions(cmdline, self.rules, word_idx)
+
+    def serve_forever(self):
+        self.__server = self.__bind()
+        log.info(f'completion daemon listening on {self.socket_path}')
+        try:
+            self.__server.serve_forever()
+        finally:
+            self.__server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def shutdown(self):
+        if self.__server is not None:
+            self.__server.shutdown()
+
+    def is_outdated(self) -> bool:
+        return completion_index_key(self.__app_version) != self.__key
+
+    def __bind(self) -> _UnixServer:
+        if os.path.exists(self.socket_path):
+            if _is_listening(self.socket_path):
+                raise RuntimeError(f'completion daemon is already running on {self.socket_path}')
+            os.remove(self.socket_path)  # stale socket left by a killed daemon
+        server = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                cmdline = self.rfile.readline().decode().rstrip('\n')
+                word_idx_str = self.rfile.readline().decode().strip()
+                word_idx = int(word_idx_str) if word_idx_str.isdigit() else None
+                completions = server.complete(cmdline, word_idx)
+                self.wfile.write(''.join(f'{completion}\n' for completion in completions).encode())
+                if server.is_outdated():
+                    log.info('application has been modified, stopping completion daemon')
+                    os.remove(server.socket_path)
+                    server.shutdown()
+
+        old_umask = os.umask(0o177)  # socket is created accessible only by the owner
+        try:
+            return _UnixServer(self.socket_path, _Handler)
+        finally:
+            os.umask(old_umask)
+
+
+def _is_listening(socket_path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(socket_path)
+            return True
+        except OSError:
+            return False
+
+
+def _memoize_choices(rules: List[CliRule], ttl: float):
+    """Let the results of choice providers expire, as they'd be kept for the whole life of the daemon"""
+    for rule in rules:
+        if isinstance(rule, ValueRule) and callable(rule.choices):
+            if not isinstance(rule.choices, CachedChoices):
+                rule.choices = CachedChoices(rule.choices, ttl)
+            elif rule.choices.ttl is None:
+                rule.choices.ttl = ttl
+        if isinstance(rule, LazySubcommandRule) and not rule.loaded:
+            rule.loader = _memoizing_loader(rule.loader, ttl)
+        if isinstance(rule, ParentRule):
+            _memoize_choices(rule.subrules, ttl)
+
+
+def _memoizing_loader(loader: Callable[[], SubcommandRule], ttl: float) -> Callable[[], SubcommandRule]:
+    """Memoize choices of a lazy sub-command once it's loaded, when a completion enters it for the first time"""
+    def load() -> SubcommandRule:
+        loaded = loader()
+        _memoize_choices(loaded.subrules, ttl)
+        return loaded
+    return load
@@ -1,14 +1,15 @@
 import os
 import sys
-import zlib
 from typing import Optional
 
+from nuclear.cli.autocomplete.daemon import live_completion_lines
+from nuclear.cli.autocomplete.script import completion_function_name
 from nuclear.sublog import log
 from nuclear.utils.files import script_real_path
 from nuclear.shell.shell_utils import shell
 
 
-def install_bash(app_name: str):
+def install_bash(app_name: str, completion_script: Optional[str] = None):
     """
     Install script link in /usr/bin/{app_name}
     and create bash autocompletion script
@@ -33,12 +34,15 @@ def install_bash(app_name: str):
         shell(f'sudo ln -s {app_path} {usr_bin_executable}')
 
     log.info(f'Link installed in {usr_bin_executable}. Please restart your shell.')
-    install_autocomplete(app_name)
+    install_autocomplete(app_name, completion_script)
 
 
-def install_autocomplete(app_name: Optional[str]):
+def install_autocomplete(app_name: Optional[str], completion_script: Optional[str] = None):
     """
     Create bash autocompletion script
+    :param app_name: name of the command to be completed
+    :param completion_script: self-contained completion script to be installed
+    instead of the default one, which runs the application on every completion
     """
     if os.geteuid() != 0:
         log.warn("gaining root privileges in order to install autocompletion script")
@@ -47,22 +51,28 @@ def install_autocomplete(app_name: Optional[str]):
         app_name = shell_command_name()
 
     completion_script_path: str = f'/etc/bash_completion.d/nuclear_{app_name}.sh'
-    app_hash: int = zlib.adler32(app_name.encode('utf-8'))
-    # function should be unique across bash env
-    function_name: str = f'_autocomplete_{app_hash}'
+    if completion_script is None:
+        completion_script = default_completion_script(app_name)
     shell(f"""cat << 'EOF' | sudo tee {completion_script_path}
-#!/bin/bash
-{function_name}() {{
-    IFS=$'\n'
-    COMPREPLY=($({app_name} --autocomplete "${{COMP_LINE}}" ${{COMP_CWORD}}))
-}}
-complete -o filenames -F {function_name} {app_name}
+{completion_script.rstrip()}
 EOF
 """)
     log.info(f'Autocompleter has been installed in {completion_script_path} for command "{app_name}". '
              f'Please restart your shell.')
 
 
+def default_completion_script(app_name: str) -> str:
+    function_name: str = completion_function_name(app_name)
+    live_completion = '\n'.join(f'    {line}' for line in live_completion_lines(app_name))
+    return f"""#!/bin/bash
+{function_name}() {{
+    IFS=$'\n'
+{live_completion}
+}}
+complete -o filenames -F {function_name} {app_name}
+"""
+
+
 def shell_command_name():
     _, command = os.path.split(sys.argv[0])
     return command
@@ -0,0 +1,222 @@
+import shlex
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from nuclear.cli.builder.rule import CliRule, FlagRule, ParameterRule, DictionaryRule, PrimaryOptionRule, \
+    SubcommandRule, LazySubcommandRule, PositionalArgumentRule, ManyArgumentsRule, ValueRule
+from nuclear.cli.parser.error import CliDefinitionError
+from .daemon import live_completion_lines
+from nuclear.cli.parser.keyword import format_keywords
+from nuclear.cli.parser.transform import filter_rules
+from nuclear.cli.parser.value import generate_value_choices
+
+_INDENT = ' ' * 4
+
+
+@dataclass
+class _CompletionNode:
+    id: int
+    rules: List[CliRule]
+    parent: Optional['_CompletionNode'] = None
+    children: Dict[str, '_CompletionNode'] = field(default_factory=lambda: {})
+    lazy: bool = False  # rules of a lazy sub-command, which are known only to the running application
+
+    def active_rules(self) -> List[CliRule]:
+        """Rules of this level and all parent levels, which stay active in sub-commands"""
+        if self.parent:
+            return self.rules + self.parent.active_rules()
+        return self.rules
+
+
+def generate_completion_script(rules: List[CliRule], app_name: str, shell: str = 'bash') -> str:
+    """
+    Generate self-contained completion script, which doesn't run the application on every completion.
+    Sub-commands, flags, parameters and static choices are encoded as shell case tables.
+    Only the choices provided by functions and the sub-commands of lazy commands
+    are retrieved by calling the application with --autocomplete.
+    :param rules: all CLI rules of the application
+    :param app_name: name of the command to be completed
+    :param shell: target shell: "bash" or "zsh" (which uses bash completion compatibility layer)
+    """
+    if shell not in {'bash', 'zsh'}:
+        raise CliDefinitionError(f'unsupported shell for completion script: {shell}')
+    nodes: List[_CompletionNode] = []
+    _build_node(rules, None, nodes)
+    function_name = completion_function_name(app_name)
+
+    lines: List[str] = []
+    if shell == 'zsh':
+        lines += [f'#compdef {app_name}', 'autoload -U +X bashcompinit && bashcompinit']
+    else:
+        lines += ['#!/bin/bash']
+    lines += [
+        f'# Completion script for "{app_name}" generated by nuclear',
+        f'{function_name}_live() {{',
+        f"{_INDENT}local IFS=$'\\n'",
+    ]
+    lines += [f'{_INDENT}{line}' for line in live_completion_lines(app_name)]
+    lines += [
+        '}',
+        f'{function_name}() {{',
+        f'{_INDENT}local cur="${{COMP_WORDS[COMP_CWORD]}}" word="" pending="" prefix="" w',
+        f'{_INDENT}local node=0 positional=0 skip=0 i=1',
+        f'{_INDENT}local -a words=()',
+    ]
+    lines += _walk_words_lines(nodes, function_name)
+    lines += _value_completion_lines(nodes, function_name)
+    lines += _keyword_completion_lines(nodes, function_name)
+    lines += [
+        f'{_INDENT}COMPREPLY=()',
+        f'{_INDENT}for w in "${{words[@]}}"; do',
+        f'{_INDENT * 2}[[ "$w" == "$cur"* ]] && COMPREPLY+=("$prefix$w")',
+        f'{_INDENT}done',
+        '}',
+        f'complete -o filenames -F {function_name} {app_name}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def completion_function_name(app_name: str) -> str:
+    app_hash: int = zlib.adler32(app_name.encode('utf-8'))
+    # function should be unique across bash env
+    return f'_autocomplete_{app_hash}'
+
+
+def _build_node(rules: List[CliRule], parent: Optional[_CompletionNode], nodes: List[_CompletionNode],
+                lazy: bool = False) -> _CompletionNode:
+    node = _CompletionNode(len(nodes), rules, parent, lazy=lazy)
+    nodes.append(node)
+    if lazy:
+        return node
+    for rule in filter_rules(rules, SubcommandRule):
+        lazy_rule = isinstance(rule, LazySubcommandRule) and not rule.loaded
+        child = _build_node(rule.subrules, node, nodes, lazy=lazy_rule)
+        for keyword in rule.keywords:
+            node.children.setdefault(keyword, child)
+    return node
+
+
+def _walk_words_lines(nodes: List[_CompletionNode], function_name: str) -> List[str]:
+    """Find the active sub-command level, skipping parameter values on the way"""
+    param_patterns: List[str] = []
+    dict_patterns: List[str] = []
+    for node in nodes:
+        for rule in filter_rules(node.active_rules(), ParameterRule):
+            param_patterns += [_pattern(node, keyword) for keyword in format_keywords(rule.keywords)]
+        for rule in filter_rules(node.active_rules(), DictionaryRule):
+            dict_patterns += [_pattern(node, keyword) for keyword in format_keywords(rule.keywords)]
+
+    lines = [
+        f'{_INDENT}while [ $i -lt $COMP_CWORD ]; do',
+        f'{_INDENT * 2}word="${{COMP_WORDS[i]}}"',
+        f'{_INDENT * 2}i=$((i + 1))',
+        f'{_INDENT * 2}[ "$word" = "=" ] && continue',
+        f'{_INDENT * 2}if [ $skip -gt 0 ]; then skip=$((skip - 1)); continue; fi',
+        f'{_INDENT * 2}case "$node:$word" in',
+    ]
+    if param_patterns:
+        lines.append(f'{_INDENT * 3}{"|".join(sorted(set(param_patterns)))}) skip=1; pending="$word" ;;')
+    if dict_patterns:
+        lines.append(f'{_INDENT * 3}{"|".join(sorted(set(dict_patterns)))}) skip=2; pending="$word" ;;')
+    lines += [
+        f'{_INDENT * 3}*:-*) ;;',
+        f'{_INDENT * 3}*)',
+        f'{_INDENT * 4}if [ $positional -eq 0 ]; then',
+        f'{_INDENT * 5}case "$node:$word" in',
+    ]
+    for node in nodes:
+        for keyword, child in sorted(node.children.items()):
+            if child.lazy:
+                lines.append(f'{_INDENT * 6}{_pattern(node, keyword)}) {function_name}_live; return ;;')
+            else:
+                lines.append(f'{_INDENT * 6}{_pattern(node, keyword)}) node={child.id}; continue ;;')
+    lines += [
+        f'{_INDENT * 5}esac',
+        f'{_INDENT * 4}fi',
+        f'{_INDENT * 4}positional=$((positional + 1))',
+        f'{_INDENT * 4};;',
+        f'{_INDENT * 2}esac',
+        f'{_INDENT}done',
+    ]
+    return lines
+
+
+def _value_completion_lines(nodes: List[_CompletionNode], function_name: str) -> List[str]:
+    """Complete values of a parameter given as "--name value" or "--name=value" """
+    lines = [
+        f'{_INDENT}if [[ "$cur" == -*=* ]]; then',
+        f'{_INDENT * 2}pending="${{cur%%=*}}"; prefix="$pending="; cur="${{cur#*=}}"',
+        f'{_INDENT}elif [ "$cur" = "=" ] && [ $skip -gt 0 ]; then',
+        f'{_INDENT * 2}prefix="="; cur=""',
+        f'{_INDENT}elif [ $skip -eq 0 ]; then',
+        f'{_INDENT * 2}pending=""',
+        f'{_INDENT}fi',
+        f'{_INDENT}if [ -n "$pending" ]; then',
+        f'{_INDENT * 2}case "$node:$pending" in',
+    ]
+    for node in nodes:
+        for rule in filter_rules(node.active_rules(), ParameterRule):
+            patterns = '|'.join(_pattern(node, keyword) for keyword in sorted(format_keywords(rule.keywords)))
+            if _has_dynamic_choices(rule):
+                lines.append(f'{_INDENT * 3}{patterns}) {function_name}_live; return ;;')
+            elif rule.choices:
+                lines.append(f'{_INDENT * 3}{patterns}) words=({_shell_words(rule)}) ;;')
+    lines += [
+        f'{_INDENT * 2}esac',
+        f'{_INDENT}else',
+    ]
+    return lines
+
+
+def _keyword_completion_lines(nodes: List[_CompletionNode], function_name: str) -> List[str]:
+    """Complete sub-commands, options and static choices of positional arguments"""
+    dynamic_nodes = [
+        str(node.id) for node in nodes
+        if any(_has_dynamic_choices(rule)
+               for rule in filter_rules(node.active_rules(), PositionalArgumentRule, ManyArgumentsRule))
+    ]
+    lines = []
+    if dynamic_nodes:
+        lines += [
+            f'{_INDENT * 2}if [[ "$cur" != -* ]]; then',
+            f'{_INDENT * 3}case "$node" in',
+            f'{_INDENT * 4}{"|".join(dynamic_nodes)}) {function_name}_live; return ;;',
+            f'{_INDENT * 3}esac',
+            f'{_INDENT * 2}fi',
+        ]
+    lines.append(f'{_INDENT * 2}case "$node" in')
+    for node in nodes:
+        words = _node_words(node)
+        if words:
+            lines.append(f'{_INDENT * 3}{node.id}) words=({" ".join(shlex.quote(w) for w in words)}) ;;')
+    lines += [
+        f'{_INDENT * 2}esac',
+        f'{_INDENT}fi',
+    ]
+    return lines
+
+
+def _node_words(node: _CompletionNode) -> List[str]:
+    words: List[str] = sorted(node.children.keys())
+    active_rules = node.active_rules()
+    for rule in filter_rules(active_rules, FlagRule, ParameterRule, DictionaryRule):
+        words += sorted(format_keywords(rule.keywords))
+    for rule in filter_rules(active_rules, PrimaryOptionRule):
+        words += sorted(rule.keywords)
+    for rule in filter_rules(active_rules, PositionalArgumentRule, ManyArgumentsRule):
+        if rule.choices and not _has_dynamic_choices(rule):
+            words += [str(choice) for choice in generate_value_choices(rule)]
+    return list(dict.fromkeys(words))  # remove duplicates, keep order
+
+
+def _has_dynamic_choices(rule: ValueRule) -> bool:
+    return callable(rule.choices)
+
+
+def _shell_words(rule: ValueRule) -> str:
+    return ' '.join(shlex.quote(str(choice)) for choice in generate_value_choices(rule))
+
+
+def _pattern(node: _CompletionNode, keyword: str) -> str:
+    return shlex.quote(f'{node.id}:{keyword}')
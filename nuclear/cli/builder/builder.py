@@ -1,15 +1,20 @@
 import sys
-from typing import Callable, List, Optional
+from typing import Callable, List, Optional, Union
 
 from nuclear.cli.autocomplete.autocomplete import bash_autocomplete
-from nuclear.cli.autocomplete.install import install_bash, install_autocomplete
-from nuclear.cli.builder.decorator_builder import create_decorated_subcommand
+from nuclear.cli.autocomplete.cache import autocomplete_from_index, save_completion_index, \
+    is_completion_index_valid
+from nuclear.cli.autocomplete.daemon import CompletionServer, completion_socket_path
+from nuclear.cli.autocomplete.install import install_bash, install_autocomplete, shell_command_name
+from nuclear.cli.autocomplete.script import generate_completion_script
+from nuclear.cli.builder.decorator_builder import create_decorated_subcommand, create_lazy_subcommand
 from nuclear.cli.help import print_version, print_help, print_usage
 from nuclear.cli.parser.error import CliSyntaxError, CliDefinitionError
+from nuclear.cli.parser.level import ParserLevel
 from nuclear.cli.parser.parser import Parser
 from nuclear.sublog import logger, error_handler
 from .rule import DefaultActionRule, CliRule, SubcommandRule
-from .rule_factory import default_action, primary_option, arguments, argument, subcommand
+from .rule_factory import default_action, primary_option, arguments, argument, subcommand, parameter
 
 
 class CliBuilder:
@@ -25,6 +30,9 @@ class CliBuilder:
                  help_on_empty: bool = False,
                  error_unrecognized: bool = True,
                  log_error: bool = False,
+                 reuse_parser: bool = False,
+                 completion_cache: bool = False,
+                 static_completion: bool = False,
                  ):
         """
         A builder for Command Line Interface specification
@@ -46,11 +54,22 @@ class CliBuilder:
         :param help_on_empty: shows help output when no argument is given
         :param error_unrecognized: raise error when unrecognized argument is found
         :param log_error: whether to catch exceptions and display traceback in a concise format
+        :param reuse_parser: whether the rules should be validated and compiled only once
+        and reused by subsequent runs (useful when running many times in the same process).
+        Rules should not be modified after the first run, unless they're added with 'has' or 'add_command'.
+        :param completion_cache: whether autocompletion should be answered by run() from the index stored on disk,
+        without creating the parser. Index is written on installing autocompletion or on the first completion.
+        It's invalidated whenever the script or any loaded module is modified.
+        Dynamic choices are still retrieved by a live call.
+        :param static_completion: whether to install self-contained completion script generated from the rules,
+        which runs the application only to retrieve dynamic choices
         """
         self.__name: str = name
         self.__version: str = version
         self.__help: str = help
         self.__subrules: List[CliRule] = []
+        self.__reuse_parser: bool = reuse_parser
+        self.__parser_level: Optional[ParserLevel] = None
 
         if run:
             self.has(default_action(run))
@@ -61,6 +80,8 @@ class CliBuilder:
         self.__help_on_empty: bool = help_on_empty
         self.__error_unrecognized: bool = error_unrecognized
         self.__log_error: bool = log_error
+        self.__completion_cache: bool = completion_cache
+        self.__static_completion: bool = static_completion
         if with_defaults:
             self.__add_default_rules()
 
@@ -72,6 +93,7 @@ class CliBuilder:
         :return: CliBuilder itself for the further building
         """
         self.__subrules += subrules
+        self.__parser_level = None
         return self
 
     def run(self):
@@ -80,6 +102,8 @@ class CliBuilder:
         Then invoke triggered action which were defined before.
         If actions need some parameters, they will be injected based on the parsed arguments.
         """
+        if self.__completion_cache:
+            self.__autocomplete_from_index()
         if self.__log_error:
             with error_handler():
                 self.run_with_args(sys.argv[1:])
@@ -113,14 +137,29 @@ class CliBuilder:
             return wrapper
         return decorator
 
-    def __bind_decorated_command(self, function: Callable[..., None], names: List[str]):
-        if not names:
-            raise CliDefinitionError('subcommand name is required')
-        if len(names) == 1:
-            names = names[0].split(' ')
+    def add_lazy_command(
+        self,
+        *subcommands: str,
+        target: Union[str, Callable[[], Callable[..., None]]],
+        help: Optional[str] = None,
+    ):
+        """
+        Bind a function with a CLI command, but load it only when the command is actually used.
+        Function's module is not imported at startup, only the command keyword and its short help are registered.
+        Function is loaded and its rules are built when the parser enters the command (or shows help for it).
+        :param subcommands: multi-part subcommand names composing the full command, eg. "git remote add"
+        :param target: import path of a function ("package.module:function" or "package.module.function")
+        or a loader returning the function
+        :param help: short description of the command displayed in help output
+        """
+        names = _split_command_names(list(subcommands))
+        self.__bind_subcommand_rule(create_lazy_subcommand(target, names[-1], help), names)
 
-        last_rule = create_decorated_subcommand(function, names[-1])
+    def __bind_decorated_command(self, function: Callable[..., None], names: List[str]):
+        names = _split_command_names(names)
+        self.__bind_subcommand_rule(create_decorated_subcommand(function, names[-1]), names)
 
+    def __bind_subcommand_rule(self, last_rule: SubcommandRule, names: List[str]):
         if len(names) == 1:
             self.has(last_rule)
         else:
@@ -138,6 +177,7 @@ class CliBuilder:
                 current_rule = next_rule    
                 
             current_rule.has(last_rule)
+            self.__parser_level = None
     
     def __find_subcommand_rule(self, name: str) -> Optional[SubcommandRule]:
         for rule in self.__subrules:
@@ -152,6 +192,11 @@ class CliBuilder:
 
             return Parser([default_action(__print_root_help)])
 
+        if self.__reuse_parser:
+            if self.__parser_level is None:
+                self.__parser_level = ParserLevel(self.__subrules)
+            return Parser(level=self.__parser_level, error_unrecognized=self.__error_unrecognized)
+
         return Parser(self.__subrules, error_unrecognized=self.__error_unrecognized)
 
     def print_help(self, subcommands: List[str]):
@@ -162,6 +207,48 @@ class CliBuilder:
 
     def __bash_autocomplete(self, cmdline: str, word_idx: Optional[int]):
         bash_autocomplete(self.__subrules, cmdline, word_idx)
+        if self.__completion_cache and not is_completion_index_valid(self.__version):
+            save_completion_index(self.__subrules, self.__version)
+
+    def completion_script(self, app_name: Optional[str] = None, shell: str = 'bash') -> str:
+        """
+        Generate self-contained completion script for bash or zsh,
+        which doesn't start the application on every completion (unless dynamic choices are needed)
+        :param app_name: name of the command to be completed, defaults to the current command name
+        :param shell: "bash" or "zsh"
+        """
+        return generate_completion_script(self.__subrules, app_name or shell_command_name(), shell)
+
+    def __install_bash(self, app_name: str):
+        install_bash(app_name, self.__installed_completion_script(app_name))
+        if self.__completion_cache:
+            save_completion_index(self.__subrules, self.__version)
+
+    def __install_autocomplete(self, app_name: Optional[str]):
+        install_autocomplete(app_name, self.__installed_completion_script(app_name))
+        if self.__completion_cache:
+            save_completion_index(self.__subrules, self.__version)
+
+    def __installed_completion_script(self, app_name: Optional[str]) -> Optional[str]:
+        if not self.__static_completion:
+            return None
+        return self.completion_script(app_name)
+
+    def __run_completion_daemon(self, app_name: Optional[str], ttl: float):
+        socket_path = completion_socket_path(app_name or shell_command_name())
+        CompletionServer(self.__subrules, socket_path, ttl, self.__version).serve_forever()
+
+    def __autocomplete_from_index(self):
+        """Answer autocompletion request before the parser is created, exit if it has been answered"""
+        args = sys.argv[1:]
+        if len(args) not in {2, 3} or args[0] != '--autocomplete':
+            return
+        try:
+            word_idx = int(args[2]) if len(args) == 3 else None
+        except ValueError:
+            return
+        if autocomplete_from_index(args[1], word_idx, self.__version):
+            sys.exit(0)
 
     def __add_default_rules(self):
         def __print_root_help():
@@ -174,14 +261,20 @@ class CliBuilder:
             print_version(self.__name, self.__version)
 
         def __install_bash(app_name: str):
-            install_bash(app_name)
+            self.__install_bash(app_name)
 
         def __install_autocomplete(app_name: Optional[str]):
-            install_autocomplete(app_name)
+            self.__install_autocomplete(app_name)
 
         def __bash_autocomplete(cmdline: str, word_idx: Optional[int]):
             self.__bash_autocomplete(cmdline, word_idx)
 
+        def __print_completion_script(shell: str, app_name: Optional[str]):
+            print(self.completion_script(app_name, shell), end='')
+
+        def __run_completion_daemon(app_name: Optional[str], ttl: float):
+            self.__run_completion_daemon(app_name, ttl)
+
         if self.__version:
             self.has(
                 primary_option('--version', run=__print_version, help='Print version information and exit'),
@@ -200,6 +293,16 @@ class CliBuilder:
                            help='Install autocompletion links').has(
                 argument('app-name', help='binary name', required=False),
             ),
+            primary_option('--completion-script', run=__print_completion_script,
+                           help='Print self-contained completion script for a shell').has(
+                argument('shell', help='target shell', choices=['bash', 'zsh'], strict_choices=True),
+                argument('app-name', help='binary name', required=False),
+            ),
+            primary_option('--completion-daemon', run=__run_completion_daemon,
+                           help='Run completion server keeping choices warm for the autocompletion').has(
+                argument('app-name', help='binary name', required=False),
+                parameter('ttl', help='seconds to keep results of choice providers', type=float, default=60),
+            ),
             primary_option('--autocomplete', run=__bash_autocomplete,
                            help='Return matching autocompletion proposals').has(
                 argument('cmdline', help='current command line'),
@@ -214,6 +317,14 @@ class CliBuilder:
         return any([isinstance(rule, DefaultActionRule) for rule in self.__subrules])
 
 
+def _split_command_names(names: List[str]) -> List[str]:
+    if not names:
+        raise CliDefinitionError('subcommand name is required')
+    if len(names) == 1:
+        return names[0].split(' ')
+    return names
+
+
 def _find_subcommand_rule(subcommand_rule: SubcommandRule, name: str) -> Optional[SubcommandRule]:
     for rule in subcommand_rule.subrules:
         if isinstance(rule, SubcommandRule) and name in rule.keywords:
@@ -1,8 +1,10 @@
-from typing import Callable, List, Optional, Tuple, Dict, Any
+from typing import Callable, List, Optional, Tuple, Dict, Any, Union
 from inspect import getfullargspec, getdoc
+import importlib
 import re
 
-from .rule import SubcommandRule
+from nuclear.cli.parser.error import CliDefinitionError
+from .rule import SubcommandRule, LazySubcommandRule
 from .rule_factory import argument, arguments, flag, parameter, subcommand
 
 
@@ -14,6 +16,33 @@ def create_decorated_subcommand(function: Callable[..., None], keyword: str) ->
     return rule
 
 
+def create_lazy_subcommand(
+    target: Union[str, Callable[[], Callable[..., None]]],
+    keyword: str,
+    help: Optional[str] = None,
+) -> LazySubcommandRule:
+    def load_subcommand() -> SubcommandRule:
+        function = _load_function(target)
+        return create_decorated_subcommand(function, keyword)
+
+    return LazySubcommandRule(help=help, keywords={keyword}, loader=load_subcommand)
+
+
+def _load_function(target: Union[str, Callable[[], Callable[..., None]]]) -> Callable[..., None]:
+    if callable(target):
+        return target()
+
+    if ':' in target:
+        module_name, _, function_name = target.partition(':')
+    else:
+        module_name, _, function_name = target.rpartition('.')
+    try:
+        module = importlib.import_module(module_name)
+        return getattr(module, function_name)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise CliDefinitionError(f'failed to load command function "{target}"') from e
+
+
 def _parse_function_help(docstring: Optional[str]) -> Tuple[Optional[str], Dict[str, str]]:
     if not docstring:
         return None, {}
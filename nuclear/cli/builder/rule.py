@@ -1,4 +1,4 @@
-from typing import List, Any, Set, Optional, TypeVar, Iterable, Union
+from typing import List, Any, Set, Optional, TypeVar, Iterable, Union, Callable
 
 from dataclasses import dataclass, field
 
@@ -50,6 +50,26 @@ class SubcommandRule(ParentRule, HelpRule):
     pass
 
 
+@dataclass
+class LazySubcommandRule(SubcommandRule):
+    loader: Optional[Callable[[], SubcommandRule]] = None
+
+    def load(self):
+        """Materialize the rules of this subcommand, which haven't been built up front"""
+        if self.loader is None:
+            return
+        loaded = self.loader()
+        self.loader = None
+        self.run = loaded.run
+        self.subrules = loaded.subrules + self.subrules
+        if not self.help:
+            self.help = loaded.help
+
+    @property
+    def loaded(self) -> bool:
+        return self.loader is None
+
+
 @dataclass
 class PrimaryOptionRule(ParentRule, HelpRule):
     pass
@@ -1,5 +1,6 @@
 from typing import Union, Callable, Optional, List, Type, Any, Iterable
 
+from nuclear.cli.parser.choices import CachedChoices
 from .rule import SubcommandRule, PrimaryOptionRule, ParameterRule, PositionalArgumentRule, ManyArgumentsRule, \
     DefaultActionRule, FlagRule, DictionaryRule
 
@@ -55,6 +56,7 @@ def parameter(
         choices: Union[Iterable[Any], Callable[..., List[Any]]] = None,
         strict_choices: bool = False,
         multiple: bool = False,
+        choices_ttl: Optional[float] = None,
 ) -> ParameterRule:
     """
     Create parameter rule specification.
@@ -82,8 +84,11 @@ def parameter(
     :param strict_choices: whether given arguments should be validated against available choices
     :param multiple: whether parameter is allowed to occur many times.
     Then parameter has list type and stores list of values
+    :param choices_ttl: number of seconds to remember the choices retrieved from a function (per typed word).
+    By default, they're not remembered, so the function is called whenever they're needed and they're never stale.
     :return: new parameter rule specification
     """
+    choices = _choice_provider(choices, choices_ttl)
     return ParameterRule(set(keywords), name, type, choices, strict_choices, required, default, help, multiple)
 
 
@@ -129,6 +134,7 @@ def argument(
         type: Union[Type, Callable[[str], Any]] = str,
         choices: Union[Iterable[Any], Callable[..., List[Any]]] = None,
         strict_choices: bool = False,
+        choices_ttl: Optional[float] = None,
 ) -> PositionalArgumentRule:
     """
     Create positional argument rule specification.
@@ -145,8 +151,11 @@ def argument(
     :param choices: Explicit list of available choices for the argument value
     or reference to a function which will be invoked to retrieve such possible values list.
     :param strict_choices: whether given arguments should be validated against available choices
+    :param choices_ttl: number of seconds to remember the choices retrieved from a function (per typed word).
+    By default, they're not remembered, so the function is called whenever they're needed and they're never stale.
     :return: new positional argument rule specification
     """
+    choices = _choice_provider(choices, choices_ttl)
     return PositionalArgumentRule(name, type, choices, strict_choices, required, default, help)
 
 
@@ -160,6 +169,7 @@ def arguments(
         max_count: Optional[int] = None,
         joined_with: Optional[str] = None,
         help: str = None,
+        choices_ttl: Optional[float] = None,
 ) -> ManyArgumentsRule:
     """
     Create 'Multiple arguments' rule specification.
@@ -184,8 +194,11 @@ def arguments(
     If it's not given, matched arguments will be passed as list of strings.
     This value (string or list) can be accessed by specified name, when it's being injected to a function.
     :param help: description of the arguments displayed in help output
+    :param choices_ttl: number of seconds to remember the choices retrieved from a function (per typed word).
+    By default, they're not remembered, so the function is called whenever they're needed and they're never stale.
     :return: new many arguments rule specification
     """
+    choices = _choice_provider(choices, choices_ttl)
     return ManyArgumentsRule(name, type, choices, strict_choices, help, count, min_count, max_count, joined_with)
 
 
@@ -218,3 +231,10 @@ def primary_option(
     :return: new primary option rule specification
     """
     return PrimaryOptionRule(help, set(keywords), run)
+
+
+def _choice_provider(choices: Union[Iterable[Any], Callable[..., List[Any]], None],
+                     choices_ttl: Optional[float]) -> Union[Iterable[Any], CachedChoices, None]:
+    if choices_ttl is not None and callable(choices) and not isinstance(choices, CachedChoices):
+        return CachedChoices(choices, choices_ttl)
+    return choices
@@ -4,7 +4,7 @@ from dataclasses import dataclass, field
 from typing import List, Set, Optional
 
 from nuclear.cli.builder.rule import PrimaryOptionRule, ParameterRule, FlagRule, CliRule, SubcommandRule, \
-    PositionalArgumentRule, ManyArgumentsRule, DictionaryRule, ValueRule
+    PositionalArgumentRule, ManyArgumentsRule, DictionaryRule, ValueRule, LazySubcommandRule
 from nuclear.cli.parser.context import RunContext
 from nuclear.cli.parser.keyword import format_var_names, format_var_name
 from nuclear.cli.parser.parser import Parser
@@ -22,7 +22,8 @@ class _OptionHelp:
     subrules: List[CliRule] = field(default_factory=lambda: [])
 
 
-internal_options = {'--autocomplete', '--install-bash', '--install-autocomplete'}
+internal_options = {'--autocomplete', '--install-bash', '--install-autocomplete', '--completion-script',
+                    '--completion-daemon'}
 
 
 def print_help(rules: List[CliRule], app_name: str, version: str, help: str, subargs: List[str], hide_internal: bool):
@@ -192,7 +193,7 @@ def _generate_commands_helps(rules: List[CliRule], parent: _OptionHelp = None, s
     for rule in filter_rules(rules, SubcommandRule):
         subsubrules = (subrules or []) + rule.subrules
         helper = _subcommand_help(rule, parent, subsubrules)
-        if rule.run or rule.help:
+        if rule.run or rule.help or isinstance(rule, LazySubcommandRule):
             commands.append(helper)
         commands.extend(_generate_commands_helps(rule.subrules, helper, subsubrules))
     return commands
@@ -0,0 +1,88 @@
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, FrozenSet, List, Optional, Tuple
+
+
+class CachedChoices:
+    def __init__(self, provider: Callable[..., Any], ttl: Optional[float] = None, max_size: int = 128):
+        """
+        Choice provider wrapper remembering its results per currently typed word.
+        Provider's signature is introspected only once.
+        :param provider: function returning choices, optionally taking "current" keyword argument
+        :param ttl: number of seconds after which the results are retrieved again,
+        None keeps them as long as the rule exists, 0 disables memoization
+        :param max_size: maximum number of remembered results (for different words), the least recently used are evicted
+        """
+        self.provider: Callable[..., Any] = provider
+        self.ttl: Optional[float] = ttl
+        self.max_size: int = max_size
+        self.__takes_current: bool = takes_current(provider)
+        self.__results: 'OrderedDict[Optional[str], Tuple[float, List[Any], Optional[FrozenSet[Any]]]]' = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __call__(self, current: Optional[str] = None) -> List[Any]:
+        return self.__get(current)[1]
+
+    def choice_set(self, current: Optional[str] = None) -> Optional[FrozenSet[Any]]:
+        """Return choices as a set for fast membership checks or None if they're not hashable"""
+        return self.__get(current)[2]
+
+    def clear(self):
+        with self.__lock:
+            self.__results.clear()
+
+    def __get(self, current: Optional[str]) -> Tuple[float, List[Any], Optional[FrozenSet[Any]]]:
+        key = current if self.__takes_current else None
+        now = time.monotonic()
+        with self.__lock:
+            cached = self.__results.get(key)
+            if cached is not None and (self.ttl is None or now - cached[0] < self.ttl):
+                self.__results.move_to_end(key)
+                return cached
+
+        if self.__takes_current:
+            results = list(self.provider(current=current))
+        else:
+            results = list(self.provider())
+        entry = (now, results, to_choice_set(results))
+
+        if self.ttl != 0:
+            with self.__lock:
+                self.__results[key] = entry
+                self.__results.move_to_end(key)
+                while len(self.__results) > self.max_size:
+                    self.__results.popitem(last=False)
+        return entry
+
+
+def call_choice_provider(provider: Callable[..., Any], current: Optional[str] = None) -> List[Any]:
+    if takes_current(provider):
+        return list(provider(current=current))
+    return list(provider())
+
+
+def takes_current(provider: Callable[..., Any]) -> bool:
+    """Whether the choice provider takes "current" argument, its signature is introspected only once"""
+    try:
+        return _takes_current(provider)
+    except TypeError:  # unhashable callable
+        return _inspect_takes_current(provider)
+
+
+@functools.lru_cache(maxsize=1024)
+def _takes_current(provider: Callable[..., Any]) -> bool:
+    return _inspect_takes_current(provider)
+
+
+def _inspect_takes_current(provider: Callable[..., Any]) -> bool:
+    return len(inspect.getfullargspec(provider).args) >= 1
+
+
+def to_choice_set(choices: List[Any]) -> Optional[FrozenSet[Any]]:
+    try:
+        return frozenset(choices)
+    except TypeError:
+        return None
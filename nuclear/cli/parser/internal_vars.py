@@ -1,11 +1,11 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from .keyword import format_var_name
 
 
 class InternalVars:
-    def __init__(self):
-        self.vars: Dict[str, Any] = {}
+    def __init__(self, _vars: Optional[Dict[str, Any]] = None):
+        self.vars: Dict[str, Any] = _vars if _vars is not None else {}
 
     def __getitem__(self, key):
         return self.vars[format_var_name(key)]
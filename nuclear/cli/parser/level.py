@@ -0,0 +1,86 @@
+from copy import copy
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from nuclear.cli.builder.rule import CliRule, DefaultActionRule, FlagRule, ParameterRule, DictionaryRule, \
+    PositionalArgumentRule, ManyArgumentsRule, ParentRule, SubcommandRule, LazySubcommandRule, TCliRule
+from nuclear.cli.builder.typedef import Action
+from .keyword import format_var_name
+from .rule_table import RuleTable
+from .transform import normalize_keywords, filter_rules
+from .validate import validate_rules
+
+
+class ParserLevel:
+    def __init__(self,
+                 rules: List[CliRule],
+                 run: Optional[Action] = None,
+                 subcommand: Optional[SubcommandRule] = None,
+                 ):
+        """
+        Compiled rules of a single parser level: normalized, validated and indexed.
+        It holds no parsing state, so it can be reused by many subsequent parsings.
+        Deeper levels (subcommands, primary options) are compiled lazily, when they're entered for the first time.
+        :param rules: list of rules defined for the level of parser
+        :param run: default action to invoke when it's triggered
+        :param subcommand: A subcommand rule from which this level is derived
+        """
+        self.rules: List[CliRule] = rules
+        self.run: Optional[Action] = run
+        self.subcommand: Optional[SubcommandRule] = subcommand
+        self.__filtered: Dict[Tuple[Type[CliRule], ...], List[CliRule]] = {}
+        self.__sublevels: Dict[int, 'ParserLevel'] = {}
+
+        if not self.run:
+            for rule in self.filter(DefaultActionRule):
+                self.run = rule.run
+        normalize_keywords(self.filter(FlagRule, ParameterRule, DictionaryRule))
+        validate_rules(self.rules)
+        self.table: RuleTable = RuleTable(self.rules)
+        self.__default_vars: Dict[str, Any] = self._build_default_vars()
+
+    def filter(self, *types: Type[TCliRule]) -> List[TCliRule]:
+        filtered = self.__filtered.get(types)
+        if filtered is None:
+            filtered = filter_rules(self.rules, *types)
+            self.__filtered[types] = filtered
+        return filtered
+
+    def sublevel(self, rule: ParentRule) -> 'ParserLevel':
+        sublevel = self.__sublevels.get(id(rule))
+        if sublevel is None:
+            if isinstance(rule, LazySubcommandRule):
+                rule.load()
+            subcommand = rule if isinstance(rule, SubcommandRule) else None
+            sublevel = ParserLevel(rule.subrules, rule.run, subcommand=subcommand)
+            self.__sublevels[id(rule)] = sublevel
+        return sublevel
+
+    def default_vars(self) -> Dict[str, Any]:
+        """Return fresh copy of the initial variables, so that parsing can't modify the defaults"""
+        return {
+            name: copy(value) if isinstance(value, (list, dict)) else value
+            for name, value in self.__default_vars.items()
+        }
+
+    def _build_default_vars(self) -> Dict[str, Any]:
+        default_vars: Dict[str, Any] = {}
+
+        for rule in self.filter(FlagRule):
+            for keyword in rule.keywords:
+                default_vars[format_var_name(keyword)] = rule.default_value()
+
+        for rule in self.filter(ParameterRule):
+            for var_name in rule.var_names():
+                default_vars[format_var_name(var_name)] = rule.default_value()
+
+        for rule in self.filter(PositionalArgumentRule):
+            default_vars[format_var_name(rule.name)] = rule.default
+
+        for rule in self.filter(ManyArgumentsRule):
+            default_vars[format_var_name(rule.name)] = []
+
+        for rule in self.filter(DictionaryRule):
+            for var_name in rule.var_names():
+                default_vars[format_var_name(var_name)] = {}
+
+        return default_vars
@@ -1,30 +1,33 @@
 from typing import Dict
-from typing import Type, Any, List, TypeVar, Optional
+from typing import Type, Any, List, Optional
 
 from nuclear.cli.args.args_que import ArgsQue
 from nuclear.cli.args.container import ArgsContainer
-from nuclear.cli.builder.rule import PrimaryOptionRule, ParameterRule, FlagRule, CliRule, KeywordRule, \
-    DefaultActionRule, PositionalArgumentRule, ManyArgumentsRule, SubcommandRule, DictionaryRule, ValueRule
+from nuclear.cli.builder.rule import PrimaryOptionRule, ParameterRule, FlagRule, CliRule, \
+    PositionalArgumentRule, ManyArgumentsRule, SubcommandRule, DictionaryRule, ValueRule
 from nuclear.cli.builder.typedef import Action
 from nuclear.sublog import log
 from .context import RunContext
 from .error import CliSyntaxError
 from .inject import run_action
 from .internal_vars import InternalVars
-from .matcher import match_param, match_dictionary
-from .transform import normalize_keywords, TCliRule, filter_rules
-from .validate import validate_rules, check_strict_choices, check_required_arguments
+from .level import ParserLevel
+from .rule_table import RuleTable
+from .tokenizer import tokenize_args, FlagToken, ParamToken, DictToken
+from .transform import TCliRule
+from .validate import check_strict_choices, check_required_arguments
 from .value import parse_value_rule, parse_typed_value
 
 
 class Parser:
     def __init__(self,
-                 rules: List[CliRule],
+                 rules: List[CliRule] = None,
                  run: Optional[Action] = None,
                  parent: Optional['Parser'] = None,
                  dry: bool = False,
                  subcommand: Optional[SubcommandRule] = None,
                  error_unrecognized: bool = False,
+                 level: Optional[ParserLevel] = None,
                  ):
         """
         Command line arguments parser
@@ -33,45 +36,23 @@ class Parser:
         :param parent: parent parser for sub-parser on the deeper level
         :param dry: whether dry run should be invoked. Dry run does not trigger any action.
         :param subcommand: A subcommand rule from which this parser is derived
+        :param error_unrecognized: raise error when unrecognized argument is found
+        :param level: already compiled rules of this level to be reused instead of compiling the rules again
         """
-        self.__run: Action = run
-        self.__rules: List[CliRule] = rules
-        self.__subcommand: SubcommandRule = subcommand
-        self._init_rules()
+        if level is None:
+            level = ParserLevel(rules, run, subcommand=subcommand)
+        self.__level: ParserLevel = level
+        self.__run: Optional[Action] = level.run
+        self.__rules: List[CliRule] = level.rules
+        self.__subcommand: Optional[SubcommandRule] = level.subcommand
+        self.__table: RuleTable = level.table
 
         self.__parent: Optional['Parser'] = parent
         self.__action_triggered = parent.__action_triggered if parent else False
         self.__dry: bool = parent.__dry if parent else dry
         self.__error_unrecognized = error_unrecognized
 
-        self.internal_vars = InternalVars()
-        self._init_vars()
-
-    def _init_rules(self):
-        if not self.__run:
-            for rule in self._rules(DefaultActionRule):
-                self.__run = rule.run
-        normalize_keywords(self._rules(FlagRule, ParameterRule, DictionaryRule))
-        validate_rules(self.__rules)
-
-    def _init_vars(self):
-        for rule in self._rules(FlagRule):
-            for keyword in rule.keywords:
-                self.internal_vars[keyword] = rule.default_value()
-
-        for rule in self._rules(ParameterRule):
-            for var_name in rule.var_names():
-                self.internal_vars[var_name] = rule.default_value()
-
-        for rule in self._rules(PositionalArgumentRule):
-            self.internal_vars[rule.name] = rule.default
-
-        for rule in self._rules(ManyArgumentsRule):
-            self.internal_vars[rule.name] = []
-
-        for rule in self._rules(DictionaryRule):
-            for var_name in rule.var_names():
-                self.internal_vars[var_name] = {}
+        self.internal_vars = InternalVars(level.default_vars())
 
     def parse_args(self, args_list: List[str]) -> Optional[RunContext]:
         """
@@ -91,11 +72,8 @@ class Parser:
 
     def _parse_args_queue(self, args: ArgsQue) -> Optional[RunContext]:
         try:
-            self._parse_single_flags(args)
-            self._parse_params(args)
-            self._parse_dicts(args)
-            self._parse_combined_flags(args)
-            return self._parse_primary_options(args) or \
+            primary_option: Optional[PrimaryOptionRule] = self._parse_options(args)
+            return self._parse_primary_option(primary_option, args) or \
                 self._parse_subcommand(args) or \
                 self._parse_current_level(args)
         except CliSyntaxError as e:
@@ -112,12 +90,22 @@ class Parser:
             self._check_strict_choices()
         return self._run_default_action()
 
-    def _parse_single_flags(self, args: ArgsQue):
-        for arg in args:
-            rule: FlagRule = self._find_rule(FlagRule, arg)
-            if rule:
-                args.pop_current()
-                self._set_single_flag(rule)
+    def _parse_options(self, args: ArgsQue) -> Optional[PrimaryOptionRule]:
+        tokenized = tokenize_args(self.__table, args.pop_all())
+        args.put_all(tokenized.remaining)
+        for token in tokenized.options:
+            if isinstance(token, FlagToken):
+                for rule in token.rules:
+                    self._set_single_flag(rule)
+            elif isinstance(token, ParamToken):
+                value = token.values[0]
+                if value:
+                    self._parse_param(token.rule, value)
+            elif isinstance(token, DictToken):
+                raw_key, raw_value = token.values
+                if raw_value:
+                    self._parse_dict_entry(token.rule, raw_key, raw_value)
+        return tokenized.primary_option
 
     def _set_single_flag(self, rule: FlagRule):
         for keyword in rule.keywords:
@@ -127,33 +115,6 @@ class Parser:
             else:
                 self.internal_vars[keyword] = True
 
-    def _parse_combined_flags(self, args: ArgsQue):
-        for arg in args:
-            rules = self._extract_combined_flag(arg)
-            if rules:
-                args.pop_current()
-                for rule in rules:
-                    self._set_single_flag(rule)
-
-    def _extract_combined_flag(self, arg: str) -> List[FlagRule]:
-        if not arg.startswith('-') or arg.startswith('--'):
-            return []
-        matched_flags = []
-        for single_char in arg[1:]:
-            rule: FlagRule = self._find_rule(FlagRule, f'-{single_char}')
-            if rule:
-                matched_flags.append(rule)
-            else:
-                return []  # every combined character has to be detected as single flag
-        return matched_flags
-
-    def _parse_params(self, args: ArgsQue):
-        for arg in args:
-            for rule in self._rules(ParameterRule):
-                value = match_param(rule, args, arg)
-                if value:
-                    self._parse_param(rule, value)
-
     def _parse_param(self, rule: ParameterRule, value_str: str):
         try:
             parsed_value = parse_value_rule(rule, value_str)
@@ -170,14 +131,10 @@ class Parser:
             else:
                 self.internal_vars[var_name] = parsed_value
 
-    def _parse_dicts(self, args: ArgsQue):
-        for arg in args:
-            for rule in self._rules(DictionaryRule):
-                raw_key, raw_value = match_dictionary(rule, args, arg)
-                if raw_value:
-                    entry_key = parse_typed_value(rule.key_type, raw_key)
-                    entry_value = parse_typed_value(rule.value_type, raw_value)
-                    self._add_dict_value(rule, entry_key, entry_value)
+    def _parse_dict_entry(self, rule: DictionaryRule, raw_key: str, raw_value: str):
+        entry_key = parse_typed_value(rule.key_type, raw_key)
+        entry_value = parse_typed_value(rule.value_type, raw_value)
+        self._add_dict_value(rule, entry_key, entry_value)
 
     def _add_dict_value(self, rule: DictionaryRule, entry_key, entry_value):
         for var_name in rule.var_names():
@@ -185,24 +142,21 @@ class Parser:
             oldval[entry_key] = entry_value
             self.internal_vars[var_name] = oldval
 
-    def _parse_primary_options(self, args: ArgsQue) -> Optional[RunContext]:
-        for arg in args:
-            rule: PrimaryOptionRule = self._find_rule(PrimaryOptionRule, arg)
-            if rule:
-                args.pop_current()
-                self.__action_triggered = True
-                subparser = Parser(rule.subrules, rule.run, parent=self)
-                return subparser._parse_args_queue(args)
+    def _parse_primary_option(self, rule: Optional[PrimaryOptionRule], args: ArgsQue) -> Optional[RunContext]:
+        if rule:
+            self.__action_triggered = True
+            subparser = Parser(level=self.__level.sublevel(rule), parent=self)
+            return subparser._parse_args_queue(args)
         return None
 
     def _parse_subcommand(self, args: ArgsQue) -> Optional[RunContext]:
         if args:
             # recognize first argument as a command
             first = args.reset().peek_current()
-            rule: SubcommandRule = self._find_rule(SubcommandRule, first)
+            rule: Optional[SubcommandRule] = self.__table.find_subcommand(first)
             if rule:
                 args.pop_current()
-                subparser = Parser(rule.subrules, rule.run, parent=self, subcommand=rule)
+                subparser = Parser(level=self.__level.sublevel(rule), parent=self)
                 return subparser._parse_args_queue(args)
         return None
 
@@ -226,8 +180,7 @@ class Parser:
                 raise CliSyntaxError(f'{retrieve_count} positional arguments are required,'
                                      f' but "{len(args)} given"')
             retrieved = []
-            for _ in range(retrieve_count):
-                arg = args.pop_current()
+            for arg in args.pop_front(retrieve_count):
                 try:
                     parsed_value = parse_value_rule(rule, arg)
                     retrieved.append(parsed_value)
@@ -268,15 +221,7 @@ class Parser:
             self.__parent._check_strict_choices()
 
     def _rules(self, *types: Type[TCliRule]) -> List[TCliRule]:
-        return filter_rules(self.__rules, *types)
-
-    TKeywordRule = TypeVar('TKeywordRule', bound=KeywordRule)
-
-    def _find_rule(self, rule_type: Type[TKeywordRule], keyword: str) -> Optional[TKeywordRule]:
-        for rule in self.__rules:
-            if isinstance(rule, rule_type):
-                if keyword in rule.keywords:
-                    return rule
+        return self.__level.filter(*types)
 
     def _internal_vars_merged(self) -> Dict[str, Any]:
         if self.__parent:
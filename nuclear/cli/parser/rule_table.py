@@ -0,0 +1,65 @@
+from typing import Dict, List, Optional, Tuple, Type
+
+from nuclear.cli.builder.rule import CliRule, FlagRule, ParameterRule, DictionaryRule, PrimaryOptionRule, \
+    SubcommandRule, TCliRule
+from .transform import filter_rules
+
+
+class RuleTable:
+    def __init__(self, rules: List[CliRule]):
+        """
+        Keyword index of the rules defined on a single parser level.
+        It's compiled once, so that every argument is matched to its rule in a constant time.
+        :param rules: list of rules defined for the level of parser (with normalized keywords)
+        """
+        self.flags: Dict[str, FlagRule] = _index_keywords(rules, FlagRule)
+        self.params: Dict[str, ParameterRule] = _index_keywords(rules, ParameterRule)
+        self.dicts: Dict[str, DictionaryRule] = _index_keywords(rules, DictionaryRule)
+        self.primary_options: Dict[str, PrimaryOptionRule] = _index_keywords(rules, PrimaryOptionRule)
+        self.subcommands: Dict[str, SubcommandRule] = _index_keywords(rules, SubcommandRule)
+
+    def find_flag(self, arg: str) -> Optional[FlagRule]:
+        return self.flags.get(arg)
+
+    def find_param(self, arg: str) -> Tuple[Optional[ParameterRule], Optional[str]]:
+        """
+        Match argument to a parameter rule either in a form of "--name" or "--name=value"
+        :return: matched rule and the inline value (if it's given in "--name=value" form)
+        """
+        rule = self.params.get(arg)
+        if rule is not None:
+            return rule, None
+        keyword, separator, inline_value = arg.partition('=')
+        if separator:
+            rule = self.params.get(keyword)
+            if rule is not None:
+                return rule, inline_value
+        return None, None
+
+    def find_dict(self, arg: str) -> Optional[DictionaryRule]:
+        return self.dicts.get(arg)
+
+    def find_combined_flags(self, arg: str) -> List[FlagRule]:
+        if not arg.startswith('-') or arg.startswith('--'):
+            return []
+        matched_flags = []
+        for single_char in arg[1:]:
+            rule = self.flags.get(f'-{single_char}')
+            if rule is None:
+                return []  # every combined character has to be detected as single flag
+            matched_flags.append(rule)
+        return matched_flags
+
+    def find_primary_option(self, arg: str) -> Optional[PrimaryOptionRule]:
+        return self.primary_options.get(arg)
+
+    def find_subcommand(self, arg: str) -> Optional[SubcommandRule]:
+        return self.subcommands.get(arg)
+
+
+def _index_keywords(rules: List[CliRule], rule_type: Type[TCliRule]) -> Dict[str, TCliRule]:
+    index: Dict[str, TCliRule] = {}
+    for rule in filter_rules(rules, rule_type):
+        for keyword in rule.keywords:
+            index.setdefault(keyword, rule)  # first defined rule takes precedence
+    return index
@@ -0,0 +1,100 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, Union
+
+from nuclear.cli.builder.rule import FlagRule, ParameterRule, DictionaryRule, PrimaryOptionRule
+from .error import CliSyntaxError
+from .rule_table import RuleTable
+
+
+@dataclass
+class FlagToken:
+    rules: List[FlagRule]
+
+
+@dataclass
+class ParamToken:
+    rule: ParameterRule
+    values: List[str] = field(default_factory=lambda: [])
+
+    def awaited_values(self) -> int:
+        return 1 - len(self.values)
+
+
+@dataclass
+class DictToken:
+    rule: DictionaryRule
+    values: List[str] = field(default_factory=lambda: [])
+
+    def awaited_values(self) -> int:
+        return 2 - len(self.values)
+
+
+OptionToken = Union[FlagToken, ParamToken, DictToken]
+
+
+@dataclass
+class TokenizedArgs:
+    options: List[OptionToken] = field(default_factory=lambda: [])
+    primary_option: Optional[PrimaryOptionRule] = None
+    remaining: List[str] = field(default_factory=lambda: [])
+
+
+def tokenize_args(table: RuleTable, args: List[str]) -> TokenizedArgs:
+    """
+    Classify every argument in a single pass against the rules of one parser level.
+    Flags, parameters and dictionaries are recognized anywhere in the arguments list
+    (also after positional arguments and subcommands).
+    Single flags take precedence over the values awaited by parameters and dictionaries.
+    Only the first primary option is recognized.
+    Arguments that are not recognized on this level are kept in the original order.
+    """
+    tokenized = TokenizedArgs()
+    pending: Optional[Union[ParamToken, DictToken]] = None
+
+    for arg in args:
+        flag_rule = table.find_flag(arg)
+        if flag_rule is not None:
+            tokenized.options.append(FlagToken([flag_rule]))
+            continue
+
+        if pending is not None:
+            pending.values.append(arg)
+            if not pending.awaited_values():
+                tokenized.options.append(pending)
+                pending = None
+            continue
+
+        param_rule, inline_value = table.find_param(arg)
+        if param_rule is not None:
+            if inline_value is not None:
+                tokenized.options.append(ParamToken(param_rule, [inline_value]))
+            else:
+                pending = ParamToken(param_rule)
+            continue
+
+        dict_rule = table.find_dict(arg)
+        if dict_rule is not None:
+            pending = DictToken(dict_rule)
+            continue
+
+        combined_rules = table.find_combined_flags(arg)
+        if combined_rules:
+            tokenized.options.append(FlagToken(combined_rules))
+            continue
+
+        if tokenized.primary_option is None:
+            primary_rule = table.find_primary_option(arg)
+            if primary_rule is not None:
+                tokenized.primary_option = primary_rule
+                continue
+
+        tokenized.remaining.append(arg)
+
+    if isinstance(pending, ParamToken):
+        raise CliSyntaxError('missing value argument for parameter')
+    if isinstance(pending, DictToken):
+        if not pending.values:
+            raise CliSyntaxError('missing key argument for dictionary')
+        raise CliSyntaxError('missing value argument for dictionary')
+
+    return tokenized
@@ -1,11 +1,11 @@
-from typing import List, Optional
+from typing import Any, FrozenSet, List, Optional
 
 from nuclear.cli.builder.rule import CliRule, PositionalArgumentRule, ManyArgumentsRule, \
     OptionalValueRule, ValueRule, ParameterRule
 from nuclear.cli.parser.internal_vars import InternalVars
 from .error import CliDefinitionError, CliSyntaxError
 from .transform import filter_rules
-from .value import generate_value_choices
+from .value import generate_value_choices, generate_choice_set
 
 
 def validate_rules(all_rules: List[CliRule]):
@@ -47,24 +47,25 @@ def check_strict_choices(rules: List[ValueRule], internal_vars: InternalVars):
     for rule in rules:
         if rule.strict_choices and rule.choices:
             available_choices = generate_value_choices(rule)
+            choice_set = generate_choice_set(rule, available_choices)
 
             if isinstance(rule, ParameterRule):
                 for name in rule.var_names():
                     if rule.multiple:
                         for var_value in internal_vars[name]:
-                            if var_value not in available_choices:
+                            if not _is_available_choice(var_value, choice_set, available_choices):
                                 raise CliSyntaxError(
                                     f'parameter value {var_value} does not belong to available choices: '
                                     f'{available_choices}')
                     else:
                         var_value = internal_vars[name]
-                        if var_value not in available_choices:
+                        if not _is_available_choice(var_value, choice_set, available_choices):
                             raise CliSyntaxError(f'parameter value {var_value} does not belong to available choices: '
                                                  f'{available_choices}')
 
             elif isinstance(rule, PositionalArgumentRule):
                 var_value = internal_vars[rule.name]
-                if var_value not in available_choices:
+                if not _is_available_choice(var_value, choice_set, available_choices):
                     raise CliSyntaxError(
                         f'positional argument value {var_value} does not belong to available choices: '
                         f'{available_choices}')
@@ -72,7 +73,16 @@ def check_strict_choices(rules: List[ValueRule], internal_vars: InternalVars):
             elif isinstance(rule, ManyArgumentsRule):
                 var_values: List = internal_vars[rule.name]
                 for var_value in var_values:
-                    if var_value not in available_choices:
+                    if not _is_available_choice(var_value, choice_set, available_choices):
                         raise CliSyntaxError(
                             f'one of arguments value {var_value} does not belong to available choices: '
                             f'{available_choices}')
+
+
+def _is_available_choice(value: Any, choice_set: Optional[FrozenSet[Any]], available_choices: List[Any]) -> bool:
+    if choice_set is not None:
+        try:
+            return value in choice_set
+        except TypeError:
+            pass
+    return value in available_choices
@@ -1,9 +1,9 @@
-import inspect
 from collections.abc import Iterable
-from typing import List, Any, Optional
+from typing import List, Any, Optional, FrozenSet
 
 from nuclear.cli.builder.rule import ValueRule
 from nuclear.cli.builder.typedef import TypeOrParser
+from nuclear.cli.parser.choices import CachedChoices, call_choice_provider, to_choice_set
 from nuclear.cli.parser.error import CliSyntaxError
 from nuclear.cli.types.boolean import boolean
 
@@ -55,10 +55,20 @@ def generate_value_choices(rule: ValueRule, current: Optional[str] = None) -> Li
         return rule.choices
     elif isinstance(rule.choices, Iterable):
         return [choice for choice in rule.choices]
+    elif isinstance(rule.choices, CachedChoices):
+        return rule.choices(current=current)
     else:
-        (args, _, _, _, _, _, annotations) = inspect.getfullargspec(rule.choices)
-        if len(args) >= 1:
-            results = rule.choices(current=current)
-        else:
-            results = rule.choices()
-        return list(results)
+        return call_choice_provider(rule.choices, current)
+
+
+def generate_choice_set(rule: ValueRule, choices: Optional[List[Any]] = None) -> Optional[FrozenSet[Any]]:
+    """
+    Return available choices as a set for fast membership checks or None if they're not hashable
+    :param choices: choices generated already for the same rule, so the choices provider isn't called again
+    """
+    if not rule.choices:
+        return frozenset()
+    elif isinstance(rule.choices, CachedChoices):
+        return rule.choices.choice_set()
+    else:
+        return to_choice_set(choices if choices is not None else generate_value_choices(rule))
@@ -4,6 +4,7 @@ from .config import load_config, NukeConfig
 from .shell import sh, ShellRunner
 from .paths import validate_sources
 from .invoke import run, depends
+from .incremental import inputs, outputs
 
 T = TypeVar('T')
 
@@ -0,0 +1,170 @@
+import contextlib
+import hashlib
+import json
+import os
+import re
+import tarfile
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator, Optional
+
+from nuclear.nuke.incremental import expand_paths, file_digest
+from nuclear.sublog import logger
+
+DEFAULT_CACHE_MAX_SIZE = 5 * 1024 ** 3
+
+
+class LocalArtifactCache:
+    def __init__(self, root: Path, max_size: int = DEFAULT_CACHE_MAX_SIZE):
+        """
+        Content-addressed storage of target outputs in a local directory.
+        The directory can be shared between machines (e.g. NFS, mounted volume),
+        entries are written atomically, so concurrent writers don't corrupt them.
+        Least recently used entries are evicted once the total size exceeds the limit.
+        :param root: directory to keep the entries in
+        :param max_size: maximum total size of the entries in bytes
+        """
+        self.root: Path = root
+        self.max_size: int = max_size
+
+    def load(self, key: str) -> Optional[Path]:
+        """Return path of the archive stored under the key, or None if it's missing"""
+        path = self._entry_path(key)
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None
+        except OSError:
+            pass
+        return path
+
+    @contextlib.contextmanager
+    def save(self, key: str) -> Iterator[BinaryIO]:
+        """
+        Open a new entry for writing, it's stored under the key once the block finishes successfully.
+        The content is written to a temporary file next to the entry, so it never has to fit in memory.
+        """
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.parent / f'.{path.name}.{uuid.uuid4().hex}.tmp'
+        try:
+            with temp_path.open('wb') as file:
+                yield file
+            os.replace(temp_path, path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the total size is within the limit"""
+        entries = []
+        for path in self.root.glob('*/*.tar'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # removed by another process
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+            logger.debug('artifact evicted from cache', path=path)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / key[:2] / f'{key}.tar'
+
+
+class TargetCache:
+    def __init__(self, backend: LocalArtifactCache, nukefile: Optional[Path] = None, config: Any = None):
+        """
+        Restores the declared outputs of targets instead of running them again.
+        Entries are keyed by the target name, content of its declared inputs,
+        values of the config fields and the source of the nukefile.
+        Only targets declaring their outputs with @outputs are cached.
+        :param backend: storage of the artifacts
+        :param nukefile: source file of the targets
+        :param config: loaded config the targets depend on
+        """
+        self._backend: LocalArtifactCache = backend
+        self._nukefile_digest: str = file_digest(nukefile) if nukefile is not None else ''
+        self._config_values: dict[str, Any] = config_values(config) if config is not None else {}
+
+    def key(self, target_name: str, function: Callable) -> Optional[str]:
+        output_patterns = getattr(function, '__outputs__', ())
+        if not output_patterns:
+            return None
+        input_paths = expand_paths(getattr(function, '__inputs__', ()))
+        fingerprint = {
+            'target': target_name,
+            'inputs': {str(path): file_digest(path) for path in input_paths},
+            'outputs': list(output_patterns),
+            'config': self._config_values,
+            'nukefile': self._nukefile_digest,
+        }
+        encoded = json.dumps(fingerprint, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def restore(self, target_name: str, function: Callable) -> bool:
+        """Extract the cached outputs of the target, return whether they have been found"""
+        key = self.key(target_name, function)
+        if key is None:
+            return False
+        path = self._backend.load(key)
+        if path is None:
+            return False
+        try:
+            archive = tarfile.open(path)
+        except FileNotFoundError:
+            return False  # evicted by another process in the meantime
+        with archive:
+            members = archive.getmembers()
+            for member in members:
+                if not _is_safe_member(member):
+                    logger.warn('ignoring corrupted cache entry', target=target_name, member=member.name)
+                    return False
+            if hasattr(tarfile, 'data_filter'):
+                archive.extractall(members=members, filter='data')
+            else:
+                archive.extractall(members=members)
+        logger.info(f'Target outputs restored from cache: {target_name}', files=len(members))
+        return True
+
+    def store(self, target_name: str, function: Callable):
+        """Save the outputs of a target, which has just been run successfully"""
+        key = self.key(target_name, function)
+        if key is None:
+            return
+        output_paths = expand_paths(getattr(function, '__outputs__', ()))
+        if not output_paths:
+            return
+        if any(path.is_absolute() or '..' in path.parts for path in output_paths):
+            logger.debug('outputs outside of the project are not cached', target=target_name)
+            return
+        with self._backend.save(key) as file, tarfile.open(fileobj=file, mode='w') as archive:
+            for path in output_paths:
+                archive.add(path, recursive=False)
+
+
+def config_values(config: Any) -> dict[str, Any]:
+    """Collect values of the annotated config fields, including the inherited ones"""
+    names: list[str] = []
+    for clazz in reversed(type(config).__mro__):
+        for name in getattr(clazz, '__annotations__', {}):
+            if name not in names:
+                names.append(name)
+    return {name: getattr(config, name, None) for name in names}
+
+
+def parse_size(value: str) -> int:
+    """Parse size in bytes, with optional K, M, G suffix, e.g. 500M"""
+    match = re.fullmatch(r'(\d+)([KMG]?)B?', value.strip().upper())
+    assert match, f'invalid size: {value}'
+    multiplier = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}[match.group(2)]
+    return int(match.group(1)) * multiplier
+
+
+def _is_safe_member(member: tarfile.TarInfo) -> bool:
+    path = Path(member.name)
+    return (member.isfile() or member.isdir()) and not path.is_absolute() and '..' not in path.parts
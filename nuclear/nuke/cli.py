@@ -1,18 +1,30 @@
+import os
 import sys
 from pathlib import Path
 import importlib.util
 
-from nuclear.sublog import error_handler
-from .invoke import _run_with_args
+from nuclear.sublog import error_handler, logger
+from .invoke import _run_with_args, _show_available_targets
+from .registry import find_nukefile, list_target_names, load_cached_target_names, save_target_names
 
 
 def main():
     """Entry point for the 'nuke' command-line tool."""
     with error_handler():
-        nukefile_path = Path.cwd() / 'nukefile.py'
+        nukefile_path = find_nukefile(Path.cwd())
+        if nukefile_path is None:
+            raise FileNotFoundError(f'nukefile.py not found in {Path.cwd()} or any of its parent directories')
 
-        if not nukefile_path.exists():
-            raise FileNotFoundError(f'nukefile.py not found in {Path.cwd()}')
+        if nukefile_path.parent != Path.cwd():
+            # run from the project root, so the paths in the nukefile are resolved the same way
+            logger.debug('Entering directory', path=nukefile_path.parent)
+            os.chdir(nukefile_path.parent)
+
+        args = sys.argv[1:]
+        if not args:
+            cached_target_names = load_cached_target_names(nukefile_path)
+            if cached_target_names is not None:
+                return _show_available_targets(cached_target_names)
 
         # Load nukefile.py as a regular module (not as __main__)
         spec = importlib.util.spec_from_file_location('nukefile', nukefile_path)
@@ -21,12 +33,14 @@ def main():
 
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
+        target_names = list_target_names(module)
+        save_target_names(nukefile_path, target_names)
 
         # Temporarily set as __main__ for invoke functions to find targets
         original_main = sys.modules.get('__main__')
         sys.modules['__main__'] = module
         try:
-            _run_with_args(sys.argv[1:])
+            _run_with_args(args, target_names)
         finally:
             # Restore original __main__
             if original_main is not None:
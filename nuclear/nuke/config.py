@@ -1,14 +1,16 @@
 import dataclasses
+import functools
 import json
+import typing
 from datetime import datetime, timezone
 from pathlib import Path
 import sys
-from typing import Any, Type, TypeVar, Union, get_origin, get_args
+from typing import Any, Callable, Optional, Type, TypeVar, Union, get_origin, get_args
 
 import yaml
 
 from nuclear import logger, ContextError
-from nuclear.nuke.invoke import parse_cli_args
+from nuclear.nuke.invoke import RUN_OPTION_NAMES, parse_cli_args, parse_run_options
 
 T = TypeVar('T')
 UnionType = type(str | None)
@@ -26,20 +28,46 @@ class NukeConfig:
     dry: bool = False
 
 
+_loaded_config: Any = None
+
+
 def load_config(clazz: Type[T]) -> T:
+    global _loaded_config
     try:
         local_overrides = _load_local_overrides()
-        _, cli_overrides = parse_cli_args(sys.argv[1:])
+        _warn_run_option_clashes(clazz)
+        _, args = parse_run_options(sys.argv[1:], config_field_names(clazz))
+        _, cli_overrides = parse_cli_args(args)
         if cli_overrides:
             logger.debug('Applying CLI overrides to config', cli_overrides=cli_overrides)
 
         overrides: dict[str, Any] = local_overrides | cli_overrides
-        return apply_overrides(clazz(), clazz, overrides)
+        _loaded_config = apply_overrides(clazz(), clazz, overrides)
+        return _loaded_config
 
     except Exception as e:
         raise ContextError('loading config failed', e)
 
 
+def _warn_run_option_clashes(clazz: type):
+    """Config fields take precedence over the options of the nuke runner with the same names"""
+    clashes = sorted(RUN_OPTION_NAMES & config_field_names(clazz))
+    if clashes:
+        logger.warn('Config fields clash with the options of nuke runner, these options are left for the config. '
+                    'Rename the fields to use the options',
+                    fields=', '.join(clashes))
+
+
+def config_field_names(clazz: type) -> set[str]:
+    """Return names of the fields of a config class, including the inherited ones"""
+    return set(_resolve_annotations(clazz).keys())
+
+
+def get_loaded_config() -> Any:
+    """Return the config loaded most recently by load_config, if any"""
+    return _loaded_config
+
+
 def _load_local_overrides() -> dict[str, Any]:
     path = Path('.config.yaml')
     if not path.is_file():
@@ -52,62 +80,160 @@ def _load_local_overrides() -> dict[str, Any]:
 
 
 def apply_overrides(obj: T, clazz: Type[T], overrides: dict[str, Any]) -> T:
-    field_types: dict[str, Type] = clazz.__annotations__
+    field_converters: dict[str, Converter] = _class_schema(clazz)
     for key, value in overrides.items():
-        if key not in field_types:
+        converter = field_converters.get(key)
+        if converter is None:
             raise KeyError(f'unexpected field "{key}" provided for type {clazz}')
-        converted_value = parse_typed_object(value, field_types[key])
-        setattr(obj, key, converted_value)
+        setattr(obj, key, converter(value))
     return obj
 
 
 def parse_typed_object(obj: Any, clazz: Type[T]):
-    if obj is None:
-        return None
+    return compile_converter(clazz)(obj)
+
+
+Converter = Callable[[Any], Any]
 
-    if type(obj) is str:
-        if clazz is datetime:
+
+@functools.lru_cache(maxsize=None)
+def compile_converter(clazz: Any) -> Converter:
+    """
+    Build a function converting raw values (e.g. strings from CLI, YAML structures) to the given type.
+    Type is inspected only once, converters of nested types (dataclass fields, list items, union members)
+    are compiled up front and the result is cached, so parsing large structures doesn't repeat the inspection.
+    """
+    if clazz is Any:
+        return _identity
+    origin = get_origin(clazz)
+    if origin in {Union, UnionType}:
+        return _none_safe(_union_converter(clazz))
+    if dataclasses.is_dataclass(clazz):
+        return _none_safe(_dataclass_converter(clazz))
+    if origin is list:
+        return _none_safe(_list_converter(clazz))
+    if origin is dict:
+        return _none_safe(_dict_converter(clazz))
+    return _none_safe(_scalar_converter(clazz))
+
+
+@functools.lru_cache(maxsize=None)
+def _class_schema(clazz: type) -> dict[str, Converter]:
+    """Map fields of a config class, including the inherited ones, to their converters"""
+    return {name: compile_converter(field_type) for name, field_type in _resolve_annotations(clazz).items()}
+
+
+def _resolve_annotations(clazz: type) -> dict[str, Any]:
+    try:
+        return typing.get_type_hints(clazz)
+    except (NameError, TypeError):  # unresolvable forward reference
+        annotations: dict[str, Any] = {}
+        for base in reversed(clazz.__mro__):
+            annotations.update(getattr(base, '__annotations__', {}))
+        return annotations
+
+
+def _none_safe(converter: Converter) -> Converter:
+    def convert(obj: Any) -> Any:
+        if obj is None:
+            return None
+        return converter(obj)
+    return convert
+
+
+def _scalar_converter(clazz: Any) -> Converter:
+    if clazz is datetime:
+        def parse_str(obj: str) -> Any:
             return datetime.fromisoformat(obj).replace(tzinfo=timezone.utc)
-        elif get_origin(clazz) is list and get_args(clazz)[0] is str:
-            return json.loads(obj)
-        elif clazz is bool:
+    elif clazz is bool:
+        def parse_str(obj: str) -> Any:
             return obj.lower() in {'true', 'yes', 'on', '1', 'y', 't'}
-        elif clazz in [int, float]:
+    elif clazz in [int, float]:
+        def parse_str(obj: str) -> Any:
             return clazz(obj)
-    
-    if dataclasses.is_dataclass(clazz):
+    else:
+        parse_str = None
+
+    is_plain_type = get_origin(clazz) is None and isinstance(clazz, type)
+
+    def convert(obj: Any) -> Any:
+        if parse_str is not None and type(obj) is str:
+            return parse_str(obj)
+        if is_plain_type and isinstance(obj, clazz):
+            return obj
+        try:
+            return clazz(obj)
+        except BaseException as e:
+            raise ValueError(f'failed to parse "{obj}" ({type(obj)}) to type {clazz}: {e}')
+    return convert
+
+
+def _list_converter(clazz: Any) -> Converter:
+    args = get_args(clazz)
+    item_converter = compile_converter(args[0]) if args else _identity
+
+    def convert(obj: Any) -> Any:
+        if type(obj) is str:
+            obj = json.loads(obj)
+        return [item_converter(item) for item in obj]
+    return convert
+
+
+def _dict_converter(clazz: Any) -> Converter:
+    args = get_args(clazz)
+    key_converter = compile_converter(args[0]) if args else _identity
+    value_converter = compile_converter(args[1]) if args else _identity
+
+    def convert(obj: Any) -> Any:
+        if type(obj) is str:
+            obj = json.loads(obj)
+        assert isinstance(obj, dict), f'expected dict type to parse into {clazz}, got {type(obj)}'
+        return {key_converter(key): value_converter(value) for key, value in obj.items()}
+    return convert
+
+
+def _dataclass_converter(clazz: Any) -> Converter:
+    field_converters: Optional[dict[str, Converter]] = None
+
+    def convert(obj: Any) -> Any:
+        nonlocal field_converters
+        if isinstance(obj, clazz):
+            return obj
         assert isinstance(obj, dict), f'expected dict type to parse into a dataclass, got {type(obj)}'
-        field_types = {field.name: field.type for field in dataclasses.fields(clazz)}
+        if field_converters is None:  # compiled on first use, so self-referencing dataclasses don't recurse forever
+            field_types = _resolve_annotations(clazz)
+            # built aside and published at once, so concurrent targets never see it half-filled
+            field_converters = {
+                field.name: compile_converter(field_types.get(field.name, field.type))
+                for field in dataclasses.fields(clazz)
+            }
         dataclass_kwargs = dict()
         for key, value in obj.items():
-            if key not in field_types:
+            converter = field_converters.get(key)
+            if converter is None:
                 raise KeyError(f'unexpected field "{key}" provided to type {clazz}')
-            dataclass_kwargs[key] = parse_typed_object(value, field_types[key])
+            dataclass_kwargs[key] = converter(value)
         return clazz(**dataclass_kwargs)
-    
-    elif get_origin(clazz) in {Union, UnionType}:  # Union or Optional type
-        union_types = get_args(clazz)
-        left_types = []
-        for union_type in union_types:
-            if dataclasses.is_dataclass(union_type):
-                if obj is not None:
-                    return parse_typed_object(obj, union_type)
-            elif union_type is NoneType:
-                if obj is None:
-                    return None
-            else:
-                left_types.append(union_type)
-        if not left_types:
+    return convert
+
+
+def _union_converter(clazz: Any) -> Converter:
+    union_types = get_args(clazz)
+    dataclass_types = [t for t in union_types if dataclasses.is_dataclass(t)]
+    left_types = [t for t in union_types if t is not NoneType and not dataclasses.is_dataclass(t)]
+    if dataclass_types:
+        # any non-null value goes to the first dataclass type
+        return compile_converter(dataclass_types[0])
+    if not left_types:
+        def no_match(obj: Any) -> Any:
             raise ValueError(f'none of the union types "{clazz}" match to a given value: {obj}')
-        if len(left_types) > 1:
+        return no_match
+    if len(left_types) > 1:
+        def ambiguous(obj: Any) -> Any:
             raise ValueError(f'too many ambiguous union types {left_types} ({clazz}) matching to a given value: {obj}')
-        return parse_typed_object(obj, left_types[0])
-    
-    elif get_origin(clazz) is None and isinstance(obj, clazz):
-        return obj
+        return ambiguous
+    return compile_converter(left_types[0])
 
-    else:
-        try:
-            return clazz(obj)
-        except BaseException as e:
-            raise ValueError(f'failed to parse "{obj}" ({type(obj)}) to type {clazz}: {e}')
+
+def _identity(obj: Any) -> Any:
+    return obj
@@ -0,0 +1,140 @@
+import glob
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from nuclear.sublog import logger
+
+STATE_DIR = Path('.nuke')
+
+
+def inputs(*patterns: str):
+    """
+    Decorator to declare files read by a target, glob patterns are allowed.
+    Target is skipped when its outputs are up to date with the inputs.
+
+    Usage:
+        @inputs('src/**/*.c', 'Makefile')
+        @outputs('dist/app')
+        def build():
+            ...
+    """
+    def decorator(func):
+        func.__inputs__ = patterns
+        return func
+    return decorator
+
+
+def outputs(*patterns: str):
+    """Decorator to declare files produced by a target, glob patterns are allowed."""
+    def decorator(func):
+        func.__outputs__ = patterns
+        return func
+    return decorator
+
+
+def expand_paths(patterns: tuple[str, ...]) -> list[Path]:
+    """Find files matching glob patterns (including "**"), directories are expanded to the files inside"""
+    paths: set[Path] = set()
+    for pattern in patterns:
+        for match in glob.glob(pattern, recursive=True):
+            path = Path(match)
+            if path.is_dir():
+                paths.update(p for p in path.rglob('*') if p.is_file())
+            elif path.is_file():
+                paths.add(path)
+    return sorted(paths)
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildState:
+    def __init__(self, state_dir: Path = STATE_DIR):
+        """
+        Keeps track of the targets declaring their inputs and outputs to skip the ones which are up to date.
+        Content hashes of the files used by the last successful run of each target are stored in a manifest
+        in the state directory.
+        :param state_dir: directory to keep the manifest in
+        """
+        self._manifest_path: Path = state_dir / 'manifest.json'
+        self._manifest: Optional[dict[str, dict[str, dict[str, str]]]] = None
+        self._lock = threading.Lock()
+
+    def is_up_to_date(self, target_name: str, function: Callable) -> bool:
+        """
+        Check if the target can be skipped: its outputs are newer than its inputs,
+        or the content of both is the same as after the last successful run.
+        Targets not declaring their outputs are never up to date,
+        neither are the ones with declared inputs not matching any file (e.g. a typo or a missing source).
+        """
+        input_patterns, output_patterns = _declared_patterns(function)
+        if not output_patterns:
+            return False
+        missing_inputs = [pattern for pattern in input_patterns if not glob.glob(pattern, recursive=True)]
+        if missing_inputs:
+            logger.warn(f'Inputs of target {target_name} match no files', patterns=' '.join(missing_inputs))
+            return False
+        input_paths = expand_paths(input_patterns)
+        output_paths = expand_paths(output_patterns)
+        if not output_paths or any(not glob.glob(pattern, recursive=True) for pattern in output_patterns):
+            return False  # some outputs are missing
+
+        if not input_paths or _newest_mtime(input_paths) <= _oldest_mtime(output_paths):
+            return True
+
+        with self._lock:
+            recorded = self._load_manifest().get(target_name)
+        if recorded is None:
+            return False
+        return recorded == _snapshot(input_paths, output_paths)
+
+    def record(self, target_name: str, function: Callable):
+        """Remember content of the files used by a target which has just been run successfully"""
+        input_patterns, output_patterns = _declared_patterns(function)
+        if not output_patterns:
+            return
+        snapshot = _snapshot(expand_paths(input_patterns), expand_paths(output_patterns))
+        with self._lock:
+            manifest = self._load_manifest()
+            manifest[target_name] = snapshot
+            self._manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self._manifest_path.with_suffix('.tmp')
+            temp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+            temp_path.replace(self._manifest_path)
+
+    def _load_manifest(self) -> dict[str, Any]:
+        if self._manifest is None:
+            self._manifest = {}
+            if self._manifest_path.is_file():
+                try:
+                    self._manifest = json.loads(self._manifest_path.read_text())
+                except ValueError as e:
+                    logger.warn('ignoring corrupted nuke manifest', path=self._manifest_path, error=str(e))
+        return self._manifest
+
+
+def _declared_patterns(function: Callable) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    return getattr(function, '__inputs__', ()), getattr(function, '__outputs__', ())
+
+
+def _snapshot(input_paths: list[Path], output_paths: list[Path]) -> dict[str, dict[str, str]]:
+    return {
+        'inputs': {str(path): file_digest(path) for path in input_paths},
+        'outputs': {str(path): file_digest(path) for path in output_paths},
+    }
+
+
+def _newest_mtime(paths: list[Path]) -> float:
+    return max(path.stat().st_mtime for path in paths)
+
+
+def _oldest_mtime(paths: list[Path]) -> float:
+    return min(path.stat().st_mtime for path in paths)
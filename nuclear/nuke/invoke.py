@@ -1,8 +1,17 @@
-import inspect
+import os
 import re
 import sys
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Collection, Optional
 
 from nuclear.sublog import logger, error_handler
+from nuclear.nuke.artifacts import DEFAULT_CACHE_MAX_SIZE, LocalArtifactCache, TargetCache, parse_size
+from nuclear.nuke.incremental import BuildState
+from nuclear.nuke.profiling import Profiler, set_active_profiler
+from nuclear.nuke.registry import list_target_names
+from nuclear.nuke.scheduler import TargetScheduler
+from nuclear.nuke.watch import TargetWatcher
 
 
 # Track executed targets to avoid running them multiple times
@@ -24,45 +33,157 @@ def depends(*target_names: str):
     return decorator
 
 
+@dataclass
+class RunOptions:
+    """Options of the nuke runner itself, as opposed to the config overrides"""
+    jobs: int = 1  # maximum number of targets running concurrently
+    force: bool = False  # run targets even if their outputs are up to date
+    trace: Optional[Path] = None  # file to export the timeline of the targets to, in Chrome trace event format
+    cache_dir: Optional[Path] = None  # directory of the artifact cache, caching is disabled if not set
+    cache_max_size: int = DEFAULT_CACHE_MAX_SIZE  # maximum size of the artifact cache in bytes
+    watch: bool = False  # run the targets again whenever their inputs change
+    profile: bool = False  # show a summary with timings of the targets
+
+
+RUN_OPTION_NAMES: frozenset[str] = frozenset(field.name for field in fields(RunOptions))
+
+
 def run():
     with error_handler():
         _run_with_args(sys.argv[1:])
 
 
-def _run_with_args(args: list[str]):
+def _run_with_args(args: list[str], target_names: Optional[list[str]] = None):
     _executed_targets.clear()
 
+    function_names: list[str] = target_names if target_names is not None else _list_target_names()
+    options, args = parse_run_options(args, _loaded_config_fields())
     if not args:
-        return _show_available_targets()
+        return _show_available_targets(function_names)
 
     positionals, _ = parse_cli_args(args)
     positionals = [arg.replace('-', '_') for arg in positionals]
 
-    function_names: list[str] = _list_target_names()
     for arg in positionals:
         assert arg in function_names, f'unknown target function: {arg}'
 
     main_module = sys.modules['__main__']
-    for arg in positionals:
-        _execute_target(main_module, arg)
+    state = None if options.force else BuildState()
+    cache = _create_target_cache(options, main_module)
+    if options.watch:
+        return TargetWatcher(main_module, positionals, jobs=options.jobs, state=state, cache=cache).run()
+
+    if not options.profile and options.trace is None:
+        TargetScheduler(main_module, jobs=options.jobs, executed=_executed_targets, state=state,
+                        cache=cache).run(positionals)
+        return
+
+    profiler = Profiler()
+    set_active_profiler(profiler)
+    try:
+        TargetScheduler(main_module, jobs=options.jobs, executed=_executed_targets, state=state,
+                        profiler=profiler, cache=cache).run(positionals)
+    finally:
+        set_active_profiler(None)
+        if options.profile and profiler.targets:
+            logger.info(f'Profile of the targets:\n{profiler.summary()}')
+        if options.trace is not None:
+            profiler.write_trace(options.trace)
 
 
 def _execute_target(main_module, target_name: str):
     """Execute a target and its dependencies, ensuring each runs only once."""
-    if target_name in _executed_targets:
-        return
+    TargetScheduler(main_module, executed=_executed_targets).run([target_name])
+
+
+def _loaded_config_fields() -> Collection[str]:
+    from nuclear.nuke.config import get_loaded_config, config_field_names  # config module depends on this one
+    config = get_loaded_config()
+    return config_field_names(type(config)) if config is not None else ()
+
 
-    function = getattr(main_module, target_name)
+def _create_target_cache(options: RunOptions, main_module) -> Optional[TargetCache]:
+    if options.cache_dir is None or options.force:
+        return None
+    from nuclear.nuke.config import get_loaded_config  # config module depends on this one
+    config = get_loaded_config()
+    if getattr(config, 'dry', False):
+        return None  # dry run doesn't produce outputs to be cached
+    nukefile = getattr(main_module, '__file__', None)
+    backend = LocalArtifactCache(options.cache_dir, options.cache_max_size)
+    return TargetCache(backend, Path(nukefile) if nukefile else None, config)
 
-    # Execute dependencies first
-    if hasattr(function, '__depends__'):
-        for dep in function.__depends__:
-            dep_normalized = dep.replace('-', '_')
-            _execute_target(main_module, dep_normalized)
 
-    logger.info(f'Calling function: {target_name}')
-    function()
-    _executed_targets.add(target_name)
+_RUN_OPTIONS_WITH_VALUES = {
+    '-j': 'jobs',
+    '--jobs': 'jobs',
+    '--trace': 'trace',
+    '--cache-dir': 'cache_dir',
+    '--cache-max-size': 'cache_max_size',
+}
+
+
+def parse_run_options(args: list[str], config_fields: Collection[str] = ()) -> tuple[RunOptions, list[str]]:
+    """
+    Extract options of the runner:
+        -j N, -jN, --jobs N, --jobs=N - maximum number of targets running concurrently
+        --force - run targets even if their outputs are up to date
+        --watch - run the targets again whenever their inputs change
+        --profile - show a summary with timings of the targets and the critical path
+        --trace PATH, --trace=PATH - export the timeline of the targets in Chrome trace event format
+        --cache-dir PATH, --cache-dir=PATH - restore the outputs of targets from the artifact cache in the directory
+            (NUKE_CACHE_DIR environment variable by default)
+        --cache-max-size SIZE, --cache-max-size=SIZE - maximum size of the artifact cache, e.g. 500M, 10G
+    Long options named the same as a config field are left as config overrides, e.g. --force=1.
+    :param args: command line arguments
+    :param config_fields: names of the config fields, which take precedence over the options of the runner
+    :return: the options and the rest of the arguments
+    """
+    options = RunOptions()
+    if os.environ.get('NUKE_CACHE_DIR'):
+        options.cache_dir = Path(os.environ['NUKE_CACHE_DIR'])
+    remaining_args: list[str] = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        name, _, value = arg.partition('=')
+        jobs_match = re.fullmatch(r'-j(\d+)', arg)
+        if name.startswith('--') and name[2:].replace('-', '_') in config_fields:
+            remaining_args.append(arg)
+        elif arg in _RUN_OPTIONS_WITH_VALUES:
+            assert i + 1 < len(args), f'missing value for {arg} option'
+            _set_run_option(options, arg, args[i + 1])
+            i += 2
+            continue
+        elif arg == '--force':
+            options.force = True
+        elif arg == '--watch':
+            options.watch = True
+        elif arg == '--profile':
+            options.profile = True
+        elif name.startswith('--') and name in _RUN_OPTIONS_WITH_VALUES and value:
+            _set_run_option(options, name, value)
+        elif jobs_match:
+            options.jobs = _parse_jobs(jobs_match.group(1))
+        else:
+            remaining_args.append(arg)
+        i += 1
+    return options, remaining_args
+
+
+def _set_run_option(options: RunOptions, name: str, value: str):
+    field = _RUN_OPTIONS_WITH_VALUES[name]
+    if field == 'jobs':
+        options.jobs = _parse_jobs(value)
+    elif field == 'cache_max_size':
+        options.cache_max_size = parse_size(value)
+    else:
+        setattr(options, field, Path(value))
+
+
+def _parse_jobs(value: str) -> int:
+    assert value.isdigit() and int(value) >= 1, f'number of jobs should be a positive integer, got: {value}'
+    return int(value)
 
 
 def parse_cli_args(args: list[str]) -> tuple[list[str], dict[str, str]]:
@@ -98,8 +219,7 @@ def parse_cli_args(args: list[str]) -> tuple[list[str], dict[str, str]]:
     return positional_args, overrides
 
 
-def _show_available_targets():
-    function_names: list[str] = _list_target_names()
+def _show_available_targets(function_names: list[str]):
     if not function_names:
         logger.warn('No available target functions - add public function in the main module')
         return
@@ -110,17 +230,4 @@ def _show_available_targets():
 
 
 def _list_target_names() -> list[str]:
-    main_module = sys.modules['__main__']
-    attrs: list[str] = dir(main_module)
-    public_attrs = [a for a in attrs if not a.startswith('_')]
-
-    # Filter to include only functions defined in this module, not imported ones
-    target_functions = []
-    for attr_name in public_attrs:
-        attr = getattr(main_module, attr_name)
-        if inspect.isfunction(attr):
-            # Check if the function is defined in the main module, not imported
-            if attr.__module__ == main_module.__name__:
-                target_functions.append(attr_name)
-
-    return target_functions
+    return list_target_names(sys.modules['__main__'])
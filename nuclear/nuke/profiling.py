@@ -0,0 +1,181 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+from nuclear.sublog import logger
+
+
+@dataclass
+class CommandTiming:
+    cmd: str
+    start: float  # seconds since the start of the run
+    end: float
+    thread: int
+
+
+@dataclass
+class TargetTiming:
+    name: str
+    start: float  # seconds since the start of the run
+    end: float = 0
+    cpu_time: float = 0  # CPU time of the target's own Python code, excluding subprocesses
+    thread: int = 0
+    status: str = 'running'  # running, done, skipped, cached, failed
+    commands: list[CommandTiming] = field(default_factory=list)
+
+    @property
+    def wall_time(self) -> float:
+        return self.end - self.start
+
+    @property
+    def shell_time(self) -> float:
+        return sum(command.end - command.start for command in self.commands)
+
+
+class Profiler:
+    def __init__(self):
+        """
+        Collects timings of the targets and the shell commands they run.
+        Commands run by ShellRunner are attributed to the target running in the same thread.
+        """
+        self.targets: dict[str, TargetTiming] = {}
+        self.graph: dict[str, list[str]] = {}
+        self._start: float = time.monotonic()
+        self._threads: dict[int, int] = {}
+        self._current = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def target(self, name: str) -> Iterator[TargetTiming]:
+        timing = TargetTiming(name=name, start=self._now(), thread=self._thread_index())
+        with self._lock:
+            self.targets[name] = timing
+        self._current.target = timing
+        cpu_start = time.thread_time()
+        try:
+            yield timing
+            if timing.status == 'running':
+                timing.status = 'done'
+        except BaseException:
+            timing.status = 'failed'
+            raise
+        finally:
+            timing.cpu_time = time.thread_time() - cpu_start
+            timing.end = self._now()
+            self._current.target = None
+
+    @contextmanager
+    def command(self, cmd: str) -> Iterator[None]:
+        timing = CommandTiming(cmd=cmd, start=self._now(), end=0, thread=self._thread_index())
+        try:
+            yield
+        finally:
+            timing.end = self._now()
+            target: Optional[TargetTiming] = getattr(self._current, 'target', None)
+            if target is not None:
+                target.commands.append(timing)
+
+    def critical_path(self) -> list[str]:
+        """
+        Find the chain of dependent targets with the longest total wall time.
+        It's the lower bound of the run duration, regardless of the number of jobs.
+        """
+        longest: dict[str, tuple[float, list[str]]] = {}
+        for name, dependencies in self.graph.items():  # dependencies come first
+            timing = self.targets.get(name)
+            duration = timing.wall_time if timing is not None else 0
+            best_time, best_path = max((longest[dep] for dep in dependencies if dep in longest),
+                                       key=lambda item: item[0], default=(0, []))
+            longest[name] = (best_time + duration, best_path + [name])
+        if not longest:
+            return []
+        return max(longest.values(), key=lambda item: item[0])[1]
+
+    def summary(self) -> str:
+        """Format a table with timings of the targets"""
+        header = ('target', 'status', 'wall', 'cpu', 'shell', 'commands')
+        rows = [header] + [(
+            timing.name,
+            timing.status,
+            f'{timing.wall_time:.3f}s',
+            f'{timing.cpu_time:.3f}s',
+            f'{timing.shell_time:.3f}s',
+            str(len(timing.commands)),
+        ) for timing in sorted(self.targets.values(), key=lambda t: t.start)]
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+        lines = ['  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows]
+
+        total = self._now()
+        lines.append(f'total: {total:.3f}s')
+        critical_path = self.critical_path()
+        if len(critical_path) > 1:
+            critical_time = sum(self.targets[name].wall_time for name in critical_path if name in self.targets)
+            lines.append(f'critical path: {" -> ".join(critical_path)} ({critical_time:.3f}s)')
+        return '\n'.join(lines)
+
+    def trace_events(self) -> dict:
+        """Build timeline of the targets and commands in Chrome trace event format (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        events: list[dict] = []
+        for timing in self.targets.values():
+            events.append({
+                'name': timing.name,
+                'cat': 'target',
+                'ph': 'X',
+                'ts': _micros(timing.start),
+                'dur': _micros(timing.wall_time),
+                'pid': pid,
+                'tid': timing.thread,
+                'args': {'status': timing.status, 'cpu_time': timing.cpu_time},
+            })
+            for command in timing.commands:
+                events.append({
+                    'name': command.cmd,
+                    'cat': 'shell',
+                    'ph': 'X',
+                    'ts': _micros(command.start),
+                    'dur': _micros(command.end - command.start),
+                    'pid': pid,
+                    'tid': command.thread,
+                })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_trace(self, path: Path):
+        path.write_text(json.dumps(self.trace_events()))
+        logger.info('trace saved', path=path)
+
+    def _now(self) -> float:
+        return time.monotonic() - self._start
+
+    def _thread_index(self) -> int:
+        ident = threading.get_ident()
+        with self._lock:
+            return self._threads.setdefault(ident, len(self._threads))
+
+
+def _micros(seconds: float) -> int:
+    return int(seconds * 1_000_000)
+
+
+_active_profiler: Optional[Profiler] = None
+
+
+def set_active_profiler(profiler: Optional[Profiler]):
+    global _active_profiler
+    _active_profiler = profiler
+
+
+@contextmanager
+def profile_command(cmd: str) -> Iterator[None]:
+    """Measure a shell command run by a target, if the profiling is active"""
+    profiler = _active_profiler
+    if profiler is None:
+        yield
+        return
+    with profiler.command(cmd):
+        yield
@@ -0,0 +1,57 @@
+import inspect
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+NUKEFILE_NAME = 'nukefile.py'
+
+
+def find_nukefile(start: Path) -> Optional[Path]:
+    """Find nukefile.py in the directory or the closest of its parents"""
+    for directory in [start] + list(start.parents):
+        path = directory / NUKEFILE_NAME
+        if path.is_file():
+            return path
+    return None
+
+
+def list_target_names(module: Any) -> list[str]:
+    """List public functions defined in the module (not imported ones)"""
+    target_functions = []
+    for attr_name in dir(module):
+        if attr_name.startswith('_'):
+            continue
+        attr = getattr(module, attr_name)
+        if inspect.isfunction(attr) and attr.__module__ == module.__name__:
+            target_functions.append(attr_name)
+    return target_functions
+
+
+def load_cached_target_names(nukefile: Path) -> Optional[list[str]]:
+    """Return target names saved for the current version of the nukefile, without executing it"""
+    cache_path = _cache_path(nukefile)
+    try:
+        cache = json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        return None
+    if cache.get('key') != _cache_key(nukefile):
+        return None
+    return cache.get('targets')
+
+
+def save_target_names(nukefile: Path, target_names: list[str]):
+    cache_path = _cache_path(nukefile)
+    try:
+        cache_path.parent.mkdir(exist_ok=True)
+        cache_path.write_text(json.dumps({'key': _cache_key(nukefile), 'targets': target_names}))
+    except OSError:
+        pass  # read-only location, cache is optional
+
+
+def _cache_path(nukefile: Path) -> Path:
+    return nukefile.parent / '__pycache__' / f'{nukefile.stem}.targets.json'
+
+
+def _cache_key(nukefile: Path) -> list[int]:
+    stat = nukefile.stat()
+    return [stat.st_mtime_ns, stat.st_size]
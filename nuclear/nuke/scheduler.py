@@ -0,0 +1,143 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Optional
+
+from nuclear.nuke.artifacts import TargetCache
+from nuclear.nuke.incremental import BuildState
+from nuclear.nuke.profiling import Profiler
+from nuclear.sublog import logger
+
+
+def normalize_target_name(name: str) -> str:
+    return name.replace('-', '_')
+
+
+def build_target_graph(main_module: Any, target_names: list[str]) -> dict[str, list[str]]:
+    """
+    Collect requested targets with all their dependencies declared by @depends.
+    Return targets mapped to their direct dependencies, in the order of a depth-first traversal,
+    so every target comes after its dependencies.
+    :raises ValueError: when dependencies form a cycle or refer to a missing target
+    """
+    graph: dict[str, list[str]] = {}
+    visiting: list[str] = []
+
+    def visit(name: str):
+        if name in graph:
+            return
+        if name in visiting:
+            cycle = visiting[visiting.index(name):] + [name]
+            raise ValueError(f'dependency cycle detected: {" -> ".join(cycle)}')
+        function = getattr(main_module, name, None)
+        if function is None:
+            raise ValueError(f'unknown dependency target: {name}')
+
+        visiting.append(name)
+        dependencies = [normalize_target_name(dep) for dep in getattr(function, '__depends__', ())]
+        for dependency in dependencies:
+            visit(dependency)
+        visiting.pop()
+        graph[name] = dependencies
+
+    for target_name in target_names:
+        visit(normalize_target_name(target_name))
+    return graph
+
+
+class TargetScheduler:
+    def __init__(self,
+                 main_module: Any,
+                 jobs: int = 1,
+                 executed: Optional[set[str]] = None,
+                 state: Optional[BuildState] = None,
+                 profiler: Optional[Profiler] = None,
+                 cache: Optional[TargetCache] = None,
+                 ):
+        """
+        Runs targets with their dependencies, each target exactly once.
+        Independent targets are run concurrently on a thread pool.
+        Once a target fails, no more targets are started, the running ones are awaited and the error is raised.
+        :param main_module: module containing the target functions
+        :param jobs: maximum number of targets running at the same time
+        :param executed: names of the targets that have been executed already, updated with the completed ones
+        :param state: build state to skip the targets with up-to-date outputs, all targets are run if not given
+        :param profiler: profiler measuring the execution of targets
+        :param cache: cache of the target outputs to restore them instead of running the targets
+        """
+        assert jobs >= 1, 'number of jobs should be positive'
+        self._main_module: Any = main_module
+        self._jobs: int = jobs
+        self._executed: set[str] = executed if executed is not None else set()
+        self._state: Optional[BuildState] = state
+        self._profiler: Optional[Profiler] = profiler
+        self._cache: Optional[TargetCache] = cache
+        self._lock = threading.Lock()
+
+    def run(self, target_names: list[str]):
+        graph = build_target_graph(self._main_module, target_names)
+        if self._profiler is not None:
+            self._profiler.graph.update(graph)
+        pending = [name for name in graph if name not in self._executed]
+        if self._jobs == 1:
+            for name in pending:
+                self._execute(name)
+        else:
+            self._run_concurrently(graph, pending)
+
+    def _run_concurrently(self, graph: dict[str, list[str]], pending: list[str]):
+        running: dict[Future, str] = {}
+        failure: Optional[BaseException] = None
+        with ThreadPoolExecutor(max_workers=self._jobs, thread_name_prefix='nuke-target') as pool:
+            while pending or running:
+                if failure is None:
+                    for name in self._ready_targets(graph, pending, self._jobs - len(running)):
+                        pending.remove(name)
+                        running[pool.submit(self._execute, name)] = name
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None and failure is None:
+                        failure = error
+                        if pending or running:
+                            logger.error(f'Target {name} failed, cancelling the remaining targets',
+                                         cancelled=len(pending), running=len(running))
+
+        if failure is not None:
+            raise failure
+
+    def _ready_targets(self, graph: dict[str, list[str]], pending: list[str], limit: int) -> list[str]:
+        with self._lock:
+            ready = [name for name in pending if all(dep in self._executed for dep in graph[name])]
+        return ready[:max(limit, 0)]
+
+    def _execute(self, target_name: str):
+        if self._profiler is None:
+            self._execute_function(target_name)
+        else:
+            with self._profiler.target(target_name) as timing:
+                timing.status = self._execute_function(target_name)
+        with self._lock:
+            self._executed.add(target_name)
+
+    def _execute_function(self, target_name: str) -> str:
+        """Run the target function unless it's up to date or its outputs are cached, return the status"""
+        function = getattr(self._main_module, target_name)
+        if self._state is not None and self._state.is_up_to_date(target_name, function):
+            logger.info(f'Target is up to date: {target_name}')
+            return 'skipped'
+
+        if self._cache is not None and self._cache.restore(target_name, function):
+            status = 'cached'
+        else:
+            logger.info(f'Calling function: {target_name}')
+            function()
+            if self._cache is not None:
+                self._cache.store(target_name, function)
+            status = 'done'
+        if self._state is not None:
+            self._state.record(target_name, function)
+        return status
@@ -1,9 +1,14 @@
-from typing import Any
+from typing import Any, Iterable, Optional
 from pathlib import Path
 
+from nuclear.nuke.profiling import profile_command
+from nuclear.shell.parallel import CommandResult, shell_many
 from nuclear.shell.shell_utils import shell
 from nuclear.sublog.logging import logger
 
+# parallel commands always capture their output and run in their own process groups
+_UNSUPPORTED_MAP_OPTIONS = ('raw_output', 'independent', 'output_file')
+
 
 class ShellRunner:
     def __init__(self, **shell_kwargs):
@@ -21,8 +26,37 @@ class ShellRunner:
                 logger.info(f'Dry command: {cmd}')
                 return ''
 
-        return shell(cmd, **shell_kwargs)
+        with profile_command(cmd):
+            return shell(cmd, **shell_kwargs)
     
+    def map(self, cmds: Iterable[str], max_workers: Optional[int] = None, fail_fast: bool = False,
+            ) -> list[CommandResult]:
+        """
+        Run many commands concurrently with the options of this runner, see shell_many
+        :raises ValueError: if the runner has options not supported for parallel commands
+        """
+        cmds = list(cmds)
+        shell_kwargs = self._shell_kwargs.copy()
+        unsupported = sorted(name for name in _UNSUPPORTED_MAP_OPTIONS if shell_kwargs.get(name))
+        if unsupported:
+            raise ValueError(f'options not supported for parallel commands: {", ".join(unsupported)}')
+        if shell_kwargs.pop('dry', False):
+            for cmd in cmds:
+                logger.info(f'Dry command: {cmd}')
+            return [CommandResult(cmd, '', 0, 0) for cmd in cmds]
+
+        with profile_command(f'{len(cmds)} parallel commands'):
+            return shell_many(
+                cmds,
+                max_workers=max_workers,
+                workdir=shell_kwargs.get('workdir'),
+                print_stdout=shell_kwargs.get('print_stdout', False),
+                print_log=shell_kwargs.get('print_log', False),
+                fail_fast=fail_fast,
+                timeout=shell_kwargs.get('timeout'),
+                timeout_grace=shell_kwargs.get('timeout_grace', 5),
+            )
+
     def copy(self, **shell_kwargs) -> 'ShellRunner':
         new_shell_kwargs = self._shell_kwargs.copy()
         new_shell_kwargs.update(shell_kwargs)
@@ -44,6 +78,7 @@ def sh(
     raw_output: bool = False,
     independent: bool = False,
     dry: bool = False,
+    timeout: float | None = None,
 ) -> ShellRunner:
     return ShellRunner(
         workdir=workdir,
@@ -52,4 +87,5 @@ def sh(
         raw_output=raw_output,
         independent=independent,
         dry=dry,
+        timeout=timeout,
     )
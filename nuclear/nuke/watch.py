@@ -0,0 +1,329 @@
+import ctypes
+import ctypes.util
+import functools
+import os
+import re
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+from nuclear.nuke.artifacts import TargetCache
+from nuclear.nuke.incremental import BuildState
+from nuclear.nuke.scheduler import TargetScheduler, build_target_graph
+from nuclear.shell.background_cmd import BackgroundCommand, collect_background_commands
+from nuclear.sublog import logger
+
+IGNORED_DIRS = {'.git', '.nuke', '__pycache__', '.venv', 'node_modules'}
+
+_IN_MODIFY = 0x2
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_IN_ISDIR = 0x40000000
+_IN_EVENTS = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class PollingWatcher:
+    def __init__(self, roots: list[Path], interval: float = 0.5):
+        """
+        Detect file changes by comparing modification times of all files in the directories periodically
+        :param roots: directories to watch recursively
+        :param interval: maximum number of seconds between the scans
+        """
+        self._roots: list[Path] = roots
+        self._interval: float = interval
+        self._snapshot: dict[Path, tuple[int, int]] = self._scan()
+
+    def poll(self, timeout: float) -> set[Path]:
+        """Wait up to timeout seconds and return the files changed since the last call"""
+        time.sleep(min(timeout, self._interval))
+        snapshot = self._scan()
+        changed = {path for path in snapshot.keys() | self._snapshot.keys()
+                   if snapshot.get(path) != self._snapshot.get(path)}
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        snapshot: dict[Path, tuple[int, int]] = {}
+        for root in self._roots:
+            for directory, dirnames, filenames in os.walk(root):
+                dirnames[:] = [name for name in dirnames if name not in IGNORED_DIRS]
+                for filename in filenames:
+                    path = Path(directory) / filename
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+
+class InotifyWatcher:
+    def __init__(self, roots: list[Path]):
+        """
+        Detect file changes with Linux inotify, without scanning the directories
+        :param roots: directories to watch recursively
+        :raises OSError: if inotify is not available
+        """
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd: int = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify is not available')
+        self._directories: dict[int, Path] = {}
+        for root in roots:
+            self._watch_tree(root)
+
+    def poll(self, timeout: float) -> set[Path]:
+        """Wait up to timeout seconds and return the files changed in the meantime"""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed: set[Path] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            changed.update(self._parse_events(data))
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+    def _parse_events(self, data: bytes) -> set[Path]:
+        changed: set[Path] = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b'\0').decode(errors='replace')
+            offset += name_length
+            if mask & _IN_Q_OVERFLOW:
+                logger.warn('inotify event queue overflowed, some changes may be missed')
+                continue
+            directory = self._directories.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / name
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO) and name not in IGNORED_DIRS:
+                    self._watch_tree(path)
+                    changed.update(p for p in path.rglob('*') if p.is_file())
+            else:
+                changed.add(path)
+        return changed
+
+    def _watch_tree(self, root: Path):
+        for directory, dirnames, _ in os.walk(root):
+            dirnames[:] = [name for name in dirnames if name not in IGNORED_DIRS]
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _IN_EVENTS)
+            if wd >= 0:
+                self._directories[wd] = Path(directory)
+
+
+def create_watcher(roots: list[Path]) -> Any:
+    """Create inotify watcher if it's supported by the system, otherwise fall back to polling"""
+    try:
+        return InotifyWatcher(roots)
+    except (OSError, AttributeError) as e:
+        logger.debug('inotify is not available, polling for file changes', error=str(e))
+        return PollingWatcher(roots)
+
+
+class TargetWatcher:
+    def __init__(self,
+                 main_module: Any,
+                 target_names: list[str],
+                 jobs: int = 1,
+                 state: Optional[BuildState] = None,
+                 cache: Optional[TargetCache] = None,
+                 debounce: float = 0.3,
+                 watcher_factory: Callable[[list[Path]], Any] = create_watcher,
+                 ):
+        """
+        Run targets and run them again whenever their inputs change.
+        Only the targets with changed inputs (declared by @inputs) and the targets depending on them are run again.
+        Targets not declaring their inputs depend on any file in the current directory.
+        Background commands started by a target are terminated before the target is run again.
+        :param main_module: module containing the target functions
+        :param target_names: targets requested to run
+        :param jobs: maximum number of targets running at the same time
+        :param state: build state to skip the targets with up-to-date outputs
+        :param cache: cache of the target outputs
+        :param debounce: number of seconds without changes to wait for, before running the targets,
+        so bursts of changes (e.g. saving many files, checkout) trigger a single run
+        :param watcher_factory: function creating a watcher of the directories
+        """
+        self._main_module: Any = main_module
+        self._target_names: list[str] = target_names
+        self._jobs: int = jobs
+        self._state: Optional[BuildState] = state
+        self._cache: Optional[TargetCache] = cache
+        self._debounce: float = debounce
+        self._watcher_factory = watcher_factory
+        self._graph: dict[str, list[str]] = build_target_graph(main_module, target_names)
+        self._background_commands: dict[str, list[BackgroundCommand]] = {}
+        self._stopped = threading.Event()
+        self.runs: int = 0
+
+    def run(self):
+        """Run the targets and watch for changes until stopped or interrupted"""
+        watcher = self._watcher_factory(self._watched_roots())
+        try:
+            self._run_targets(set(self._graph))
+            logger.info('Watching for changes', targets=len(self._graph))
+            while not self._stopped.is_set():
+                changes = self._wait_for_changes(watcher)
+                affected = self.affected_targets(changes)
+                if affected:
+                    logger.info('Files changed', files=len(changes), targets=' '.join(sorted(affected)))
+                    self._run_targets(affected)
+        finally:
+            watcher.close()
+            for name in list(self._background_commands):
+                self._terminate_background_commands(name)
+
+    def stop(self):
+        self._stopped.set()
+
+    def affected_targets(self, changes: set[Path]) -> set[str]:
+        """Find targets depending on the changed files, directly or through their dependencies"""
+        changes = {path for path in changes if not _is_ignored(path)}
+        outputs = [pattern for name in self._graph for pattern in _patterns(self._function(name), '__outputs__')]
+        changes = {path for path in changes if not any(pattern_matches(pattern, path) for pattern in outputs)}
+        if not changes:
+            return set()
+
+        affected: set[str] = set()
+        for name in self._graph:
+            input_patterns = _patterns(self._function(name), '__inputs__')
+            if not input_patterns or any(pattern_matches(pattern, path)
+                                         for pattern in input_patterns for path in changes):
+                affected.add(name)
+
+        for name, dependencies in self._graph.items():  # dependencies come first
+            if any(dependency in affected for dependency in dependencies):
+                affected.add(name)
+        return affected
+
+    def _run_targets(self, affected: set[str]):
+        self.runs += 1
+        for name in reversed(list(self._graph)):  # dependents first
+            if name in affected:
+                self._terminate_background_commands(name)
+        executed = set(self._graph) - affected
+        scheduler = TargetScheduler(self._tracking_module(), jobs=self._jobs, executed=executed,
+                                    state=self._state, cache=self._cache)
+        try:
+            scheduler.run(self._target_names)
+        except Exception as e:
+            logger.error('Target failed, waiting for changes', error=str(e))
+
+    def _tracking_module(self) -> SimpleNamespace:
+        """Wrap target functions to keep track of the background commands they start"""
+        functions: dict[str, Callable] = {}
+        for name in self._graph:
+            function = self._function(name)
+
+            @functools.wraps(function)
+            def tracked(name=name, function=function):
+                with collect_background_commands() as started:
+                    try:
+                        function()
+                    finally:
+                        self._background_commands[name] = started
+            functions[name] = tracked
+        return SimpleNamespace(**functions)
+
+    def _terminate_background_commands(self, target_name: str):
+        for command in self._background_commands.pop(target_name, []):
+            if command.is_running:
+                logger.info('Stopping background command', target=target_name, cmd=command.cmd)
+                command.terminate()
+
+    def _wait_for_changes(self, watcher: Any) -> set[Path]:
+        changes: set[Path] = set()
+        while not self._stopped.is_set():
+            batch = {path for path in watcher.poll(self._debounce if changes else 0.5) if not _is_ignored(path)}
+            if batch:
+                changes |= batch
+            elif changes:
+                return changes  # no more changes within the debounce period
+        return changes
+
+    def _watched_roots(self) -> list[Path]:
+        roots: set[Path] = set()
+        for name in self._graph:
+            input_patterns = _patterns(self._function(name), '__inputs__')
+            if not input_patterns:
+                return [Path('.')]
+            for pattern in input_patterns:
+                roots.add(_static_prefix(pattern))
+        existing = sorted(root for root in roots if root.is_dir())
+        # skip directories nested in the other ones
+        return [root for root in existing if not any(other != root and other in root.parents for other in existing)]
+
+    def _function(self, name: str) -> Callable:
+        return getattr(self._main_module, name)
+
+
+def pattern_matches(pattern: str, path: Path) -> bool:
+    """Check if the path matches glob pattern (with "**" matching any number of directories) or is inside it"""
+    normalized = os.path.normpath(str(path))
+    pattern = os.path.normpath(pattern)
+    if normalized == pattern or normalized.startswith(pattern + os.sep):
+        return True
+    return _glob_regex(pattern).fullmatch(normalized) is not None
+
+
+@functools.lru_cache(maxsize=1024)
+def _glob_regex(pattern: str) -> re.Pattern:
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+        elif pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+        elif pattern[i] == '*':
+            regex += '[^/]*'
+            i += 1
+        elif pattern[i] == '?':
+            regex += '[^/]'
+            i += 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(regex + '(?:/.*)?')
+
+
+def _static_prefix(pattern: str) -> Path:
+    """Return the directory part of a glob pattern without wildcards"""
+    parts = []
+    for part in Path(pattern).parts:
+        if any(char in part for char in '*?['):
+            break
+        parts.append(part)
+    prefix = Path(*parts) if parts else Path('.')
+    return prefix if prefix.is_dir() or not parts else prefix.parent
+
+
+def _patterns(function: Callable, attribute: str) -> tuple[str, ...]:
+    return getattr(function, attribute, ())
+
+
+def _is_ignored(path: Path) -> bool:
+    return any(part in IGNORED_DIRS for part in path.parts)
@@ -1,2 +1,5 @@
-from .shell_utils import shell, shell_output, sh, CommandError
+from .shell_utils import shell, shell_output, shell_stream, sh, CommandError
 from .background_cmd import BackgroundCommand
+from .parallel import shell_many, CommandResult, ParallelCommandError
+from .async_shell import ashell, AsyncBackgroundCommand
+from .retention import OutputRetention, KeepAll, KeepNothing, KeepLastLines, KeepLastBytes, SpillToFile
@@ -0,0 +1,259 @@
+import asyncio
+import io
+import os
+import shlex
+import signal
+import sys
+import time
+from pathlib import Path
+from typing import AsyncIterator, Callable, List, Optional
+
+from nuclear.shell.output_reader import DEFAULT_CHUNK_SIZE, LineDecoder, split_lines
+from nuclear.shell.retention import OutputRetention, default_retention
+from nuclear.shell.shell_utils import CommandError, CommandTimeout
+from nuclear.sublog.logging import logger
+
+
+async def ashell(
+    cmd: str,
+    workdir: Optional[Path] = None,
+    print_stdout: bool = False,
+    print_log: bool = False,
+    independent: bool = False,
+    output_file: Optional[Path] = None,
+    timeout: Optional[float] = None,
+) -> str:
+    """
+    Run system shell command asynchronously and return its output.
+    Command is started in its own process group, which is killed when the task is cancelled or timed out
+    (unless it's independent).
+    :param cmd: shell command to run
+    :param workdir: working directory for the command
+    :param print_stdout: whether to print live stdout in real time (line by line) from a subprocess
+    :param print_log: whether to print a log message about running the command
+    :param independent: whether to start an independent process that can outlive the caller process
+    :param output_file: optional file to write the output in real time
+    :param timeout: maximum number of seconds to wait for the command to finish
+    :return: stdout of the command combined with stderr
+    :raises:
+        CommandError: in case of non-zero command exit code
+        CommandTimeout: in case the command hasn't finished within the timeout
+    """
+    process = await asyncio.create_subprocess_shell(
+        cmd,
+        cwd=workdir,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        start_new_session=True,
+    )
+    if print_log:
+        if independent:
+            logger.debug('Starting process', cmd=cmd, pid=process.pid)
+        else:
+            logger.debug(f'Command: {cmd}')
+
+    captured_stream = io.StringIO()
+
+    async def capture_output():
+        output_file_writer = open(output_file, 'a') if output_file else None
+        try:
+            async for block in _read_blocks(process.stdout):
+                if print_stdout:
+                    sys.stdout.write(block)
+                    sys.stdout.flush()
+                if output_file_writer is not None:
+                    output_file_writer.write(block)
+                captured_stream.write(block)
+            await process.wait()
+        finally:
+            if output_file_writer is not None:
+                output_file_writer.close()
+
+    start_time = time.monotonic()
+    try:
+        await asyncio.wait_for(capture_output(), timeout)
+    except asyncio.TimeoutError:
+        _kill_group(process)
+        await process.wait()
+        raise CommandTimeout(cmd, captured_stream.getvalue(), process.returncode, timeout,
+                             time.monotonic() - start_time)
+    except BaseException:  # cancelled or interrupted
+        if not independent and process.returncode is None:
+            logger.warning('killing subprocess', pid=process.pid)
+            _kill_group(process)
+        raise
+
+    if process.returncode != 0:
+        raise CommandError(cmd, captured_stream.getvalue(), process.returncode, time.monotonic() - start_time)
+    return captured_stream.getvalue()
+
+
+class AsyncBackgroundCommand:
+    def __init__(self,
+        cmd: str,
+        workdir: Optional[Path] = None,
+        on_next_line: Callable[[str], None] = None,
+        on_error: Callable[[CommandError], None] = None,
+        print_stdout: bool = False,
+        print_stderr: bool = True,
+        shell: bool = True,
+        debug: bool = False,
+        retention: Optional[OutputRetention] = None,
+    ):
+        """
+        Asynchronous counterpart of BackgroundCommand, supervised by the running event loop.
+        It has to be started with "await cmd.start()" or used as "async with" context manager.
+        :param cmd: shell command to run
+        :param workdir: working directory for the command
+        :param on_next_line: callback to call on each line of stdout
+        :param on_error: callback to call on command error
+        :param print_stdout: whether to propagate subprocess' stdout to system stdout
+        :param print_stderr: whether to capture stderr from a subprocess
+        :param shell: whether to run the command with a shell parent process, ie. bash -c "cmd"
+        :param debug: whether to print debug logs about running commands
+        :param retention: policy of keeping the captured output, whole output is kept in memory by default
+        """
+        self.cmd: str = cmd
+        self._workdir: Optional[Path] = workdir
+        self._on_next_line: Optional[Callable[[str], None]] = on_next_line
+        self._on_error: Optional[Callable[[CommandError], None]] = on_error
+        self._print_stdout: bool = print_stdout
+        self._print_stderr: bool = print_stderr
+        self._shell: bool = shell
+        self._debug: bool = debug
+        self._stop: bool = False
+        self._retention: OutputRetention = default_retention(retention)
+        self._subscribers: List[asyncio.Queue] = []
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> 'AsyncBackgroundCommand':
+        if self._debug:
+            logger.debug(f'Command: {self.cmd}')
+        stderr = asyncio.subprocess.STDOUT if self._print_stderr else asyncio.subprocess.DEVNULL
+        if self._shell:
+            self._process = await asyncio.create_subprocess_shell(
+                self.cmd, cwd=self._workdir, stdout=asyncio.subprocess.PIPE, stderr=stderr, start_new_session=True,
+            )
+        else:
+            self._process = await asyncio.create_subprocess_exec(
+                *shlex.split(self.cmd), cwd=self._workdir, stdout=asyncio.subprocess.PIPE, stderr=stderr,
+                start_new_session=True,
+            )
+        self._monitor_task = asyncio.ensure_future(self._monitor_output())
+        return self
+
+    async def terminate(self, timeout: float = 5):
+        """
+        Send TERMINATE signal to the process group and wait until it's finished.
+        Kill it if it's still running after the timeout.
+        """
+        self._stop = True
+        if not self.is_running:
+            return
+        _signal_group(self._process, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(asyncio.shield(self._monitor_task), timeout)
+        except asyncio.TimeoutError:
+            if self._debug:
+                logger.debug('killing process group after timeout', pid=self._process.pid)
+            _kill_group(self._process)
+            await self._monitor_task
+        if self._debug:
+            logger.debug(f'subprocess terminated', pid=self._process.pid)
+
+    async def wait(self):
+        """Wait until the process is finished"""
+        if self._monitor_task is not None:
+            await asyncio.shield(self._monitor_task)
+
+    async def lines(self) -> AsyncIterator[str]:
+        """Iterate over the lines of stdout, coming from now on, until the process is finished"""
+        if not self.is_running:
+            return
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        try:
+            while True:
+                line = await queue.get()
+                if line is None:
+                    break
+                yield line
+        finally:
+            self._subscribers.remove(queue)
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self.lines()
+
+    async def __aenter__(self) -> 'AsyncBackgroundCommand':
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.terminate()
+
+    @property
+    def stdout(self) -> str:
+        """Return captured stdout, limited to the window kept by the retention policy"""
+        return self._retention.getvalue()
+
+    @property
+    def is_running(self) -> bool:
+        """Return True if the process is running"""
+        return self._monitor_task is not None and not self._monitor_task.done()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process is not None else None
+
+    async def _monitor_output(self):
+        try:
+            async for block in _read_blocks(self._process.stdout):
+                if self._print_stdout:
+                    sys.stdout.write(block)
+                    sys.stdout.flush()
+                self._retention.write(block)
+                if self._on_next_line is not None or self._subscribers:
+                    for line in split_lines(block):
+                        if self._on_next_line is not None:
+                            self._on_next_line(line)
+                        for queue in self._subscribers:
+                            queue.put_nowait(line)
+
+            await self._process.wait()
+            if self._process.returncode != 0 and self._on_error is not None and not self._stop:
+                self._on_error(CommandError(self.cmd, self.stdout, self._process.returncode))
+            if self._debug:
+                logger.debug(f'Command finished: {self.cmd}')
+        except asyncio.CancelledError:
+            _kill_group(self._process)
+            raise
+        finally:
+            self._retention.close()
+            for queue in self._subscribers:
+                queue.put_nowait(None)
+
+
+async def _read_blocks(stream: asyncio.StreamReader) -> AsyncIterator[str]:
+    """Yield blocks of complete lines as they arrive"""
+    decoder = LineDecoder()
+    while True:
+        chunk = await stream.read(DEFAULT_CHUNK_SIZE)
+        if not chunk:
+            break
+        block = decoder.decode(chunk)
+        if block:
+            yield block
+    last = decoder.finish()
+    if last:
+        yield last
+
+
+def _kill_group(process: asyncio.subprocess.Process):
+    _signal_group(process, signal.SIGKILL)
+
+
+def _signal_group(process: asyncio.subprocess.Process, sig: int):
+    try:
+        os.killpg(process.pid, sig)
+    except ProcessLookupError:
+        pass
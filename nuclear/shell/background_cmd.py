@@ -1,17 +1,20 @@
-from genericpath import isdir
-import io
-import os
 import shlex
 import subprocess
 import sys
 import threading
-import signal
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Callable, List, Optional
+from typing import Callable, Iterator, List, Optional
 
+from nuclear.shell.output_reader import split_lines
+from nuclear.shell.process_tree import terminate_process_tree
+from nuclear.shell.retention import OutputRetention, default_retention
 from nuclear.shell.shell_utils import CommandError
+from nuclear.shell.supervisor import get_supervisor, is_worker_thread
 from nuclear.sublog.logging import logger
 
+_collectors = threading.local()
+
 
 class BackgroundCommand:
     def __init__(self,
@@ -23,6 +26,9 @@ class BackgroundCommand:
         print_stderr: bool = True,
         shell: bool = True,
         debug: bool = False,
+        retention: Optional[OutputRetention] = None,
+        on_next_stderr_line: Callable[[str], None] = None,
+        stderr_retention: Optional[OutputRetention] = None,
     ):
         """
         Run system shell command in background. Stream live stdout in real time.
@@ -31,47 +37,48 @@ class BackgroundCommand:
         :param on_next_line: callback to call on each line of stdout
         :param on_error: callback to call on command error
         :param print_stdout: whether to propagate subprocess' stdout to system stdout
-        :param print_stderr: whether to capture stderr from a subprocess
+        :param print_stderr: whether to capture stderr from a subprocess combined with stdout.
+        Otherwise, stderr is streamed separately and available as "stderr" property.
         :param shell: whether to run the command with a shell parent process, ie. bash -c "cmd"
         :param debug: whether to print debug logs about running commands
+        :param retention: policy of keeping the captured output, e.g. KeepLastLines(1000).
+        Whole output is kept in memory by default.
+        :param on_next_stderr_line: callback to call on each line of stderr.
+        If given, stderr is streamed separately from stdout, regardless of print_stderr.
+        :param stderr_retention: policy of keeping the captured stderr, when it's streamed separately
         """
+        self.cmd: str = cmd
         self._stop: bool = False
-        self._captured_stream = io.StringIO()
+        self._retention: OutputRetention = default_retention(retention)
+        self._stderr_retention: OutputRetention = default_retention(stderr_retention)
+        separate_stderr = not print_stderr or on_next_stderr_line is not None
         self._debug = debug
 
-        def monitor_output(stream: BackgroundCommand):
-            stdout_iter = iter(stream._process.stdout.readline, b'')
-            
-            while True:
-                if stream._stop:
-                    break
-                try:
-                    line = next(stdout_iter)
-                except StopIteration:
-                    break
-
-                line_str = line.decode()
-                if print_stdout:
-                    sys.stdout.write(line_str)
-                    sys.stdout.flush()
-                if on_next_line is not None:
-                    on_next_line(line_str)
-                self._captured_stream.write(line_str)
-
-            stream._process.wait()
-            if stream._process.returncode != 0 and on_error is not None and not self._stop:
-                stdout = self._captured_stream.getvalue()
-                on_error(CommandError(cmd, stdout, stream._process.returncode))
-
+        def on_output(block: str):
+            if print_stdout:
+                sys.stdout.write(block)
+                sys.stdout.flush()
+            if on_next_line is not None:
+                for line in split_lines(block):
+                    on_next_line(line)
+            self._retention.write(block)
+
+        def on_stderr(block: str):
+            if on_next_stderr_line is not None:
+                for line in split_lines(block):
+                    on_next_stderr_line(line)
+            self._stderr_retention.write(block)
+
+        def on_exit(return_code: int):
+            try:
+                if return_code != 0 and on_error is not None and not self._stop:
+                    on_error(CommandError(cmd, self.stdout, return_code))
+            finally:
+                self._retention.close()
+                self._stderr_retention.close()
             if debug:
                 logger.debug(f'Command finished: {cmd}')
 
-        self._monitor_thread = threading.Thread(
-            target=monitor_output,
-            args=(self,),
-            daemon=True,
-        )
-
         if debug:
             logger.debug(f'Command: {cmd}')
         if shell:
@@ -82,63 +89,67 @@ class BackgroundCommand:
             process_args,
             cwd=workdir,
             stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT if print_stderr else subprocess.PIPE,
+            stderr=subprocess.PIPE if separate_stderr else subprocess.STDOUT,
             shell=shell,
+            start_new_session=True,  # whole process tree can be stopped at once
         )
-
-        self._monitor_thread.start()
-
-    def terminate(self):
-        """Send TERMINATE signal to the process and wait until it's finished"""
+        streams = {self._process.stdout: on_output}
+        if separate_stderr:
+            streams[self._process.stderr] = on_stderr
+        # output is multiplexed by the supervisor shared with other commands instead of a thread per process
+        self._supervised = get_supervisor().watch(self._process, streams, on_exit)
+        for collected in getattr(_collectors, 'stack', []):
+            collected.append(self)
+
+    def terminate(self, timeout: float = 5):
+        """
+        Send TERMINATE signal to the process group and wait until it's finished.
+        Kill it if it's still running after the timeout.
+        :param timeout: number of seconds to wait for the processes to exit gracefully
+        """
         self._stop = True
-        if not self._monitor_thread.is_alive():
+        if not self.is_running:
             return
-
-        children = _get_child_processes(self._process.pid)
-        for child_pid in children:
-            if self._debug:
-                logger.debug(f'terminating child process', pid=child_pid)
-            try:
-                os.kill(child_pid, signal.SIGTERM)
-            except ProcessLookupError as e:
-                if e.errno == 3:
-                    logger.debug('child process has gone while terminating', error=e.strerror, pid=child_pid)
-                else:
-                    raise e
-
-        self._process.terminate()
-        self._process.poll()  # wait for subprocess
+        terminate_process_tree(self._process, grace=timeout, process_group=True)
         if self._debug:
             logger.debug(f'subprocess terminated', pid=self._process.pid)
-        self._monitor_thread.join()  # wait for thread is finished
+        self._supervised.stop()
+        self.wait()
 
-    def wait(self):
-        """Wait until the process is finished"""
-        self._process.poll()
-        self._monitor_thread.join()  # wait for thread is finished
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the process is finished
+        :param timeout: maximum number of seconds to wait, None waits as long as it takes
+        :return: whether the process has finished
+        """
+        if is_worker_thread():
+            return not self.is_running  # called from a callback, which would block the completion of the process
+        return self._supervised.finished.wait(timeout)
 
     @property
     def stdout(self) -> str:
-        """Return captured stdout"""
-        return self._captured_stream.getvalue()
+        """Return captured stdout, limited to the window kept by the retention policy"""
+        return self._retention.getvalue()
+
+    @property
+    def stderr(self) -> str:
+        """Return captured stderr, if it's streamed separately from stdout"""
+        return self._stderr_retention.getvalue()
 
     @property
     def is_running(self) -> bool:
         """Return True if the process is running"""
-        return self._monitor_thread.is_alive()
-
-
-def _get_child_processes(pid: int) -> List[int]:
-    children_pids = []
-    proc_task_path = Path(f'/proc/{pid}/task')
-    if not proc_task_path.is_dir():
-        logger.warn(f"Can't find process task directory: {proc_task_path}")
-        return []
-    tasks = [t for t in proc_task_path.iterdir()]
-    for task in tasks:
-        task_children = task / 'children'
-        if task_children.is_file():
-            task_children_parts = task_children.read_text().split()
-            task_pids = [int(p.strip()) for p in task_children_parts]
-            children_pids.extend(task_pids)
-    return children_pids
+        return not self._supervised.finished.is_set()
+
+
+@contextmanager
+def collect_background_commands() -> Iterator[List[BackgroundCommand]]:
+    """Collect background commands started by the current thread within the context, e.g. to restart them later"""
+    if not hasattr(_collectors, 'stack'):
+        _collectors.stack = []
+    collected: List[BackgroundCommand] = []
+    _collectors.stack.append(collected)
+    try:
+        yield collected
+    finally:
+        _collectors.stack.remove(collected)
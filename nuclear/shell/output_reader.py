@@ -0,0 +1,81 @@
+import codecs
+import os
+from typing import BinaryIO, Iterator, List, Union
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class OutputReader:
+    def __init__(self, stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        High-throughput reader of a subprocess output.
+        It reads large chunks straight from the file descriptor into a reusable buffer
+        and decodes them incrementally, so multi-byte characters split between chunks are handled.
+        Iterating over it yields blocks of complete lines, available at the moment,
+        so they can be written in batches rather than line by line.
+        :param stream: binary stream to read from (e.g. stdout pipe of a subprocess)
+        :param chunk_size: maximum number of bytes read at once
+        """
+        self._fd: int = stream.fileno()
+        self._buffer = bytearray(chunk_size)
+        self._view = memoryview(self._buffer)
+        self._decoder = LineDecoder()
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            size = os.readv(self._fd, [self._buffer])
+            if size == 0:
+                break
+            block = self._decoder.decode(self._view[:size])
+            if block:
+                yield block
+
+        last = self._decoder.finish()
+        if last:
+            yield last
+
+    def lines(self) -> Iterator[str]:
+        """Iterate over single lines (including trailing newline, except the last unterminated line)"""
+        for block in self:
+            yield from split_lines(block)
+
+
+class LineDecoder:
+    def __init__(self):
+        """
+        Incremental UTF-8 decoder returning only complete lines.
+        The rest is kept until the next chunk comes in.
+        """
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        # pieces of the unterminated line, joined only once it's complete
+        self._pending: List[str] = []
+
+    def decode(self, chunk: Union[bytes, memoryview]) -> str:
+        """Decode next chunk of bytes and return a block of lines completed so far (may be empty)"""
+        decoded = self._decoder.decode(chunk)
+        end = decoded.rfind('\n') + 1
+        if end == 0:
+            if decoded:
+                self._pending.append(decoded)
+            return ''
+        self._pending.append(decoded[:end])
+        block = ''.join(self._pending)
+        self._pending = [decoded[end:]] if end < len(decoded) else []
+        return block
+
+    def finish(self) -> str:
+        """Return the last unterminated line"""
+        self._pending.append(self._decoder.decode(b'', final=True))
+        last = ''.join(self._pending)
+        self._pending = []
+        return last
+
+
+def split_lines(block: str) -> List[str]:
+    """Split block of text into lines, keeping newline characters, the same way as readline does"""
+    lines = block.split('\n')
+    last = lines.pop()
+    lines = [line + '\n' for line in lines]
+    if last:
+        lines.append(last)
+    return lines
@@ -0,0 +1,159 @@
+import io
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from nuclear.shell.output_reader import OutputReader, split_lines
+from nuclear.shell.shell_utils import CommandError, _TimeoutGuard, _start_process
+from nuclear.sublog.logging import logger
+
+
+@dataclass
+class CommandResult:
+    cmd: str
+    stdout: str
+    return_code: int
+    duration: float  # seconds
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.return_code == 0
+
+
+class ParallelCommandError(CommandError):
+    def __init__(self, failed: List[CommandResult], results: List[CommandResult]):
+        """
+        Some of the commands run in parallel have failed
+        :param failed: results of the failed commands
+        :param results: results of all finished commands (including the failed ones)
+        """
+        stdout = ''.join(f'{result.cmd}:\n{result.stdout}' for result in failed)
+        super().__init__('; '.join(result.cmd for result in failed), stdout, failed[0].return_code)
+        self.failed: List[CommandResult] = failed
+        self.results: List[CommandResult] = results
+
+    def __str__(self):
+        failures = ', '.join(f'{result.cmd} (timed out)' if result.timed_out else
+                             f'{result.cmd} (exit code {result.return_code})' for result in self.failed)
+        return f'{len(self.failed)} of {len(self.results)} commands failed: {failures}\n{self.stdout}'
+
+
+def shell_many(
+    cmds: Iterable[str],
+    max_workers: Optional[int] = None,
+    workdir: Optional[Path] = None,
+    print_stdout: bool = False,
+    print_log: bool = False,
+    fail_fast: bool = False,
+    timeout: Optional[float] = None,
+    timeout_grace: float = 5,
+) -> List[CommandResult]:
+    """
+    Run many system shell commands concurrently and collect their outputs.
+    Live output of each command is printed line by line, prefixed with the command,
+    so lines of different commands don't get interleaved.
+    :param cmds: shell commands to run
+    :param max_workers: maximum number of commands running at the same time, defaults to the number of CPUs
+    :param workdir: working directory for the commands
+    :param print_stdout: whether to print live stdout of the commands, prefixed with the command
+    :param print_log: whether to print a log message about running each command
+    :param fail_fast: whether to kill the remaining commands as soon as one of them fails.
+    Otherwise, all commands are run and their failures are reported together.
+    Commands killed or never started due to the failure are left out of the results,
+    but the ones that managed to finish on their own are reported.
+    :param timeout: maximum number of seconds to wait for each command to finish.
+    Then the command with all its subprocesses is terminated (SIGTERM) and reported as failed.
+    :param timeout_grace: number of seconds to wait after terminating timed out command before killing it (SIGKILL)
+    :return: results of the commands in the same order as the commands were given
+    :raises:
+        ParallelCommandError: in case of non-zero exit code of any command
+    """
+    cmds = list(cmds)
+    runner = _ParallelRunner(workdir, print_stdout, print_log, fail_fast, timeout, timeout_grace)
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+        try:
+            results: List[Optional[CommandResult]] = list(executor.map(runner.run, cmds))
+        except KeyboardInterrupt:
+            runner.cancel()
+            raise
+
+    finished = [result for result in results if result is not None]
+    failed = [result for result in finished if not result.ok]
+    if failed:
+        raise ParallelCommandError(failed, finished)
+    return finished
+
+
+class _ParallelRunner:
+    def __init__(self, workdir: Optional[Path], print_stdout: bool, print_log: bool, fail_fast: bool,
+                 timeout: Optional[float] = None, timeout_grace: float = 5):
+        self._workdir: Optional[Path] = workdir
+        self._print_stdout: bool = print_stdout
+        self._print_log: bool = print_log
+        self._fail_fast: bool = fail_fast
+        self._timeout: Optional[float] = timeout
+        self._timeout_grace: float = timeout_grace
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._processes: Dict[int, subprocess.Popen] = {}
+        self._killed: Set[int] = set()
+
+    def run(self, cmd: str) -> Optional[CommandResult]:
+        """Run a single command, return None if it's been cancelled (not started or killed) due to another failure"""
+        start = time.monotonic()
+        with self._lock:
+            if self._cancelled.is_set():
+                return None
+            # own process group lets the whole tree be killed, including the children of the shell
+            process = _start_process(cmd, self._workdir, False, self._print_log, process_group=True)
+            self._processes[process.pid] = process
+
+        captured_stream = io.StringIO()
+        prefix = f'[{_shorten(cmd)}] '
+        timeout_guard = _TimeoutGuard(process, self._timeout, self._timeout_grace, process_group=True)
+        with timeout_guard:
+            for block in OutputReader(process.stdout):
+                captured_stream.write(block)
+                if self._print_stdout:
+                    prefixed = ''.join(prefix + line for line in split_lines(block))
+                    with self._lock:
+                        sys.stdout.write(prefixed if prefixed.endswith('\n') else prefixed + '\n')
+                        sys.stdout.flush()
+            process.wait()
+        process.stdout.close()
+
+        with self._lock:
+            del self._processes[process.pid]
+            killed = process.pid in self._killed and process.returncode == -signal.SIGKILL
+        if killed:
+            return None
+        result = CommandResult(cmd, captured_stream.getvalue(), process.returncode, time.monotonic() - start,
+                               timed_out=timeout_guard.timed_out)
+        if not result.ok and self._fail_fast:
+            self.cancel()
+        return result
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled.set()
+            for process in self._processes.values():
+                logger.warning('killing subprocess', pid=process.pid)
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                    self._killed.add(process.pid)
+                except ProcessLookupError:
+                    pass
+
+
+def _shorten(cmd: str, max_length: int = 40) -> str:
+    if len(cmd) <= max_length:
+        return cmd
+    return cmd[:max_length - 3] + '...'
@@ -0,0 +1,117 @@
+import os
+import signal
+import subprocess
+import time
+from pathlib import Path
+from typing import List
+
+
+def descendant_pids(pid: int) -> List[int]:
+    """Find all descendants of a process (children, grandchildren, etc.) by walking /proc recursively"""
+    descendants: List[int] = []
+    queue: List[int] = [pid]
+    while queue:
+        parent = queue.pop()
+        children = _child_pids(parent)
+        descendants.extend(children)
+        queue.extend(children)
+    return descendants
+
+
+def signal_process_tree(pid: int, sig: int = signal.SIGTERM, process_group: bool = False):
+    """
+    Send a signal to the process and all its descendants.
+    :param pid: ID of the root process
+    :param sig: signal to send
+    :param process_group: whether the process leads its own process group, which can be signalled atomically.
+    Otherwise, descendants are found in /proc before signalling, as they'd get orphaned once the parent is gone.
+    """
+    if process_group:
+        try:
+            os.killpg(pid, sig)
+            return
+        except ProcessLookupError:
+            return
+        except PermissionError:
+            pass  # group has been taken over, fall back to the tree walk
+    for target in [pid] + descendant_pids(pid):
+        try:
+            os.kill(target, sig)
+        except ProcessLookupError:
+            pass
+
+
+def _child_pids(pid: int) -> List[int]:
+    children: List[int] = []
+    try:
+        for task in Path(f'/proc/{pid}/task').iterdir():
+            try:
+                children.extend(int(child) for child in (task / 'children').read_text().split())
+            except OSError:
+                pass
+    except OSError:
+        pass
+    return children
+
+
+def terminate_process_tree(process: subprocess.Popen, grace: float = 5, process_group: bool = False):
+    """
+    Terminate the process with its descendants gracefully: send SIGTERM,
+    then SIGKILL to the ones which are still alive after the grace period.
+    :param process: root process
+    :param grace: number of seconds to wait for the processes to exit after SIGTERM
+    :param process_group: whether the process leads its own process group
+    """
+    targets = [process.pid] + descendant_pids(process.pid)
+    _signal_all(targets[:1] if process_group else targets, signal.SIGTERM, process_group)
+
+    deadline = time.monotonic() + grace
+    interval = 0.001  # most processes exit right away, back off for the stubborn ones
+    while time.monotonic() < deadline:
+        process.poll()  # reap the direct child, zombie would be counted as alive
+        if not _any_alive(targets, process_group):
+            return
+        time.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+        interval = min(interval * 2, 0.05)
+
+    _signal_all(targets[:1] if process_group else targets, signal.SIGKILL, process_group)
+    process.poll()
+
+
+def _any_alive(pids: List[int], process_group: bool) -> bool:
+    if process_group:
+        try:
+            os.killpg(pids[0], 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+    for pid in pids:
+        try:
+            os.kill(pid, 0)
+            if not _is_zombie(pid):  # orphaned zombies may never be reaped in containers
+                return True
+        except ProcessLookupError:
+            pass
+        except PermissionError:
+            return True
+    return False
+
+
+def _is_zombie(pid: int) -> bool:
+    try:
+        stat = Path(f'/proc/{pid}/stat').read_text()
+    except OSError:
+        return True
+    return stat[stat.rfind(')') + 2:].startswith('Z')
+
+
+def _signal_all(pids: List[int], sig: int, process_group: bool):
+    for pid in pids:
+        if process_group:
+            signal_process_tree(pid, sig, process_group=True)
+            continue
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
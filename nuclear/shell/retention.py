@@ -0,0 +1,154 @@
+import abc
+import io
+import mmap
+import os
+import tempfile
+import threading
+import weakref
+from pathlib import Path
+from typing import Optional, Union
+
+from nuclear.shell.shell_utils import OutputTail
+
+
+class OutputRetention(abc.ABC):
+    """Policy of keeping the output of a long-running command"""
+
+    @abc.abstractmethod
+    def write(self, text: str):
+        ...
+
+    @abc.abstractmethod
+    def getvalue(self) -> str:
+        """Return the retained window of the output"""
+
+    def close(self):
+        """Release the resources used for writing, once the command has finished. Output stays available."""
+
+
+class KeepAll(OutputRetention):
+    def __init__(self):
+        """Keep the whole output in memory"""
+        self._stream = io.StringIO()
+
+    def write(self, text: str):
+        self._stream.write(text)
+
+    def getvalue(self) -> str:
+        return self._stream.getvalue()
+
+
+class KeepNothing(OutputRetention):
+    """Don't keep the output at all, e.g. when it's consumed by callbacks only"""
+
+    def write(self, text: str):
+        pass
+
+    def getvalue(self) -> str:
+        return ''
+
+
+class KeepLastLines(OutputRetention):
+    def __init__(self, max_lines: int):
+        """
+        Keep only the last lines of the output in a ring buffer
+        :param max_lines: maximum number of lines to keep
+        """
+        self._tail = OutputTail(max_lines)
+        self._lock = threading.Lock()
+
+    def write(self, text: str):
+        with self._lock:
+            self._tail.write(text)
+
+    def getvalue(self) -> str:
+        with self._lock:
+            return self._tail.getvalue()
+
+
+class KeepLastBytes(OutputRetention):
+    def __init__(self, max_bytes: int):
+        """
+        Keep only the last bytes of the output (encoded in UTF-8)
+        :param max_bytes: maximum number of bytes to keep
+        """
+        self._max_bytes: int = max_bytes
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+
+    def write(self, text: str):
+        data = text.encode()
+        with self._lock:
+            if len(data) >= self._max_bytes:
+                self._buffer[:] = data[-self._max_bytes:]
+                return
+            self._buffer += data
+            overflow = len(self._buffer) - self._max_bytes
+            if overflow > 0:
+                del self._buffer[:overflow]
+
+    def getvalue(self) -> str:
+        with self._lock:
+            # window may start in the middle of a multi-byte character
+            return self._buffer.decode(errors='ignore')
+
+
+class SpillToFile(OutputRetention):
+    def __init__(self, path: Union[Path, str, None] = None):
+        """
+        Write the output to a file instead of keeping it in memory.
+        Reading maps the file into memory, so it's paged in by the system rather than buffered by the process.
+        The file is closed once the command has finished, and it's opened again for reading.
+        :param path: file to write the output to.
+        If not given, a temporary file is used, which is removed along with this object.
+        """
+        if path is None:
+            self.path: Optional[Path] = None
+            fd, temp_path = tempfile.mkstemp(prefix='nuclear-output-')
+            self._file_path: Path = Path(temp_path)
+            self._file = os.fdopen(fd, 'a+b', buffering=0)
+            weakref.finalize(self, _remove_file, self._file_path)
+        else:
+            self.path = Path(path)
+            self._file_path = self.path
+            self._file = open(self.path, 'a+b', buffering=0)
+        self._lock = threading.Lock()
+
+    def write(self, text: str):
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(text.encode())
+
+    def getvalue(self) -> str:
+        with self._lock:
+            if not self._file.closed:
+                return _read_mapped(self._file.fileno())
+        try:
+            with open(self._file_path, 'rb') as file:
+                return _read_mapped(file.fileno())
+        except FileNotFoundError:
+            return ''
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _read_mapped(fd: int) -> str:
+    size = os.fstat(fd).st_size
+    if size == 0:
+        return ''  # empty file can't be mapped
+    with mmap.mmap(fd, size, access=mmap.ACCESS_READ) as mapped:
+        # decode straight from the mapped pages, without copying them to an intermediate bytes object
+        return str(mapped, 'utf-8', 'replace')
+
+
+def _remove_file(path: Path):
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def default_retention(retention: Optional[OutputRetention]) -> OutputRetention:
+    return retention if retention is not None else KeepAll()
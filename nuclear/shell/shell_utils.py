@@ -1,9 +1,16 @@
+import codecs
 import io
+import signal
 import subprocess
 import sys
+import threading
+import time
+from collections import deque
 from pathlib import Path
-from typing import Optional
+from typing import Deque, Iterator, Optional, Union
 
+from nuclear.shell.output_reader import OutputReader, split_lines
+from nuclear.shell.process_tree import signal_process_tree, terminate_process_tree
 from nuclear.sublog.logging import logger
 
 
@@ -15,6 +22,8 @@ def shell(
     raw_output: bool = False,
     independent: bool = False,
     output_file: Optional[Path] = None,
+    timeout: Optional[float] = None,
+    timeout_grace: float = 5,
 ) -> str:
     """
     Run system shell command and return its output.
@@ -26,24 +35,32 @@ def shell(
     :param raw_output: whether to let subprocess manage stdout/stderr on its own instead of capturing it
     :param independent: whether to start an independent process that can outlive the caller process
     :param output_file: optional file to write the output in real time
+    :param timeout: maximum number of seconds to wait for the command to finish.
+    Then the command with all its subprocesses is terminated (SIGTERM).
+    :param timeout_grace: number of seconds to wait after terminating timed out command before killing it (SIGKILL)
     :return: stdout of the command combined with stderr
     :raises:
         CommandError: in case of non-zero command exit code
+        CommandTimeout: in case the command hasn't finished within the timeout
     """
     output_file_writer = open(output_file, 'a') if output_file else None
 
+    # own process group lets the whole timed out tree be killed at once,
+    # but commands talking to the terminal (e.g. password prompts) have to stay in its foreground group.
+    # Without a timeout, the command stays in the caller's session to keep its signals and job control.
+    process_group = independent or (timeout is not None and not raw_output and not _is_terminal_attached())
     popen_kwargs = {
         'shell': True,
         'cwd': workdir,
         'stdout': subprocess.PIPE,
         'stderr': subprocess.STDOUT,
+        'start_new_session': process_group,
     }
-    if independent:
-        popen_kwargs['start_new_session'] = True
     if raw_output:
         popen_kwargs['stdout'] = None
         popen_kwargs['stderr'] = None
 
+    start_time = time.monotonic()
     process = subprocess.Popen(cmd, **popen_kwargs)
     if print_log:
         if independent:
@@ -51,46 +68,191 @@ def shell(
         else:
             logger.debug(f'Command: {cmd}')
 
+    timeout_guard = _TimeoutGuard(process, timeout, timeout_grace, process_group)
     try:
-        if raw_output:
-            process.wait()
-            if process.returncode != 0:
-                raise CommandError(cmd, '', process.returncode)
-            return ''
-        
-        captured_stream = io.StringIO()
-        for line in iter(process.stdout.readline, b''):
-            line_str = line.decode()
-            if print_stdout:
-                sys.stdout.write(line_str)
-                sys.stdout.flush()
-            if output_file_writer is not None:
-                output_file_writer.write(line_str)
-            captured_stream.write(line_str)
+        with timeout_guard:
+            if raw_output:
+                process.wait()
+                captured = ''
+            else:
+                captured_stream = io.StringIO()
+                for block in OutputReader(process.stdout):
+                    if print_stdout:
+                        sys.stdout.write(block)
+                        sys.stdout.flush()
+                    if output_file_writer is not None:
+                        output_file_writer.write(block)
+                    captured_stream.write(block)
+                process.wait()
+                captured = captured_stream.getvalue()
 
-        process.wait()
-        if output_file_writer is not None:
-            output_file_writer.close()
+        duration = time.monotonic() - start_time
+        if timeout_guard.timed_out:
+            raise CommandTimeout(cmd, captured, process.returncode, timeout, duration)
         if process.returncode != 0:
-            stdout = captured_stream.getvalue()
-            raise CommandError(cmd, stdout, process.returncode)
-        return captured_stream.getvalue()
+            raise CommandError(cmd, captured, process.returncode, duration)
+        return captured
     except KeyboardInterrupt:
         if not independent:
             logger.warning('killing subprocess', pid=process.pid)
-            process.kill()
+            signal_process_tree(process.pid, signal.SIGKILL, process_group)
         raise
+    finally:
+        if output_file_writer is not None:
+            output_file_writer.close()
+
+
+def shell_stream(
+    cmd: str,
+    workdir: Optional[Path] = None,
+    print_log: bool = False,
+    independent: bool = False,
+    chunk_size: Optional[int] = None,
+    tail_lines: int = 100,
+) -> Iterator[Union[str, bytes]]:
+    """
+    Run system shell command and yield its output as it arrives, without capturing all of it.
+    Only the last lines are kept in order to report them in case of errors,
+    so memory usage stays constant regardless of the output size.
+    Process is killed if the iteration is stopped before the command is finished.
+    :param cmd: shell command to run
+    :param workdir: working directory for the command
+    :param print_log: whether to print a log message about running the command
+    :param independent: whether to start an independent process that can outlive the caller process
+    :param chunk_size: if given, raw chunks of bytes (up to this size) are yielded instead of decoded lines
+    :param tail_lines: number of last output lines to keep for the error message
+    :return: iterator over lines (stdout combined with stderr) or raw chunks of bytes
+    :raises:
+        CommandError: in case of non-zero command exit code, containing the last lines of output
+    """
+    process_group = independent or not _is_terminal_attached()
+    start_time = time.monotonic()
+    process = _start_process(cmd, workdir, independent, print_log, process_group)
+    tail = OutputTail(tail_lines)
+    try:
+        if chunk_size is None:
+            for line in OutputReader(process.stdout).lines():
+                tail.write(line)
+                yield line
+        else:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            for chunk in iter(lambda: process.stdout.read1(chunk_size), b''):
+                tail.write(decoder.decode(chunk))
+                yield chunk
+            tail.write(decoder.decode(b'', final=True))
+
+        process.wait()
+        if process.returncode != 0:
+            raise CommandError(cmd, tail.getvalue(), process.returncode, time.monotonic() - start_time)
+    finally:
+        process.stdout.close()
+        if process.poll() is None and not independent:
+            logger.warning('killing subprocess', pid=process.pid)
+            signal_process_tree(process.pid, signal.SIGKILL, process_group)
+            process.wait()
+
+
+class OutputTail:
+    def __init__(self, max_lines: int, max_line_length: int = 64 * 1024):
+        """
+        Ring buffer keeping only the last lines of the output
+        :param max_lines: maximum number of complete lines to keep
+        :param max_line_length: maximum number of characters kept from a line, which hasn't been terminated yet
+        """
+        self._lines: Deque[str] = deque(maxlen=max_lines)
+        self._partial: str = ''
+        self._max_line_length: int = max_line_length
+
+    def write(self, text: str):
+        if not text:
+            return
+        lines = split_lines(self._partial + text)
+        self._partial = ''
+        if not lines[-1].endswith('\n'):
+            self._partial = lines.pop()[-self._max_line_length:]
+        self._lines.extend(lines)
+
+    def getvalue(self) -> str:
+        return ''.join(self._lines) + self._partial
+
+
+def _start_process(cmd: str, workdir: Optional[Path], independent: bool, print_log: bool,
+                   process_group: bool = False) -> subprocess.Popen:
+    process = subprocess.Popen(
+        cmd,
+        shell=True,
+        cwd=workdir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        start_new_session=independent or process_group,
+    )
+    if print_log:
+        if independent:
+            logger.debug('Starting process', cmd=cmd, pid=process.pid)
+        else:
+            logger.debug(f'Command: {cmd}')
+    return process
 
 
 class CommandError(RuntimeError):
-    def __init__(self, cmd: str, stdout: str, return_code: int):
+    def __init__(self, cmd: str, stdout: str, return_code: int, duration: Optional[float] = None):
         super().__init__()
         self.cmd = cmd
         self.stdout = stdout
         self.return_code = return_code
+        self.duration = duration  # elapsed seconds
 
     def __str__(self):
-        return f'command failed: {self.cmd}: {self.stdout}'
+        return f'command failed: {self.cmd}: {self.stdout}{self._elapsed_info()}'
+
+    def _elapsed_info(self) -> str:
+        if self.duration is None:
+            return ''
+        return f' (exit code {self.return_code} after {self.duration:.3f}s)'
+
+
+class CommandTimeout(CommandError):
+    def __init__(self, cmd: str, stdout: str, return_code: int, timeout: float, duration: Optional[float] = None):
+        super().__init__(cmd, stdout, return_code, duration)
+        self.timeout = timeout
+
+    def __str__(self):
+        return f'command timed out after {self.timeout}s: {self.cmd}: {self.stdout}{self._elapsed_info()}'
+
+
+class _TimeoutGuard:
+    def __init__(self, process: subprocess.Popen, timeout: Optional[float], grace: float, process_group: bool):
+        """Terminate the process tree, if it's still running when the timeout expires"""
+        self.timed_out: bool = False
+        self._process: subprocess.Popen = process
+        self._grace: float = grace
+        self._process_group: bool = process_group
+        self._timer: Optional[threading.Timer] = None
+        if timeout is not None:
+            self._timer = threading.Timer(timeout, self._expire)
+            self._timer.daemon = True
+
+    def __enter__(self):
+        if self._timer is not None:
+            self._timer.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._timer is not None:
+            self._timer.cancel()
+
+    def _expire(self):
+        if self._process.poll() is not None:
+            return
+        self.timed_out = True
+        logger.warning('terminating timed out subprocess', pid=self._process.pid)
+        terminate_process_tree(self._process, self._grace, self._process_group)
+
+
+def _is_terminal_attached() -> bool:
+    try:
+        return sys.stdin is not None and sys.stdin.isatty()
+    except (ValueError, OSError):
+        return False
 
 
 class ShellExecutor:
@@ -0,0 +1,341 @@
+import contextlib
+import os
+import queue
+import selectors
+import subprocess
+import threading
+from typing import BinaryIO, Callable, Dict, List, Optional
+
+from nuclear.shell.output_reader import DEFAULT_CHUNK_SIZE, LineDecoder
+from nuclear.sublog.logging import logger
+
+OutputCallback = Callable[[str], None]
+ExitCallback = Callable[[int], None]
+
+_EXIT_POLL_INTERVAL = 0.1
+_thread_local = threading.local()
+
+
+class SupervisedProcess:
+    def __init__(self,
+                 supervisor: 'ProcessSupervisor',
+                 process: subprocess.Popen,
+                 streams: Dict[BinaryIO, OutputCallback],
+                 on_exit: ExitCallback,
+                 worker: 'queue.SimpleQueue',
+                 max_queued: int = 64,
+                 ):
+        """
+        Registration of a single process watched by the supervisor
+        :param max_queued: maximum number of output blocks waiting for the callbacks,
+        then reading the output is paused until the worker catches up
+        """
+        self.process: subprocess.Popen = process
+        self.finished = threading.Event()
+        self.stopping: bool = False  # don't wait for the output pipes to be closed once the process exits
+        self.on_exit: ExitCallback = on_exit
+        self.streams: List[BinaryIO] = list(streams.keys())
+        self._supervisor: 'ProcessSupervisor' = supervisor
+        self._worker: 'queue.SimpleQueue' = worker
+        self.callbacks: Dict[int, OutputCallback] = {}
+        self.decoders: Dict[int, LineDecoder] = {}
+        self.open_fds: List[int] = []
+        self.pidfd: Optional[int] = None
+        self.exited: bool = False
+        self.paused: bool = False  # output pipes are unregistered from the selector, while the queue is full
+        self._max_queued: int = max_queued
+        self._queued: int = 0
+        self._queue_lock = threading.Lock()
+        for stream, callback in streams.items():
+            fd = stream.fileno()
+            os.set_blocking(fd, False)
+            self.callbacks[fd] = callback
+            self.decoders[fd] = LineDecoder()
+            self.open_fds.append(fd)
+
+    def stop(self):
+        """Finish supervising as soon as the process exits, even if its descendants still hold the output pipes"""
+        self.stopping = True
+        self._supervisor.wake_up()
+
+    def dispatch(self, task: Callable[[], None]):
+        with self._queue_lock:
+            self._queued += 1
+
+        def run_task():
+            try:
+                task()
+            finally:
+                self._task_done()
+
+        self._worker.put(run_task)
+
+    def pause_if_full(self) -> bool:
+        """Mark the process as paused if too many output blocks are waiting for the callbacks"""
+        with self._queue_lock:
+            if self._queued >= self._max_queued:
+                self.paused = True
+            return self.paused
+
+    def resume_if_drained(self) -> bool:
+        """Unmark the paused process once the worker has handled at least half of the waiting blocks"""
+        with self._queue_lock:
+            if self.paused and self._queued <= self._max_queued // 2:
+                self.paused = False
+                return True
+            return False
+
+    def _task_done(self):
+        with self._queue_lock:
+            self._queued -= 1
+            drained = self.paused and self._queued <= self._max_queued // 2
+        if drained:
+            self._supervisor.wake_up()
+
+
+class ProcessSupervisor:
+    def __init__(self, workers: int = 4, max_queued: int = 64):
+        """
+        Single event loop multiplexing output pipes of many background processes with selectors (epoll),
+        instead of running a thread per process.
+        Callbacks are dispatched to a small pool of workers.
+        All callbacks of one process are run by the same worker, so they keep the order of the output.
+        When callbacks can't keep up with a chatty process, its pipes aren't read until the worker catches up,
+        so the process is blocked on writing instead of its output piling up in memory.
+        Process exit is tracked with pidfd, or by polling if it's not supported by the system.
+        If supervising a process fails unexpectedly, it's killed and reported as finished,
+        so the loop keeps serving the other processes and nobody waits for it forever.
+        :param workers: number of threads running the callbacks
+        :param max_queued: maximum number of output blocks of a single process waiting for the callbacks
+        """
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._pending: List[SupervisedProcess] = []
+        self._watched: List[SupervisedProcess] = []
+        self._buffer = bytearray(DEFAULT_CHUNK_SIZE)
+        self._view = memoryview(self._buffer)
+        self._max_queued: int = max_queued
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+        os.set_blocking(self._wake_write, False)
+        self._selector.register(self._wake_read, selectors.EVENT_READ, None)
+        self._workers: List['queue.SimpleQueue'] = []
+        self._next_worker: int = 0
+        for index in range(workers):
+            tasks: 'queue.SimpleQueue' = queue.SimpleQueue()
+            threading.Thread(target=_run_worker, args=(tasks,), daemon=True,
+                             name=f'nuclear-supervisor-worker-{index}').start()
+            self._workers.append(tasks)
+        self._thread = threading.Thread(target=self._loop, daemon=True, name='nuclear-supervisor')
+        self._thread.start()
+
+    def watch(self,
+              process: subprocess.Popen,
+              streams: Dict[BinaryIO, OutputCallback],
+              on_exit: ExitCallback,
+              ) -> SupervisedProcess:
+        """
+        Start supervising a process.
+        :param process: started subprocess
+        :param streams: output pipes of the process mapped to callbacks receiving blocks of complete lines
+        :param on_exit: callback called with the exit code, after all the output has been handled
+        """
+        with self._lock:
+            worker = self._workers[self._next_worker % len(self._workers)]
+            self._next_worker += 1
+            supervised = SupervisedProcess(self, process, streams, on_exit, worker, self._max_queued)
+            # opened right away, before the process can be reaped by someone else and its pid reused
+            supervised.pidfd = _open_pidfd(process.pid)
+            self._pending.append(supervised)
+        self.wake_up()
+        return supervised
+
+    def wake_up(self):
+        try:
+            os.write(self._wake_write, b'\0')
+        except BlockingIOError:
+            pass  # loop is going to wake up anyway
+
+    def _loop(self):
+        while True:
+            try:
+                self._loop_iteration()
+            except Exception as e:
+                logger.exception(e)
+
+    def _loop_iteration(self):
+        # separate frame, so the finished processes aren't referenced by the loop variables while waiting for events
+        polling = any(not s.exited and s.pidfd is None for s in self._watched)
+        for key, _ in self._selector.select(_EXIT_POLL_INTERVAL if polling else None):
+            if key.data is None:
+                self._drain_wake_up()
+            else:
+                supervised, fd = key.data
+                try:
+                    if fd == supervised.pidfd:
+                        supervised.exited = True
+                        self._close_pidfd(supervised)
+                    elif fd in supervised.open_fds:  # not closed by an earlier event of this round
+                        self._read(supervised, fd)
+                except Exception as e:
+                    self._fail(supervised, e)
+        self._register_pending()
+        for supervised in list(self._watched):
+            try:
+                if supervised.resume_if_drained():
+                    for fd in supervised.open_fds:
+                        self._selector.register(fd, selectors.EVENT_READ, (supervised, fd))
+                self._check_finished(supervised)
+            except Exception as e:
+                self._fail(supervised, e)
+
+    def _drain_wake_up(self):
+        try:
+            while os.read(self._wake_read, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _register_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for supervised in pending:
+            self._watched.append(supervised)
+            try:
+                for fd in supervised.open_fds:
+                    self._selector.register(fd, selectors.EVENT_READ, (supervised, fd))
+                if supervised.pidfd is not None:
+                    self._selector.register(supervised.pidfd, selectors.EVENT_READ, (supervised, supervised.pidfd))
+            except Exception as e:
+                self._fail(supervised, e)
+
+    def _read(self, supervised: SupervisedProcess, fd: int):
+        try:
+            size = os.readv(fd, [self._buffer])
+        except BlockingIOError:
+            return
+        except OSError:
+            size = 0
+        decoder = supervised.decoders[fd]
+        callback = supervised.callbacks[fd]
+        if size == 0:
+            self._close_fd(supervised, fd)
+            block = decoder.finish()
+        else:
+            block = decoder.decode(self._view[:size])
+        if block:
+            supervised.dispatch(lambda: callback(block))
+            if not supervised.paused and supervised.pause_if_full():
+                for open_fd in supervised.open_fds:
+                    self._selector.unregister(open_fd)
+
+    def _close_fd(self, supervised: SupervisedProcess, fd: int):
+        if not supervised.paused:
+            self._selector.unregister(fd)
+        supervised.open_fds.remove(fd)
+
+    def _close_pidfd(self, supervised: SupervisedProcess):
+        if supervised.pidfd is not None:
+            self._selector.unregister(supervised.pidfd)
+            os.close(supervised.pidfd)
+            supervised.pidfd = None
+
+    def _check_finished(self, supervised: SupervisedProcess):
+        if not supervised.exited and (supervised.pidfd is None or supervised.stopping):
+            supervised.exited = supervised.process.poll() is not None
+        if not supervised.exited:
+            return
+        if supervised.open_fds and not supervised.stopping:
+            return  # process has exited, but the rest of its output is still coming
+
+        for fd in list(supervised.open_fds):
+            self._close_fd(supervised, fd)
+        self._close_pidfd(supervised)
+        self._watched.remove(supervised)
+        return_code = supervised.process.wait()
+
+        for stream in supervised.streams:
+            stream.close()
+        self._finish(supervised, return_code)
+
+    def _fail(self, supervised: SupervisedProcess, error: Exception):
+        """Stop supervising the process after an unexpected error, kill it, as its output can't be read anymore"""
+        logger.error(f'supervising process failed: {error}', pid=supervised.process.pid)
+        if supervised in self._watched:
+            self._watched.remove(supervised)
+        for fd in supervised.open_fds + [supervised.pidfd]:
+            if fd is not None:
+                with contextlib.suppress(KeyError, ValueError, OSError):
+                    self._selector.unregister(fd)
+        supervised.open_fds.clear()
+        if supervised.pidfd is not None:
+            with contextlib.suppress(OSError):
+                os.close(supervised.pidfd)
+            supervised.pidfd = None
+        if supervised.process.poll() is None:
+            supervised.process.kill()
+        return_code = supervised.process.wait()
+        for stream in supervised.streams:
+            with contextlib.suppress(OSError, ValueError):
+                stream.close()
+        self._finish(supervised, return_code)
+
+    @staticmethod
+    def _finish(supervised: SupervisedProcess, return_code: int):
+        def finish():
+            try:
+                supervised.on_exit(return_code)
+            finally:
+                supervised.finished.set()
+
+        supervised.dispatch(finish)
+
+
+def is_worker_thread() -> bool:
+    """Whether the current thread runs the callbacks of supervised processes"""
+    return getattr(_thread_local, 'worker', False)
+
+
+def _run_worker(tasks: 'queue.SimpleQueue'):
+    _thread_local.worker = True
+    while True:
+        task = tasks.get()
+        try:
+            task()
+        except BaseException as e:
+            logger.exception(e)
+        finally:
+            task = None  # don't keep the finished process alive while waiting for the next task
+
+
+def _open_pidfd(pid: int) -> Optional[int]:
+    if not hasattr(os, 'pidfd_open'):
+        return None
+    try:
+        return os.pidfd_open(pid)
+    except OSError:
+        return None
+
+
+_default_supervisor: Optional[ProcessSupervisor] = None
+_default_supervisor_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    """Threads of the supervisor don't exist in a forked child, so it starts its own supervisor when needed"""
+    global _default_supervisor, _default_supervisor_lock
+    _default_supervisor = None
+    _default_supervisor_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_supervisor() -> ProcessSupervisor:
+    """Return the supervisor shared by all background commands, start it on the first use"""
+    global _default_supervisor
+    with _default_supervisor_lock:
+        if _default_supervisor is None:
+            _default_supervisor = ProcessSupervisor()
+        return _default_supervisor
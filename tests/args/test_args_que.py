@@ -83,3 +83,16 @@ def test_pop_all():
     args = ArgsQue(['1', '2'])
     assert args.pop_all() == ['1', '2']
     assert args.pop_all() == []
+
+
+def test_pop_front():
+    args = ArgsQue(['1', '2', '3'])
+    assert args.pop_front(2) == ['1', '2']
+    assert args.pop_front(2) == ['3']
+    assert not args
+
+
+def test_put_all():
+    args = ArgsQue(['1', '2'])
+    args.put_all(args.pop_all()[1:])
+    assert [arg for arg in args] == ['2']
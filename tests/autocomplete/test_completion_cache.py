@@ -0,0 +1,126 @@
+import os
+import sys
+
+from nuclear import CliBuilder, subcommand, parameter, flag, argument
+from nuclear.cli.autocomplete.cache import completion_index_path, is_completion_index_valid
+from tests.asserts import MockIO, assert_system_exit
+
+
+def list_screens():
+    return ['HDMI', 'eDP']
+
+
+def build_rules(cli: CliBuilder) -> CliBuilder:
+    return cli.has(
+        subcommand('git').has(
+            subcommand('push').has(
+                flag('force'),
+            ),
+            parameter('remote', choices=['origin', 'upstream']),
+        ),
+        subcommand('xrandr').has(
+            argument('screen', choices=list_screens),
+        ),
+    )
+
+
+def test_completion_answered_from_index(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    with MockIO('--autocomplete', 'app git push --f') as mockio:
+        build_rules(CliBuilder(completion_cache=True)).run()
+        assert mockio.output() == '--force\n'
+    assert completion_index_path().is_file()
+    assert is_completion_index_valid(None)
+
+    with MockIO('--autocomplete', 'app git --remote ') as mockio:
+        # answered without the rules
+        assert_system_exit(lambda: CliBuilder(completion_cache=True).run())
+        assert mockio.output() == 'origin\nupstream\n'
+
+    with MockIO('--autocomplete', 'app git p', '3') as mockio:
+        assert_system_exit(lambda: CliBuilder(completion_cache=True).run())
+        assert mockio.output() == 'push\n'
+
+
+def test_dynamic_choices_fall_back_to_live_call(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    with MockIO('--autocomplete', 'app ') as mockio:
+        build_rules(CliBuilder(completion_cache=True)).run()
+        assert 'xrandr\n' in mockio.output()
+
+    with MockIO('--autocomplete', 'app xrandr ') as mockio:
+        build_rules(CliBuilder(completion_cache=True)).run()
+        assert mockio.output().endswith('HDMI\neDP\n')
+
+
+def test_index_invalidated_by_version(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    with MockIO('--autocomplete', 'app '):
+        build_rules(CliBuilder(version='1.0.0', completion_cache=True)).run()
+    assert is_completion_index_valid('1.0.0')
+    assert not is_completion_index_valid('1.0.1')
+
+    with MockIO('--autocomplete', 'app g') as mockio:
+        build_rules(CliBuilder(version='1.0.1', completion_cache=True)).run()
+        assert mockio.output() == 'git\n'
+    assert is_completion_index_valid('1.0.1')
+
+
+def test_lazy_command_not_loaded_for_index(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    loads = []
+
+    def loader():
+        loads.append(1)
+        from tests.builder.res.lazy_commands import deploy
+        return deploy
+
+    def build_cli() -> CliBuilder:
+        cli = build_rules(CliBuilder(completion_cache=True))
+        cli.add_lazy_command('deploy', target=loader, help='Deploy app')
+        return cli
+
+    with MockIO('--autocomplete', 'app d') as mockio:
+        build_cli().run()
+        assert mockio.output() == 'deploy\n'
+    assert is_completion_index_valid(None)
+    assert not loads
+
+    with MockIO('--autocomplete', 'app d') as mockio:
+        assert_system_exit(lambda: CliBuilder(completion_cache=True).run())
+        assert mockio.output() == 'deploy\n'
+
+    with MockIO('--autocomplete', 'app deploy --r') as mockio:
+        build_cli().run()
+        assert mockio.output() == '--replicas\n--replicas=\n'
+    assert len(loads) == 1
+
+
+def test_index_invalidated_by_imported_module(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    commands_file = tmp_path / 'app_commands.py'
+    commands_file.write_text('COMMANDS = ["build"]\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'app_commands', raising=False)
+    import app_commands
+
+    with MockIO('--autocomplete', 'app b') as mockio:
+        CliBuilder(completion_cache=True).has(*map(subcommand, app_commands.COMMANDS)).run()
+        assert mockio.output() == 'build\n'
+    assert is_completion_index_valid(None)
+
+    stat = commands_file.stat()
+    os.utime(commands_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not is_completion_index_valid(None)
+
+
+def test_run_with_args_ignores_completion_request(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    with MockIO('--autocomplete', 'app g'):
+        build_rules(CliBuilder(completion_cache=True)).run()
+
+    calls = []
+    with MockIO('--autocomplete', 'app g'):
+        cli = CliBuilder(completion_cache=True, run=lambda: calls.append(1))
+        cli.run_with_args([])
+    assert calls == [1]
@@ -0,0 +1,120 @@
+import os
+import socket
+import stat
+import threading
+import time
+
+import pytest
+
+from nuclear import subcommand, parameter, argument
+from nuclear.cli.autocomplete.daemon import CompletionServer, completion_socket_path
+from nuclear.cli.builder.decorator_builder import create_lazy_subcommand
+
+
+def request(socket_path: str, cmdline: str, word_idx: str = '') -> str:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(f'{cmdline}\n{word_idx}\n'.encode())
+        client.shutdown(socket.SHUT_WR)
+        response = b''
+        while True:
+            chunk = client.recv(4096)
+            if not chunk:
+                return response.decode()
+            response += chunk
+
+
+def start_server(server: CompletionServer) -> threading.Thread:
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(100):
+        try:
+            request(server.socket_path, 'app ')
+            return thread
+        except OSError:
+            time.sleep(0.01)
+    raise AssertionError('completion daemon has not started')
+
+
+def test_daemon_answers_completions_with_memoized_choices(tmp_path):
+    calls = []
+
+    def list_screens():
+        calls.append(1)
+        return ['HDMI', 'eDP']
+
+    rules = [
+        subcommand('xrandr').has(
+            argument('screen', choices=list_screens),
+        ),
+        subcommand('git').has(
+            parameter('remote', choices=['origin', 'upstream']),
+        ),
+    ]
+    socket_path = str(tmp_path / 'completion.sock')
+    server = CompletionServer(rules, socket_path, choices_ttl=60)
+    thread = start_server(server)
+    try:
+        assert request(socket_path, 'app xrandr H', '2') == 'HDMI\n'
+        assert request(socket_path, 'app xrandr e', '2') == 'eDP\n'
+        assert request(socket_path, 'app git --remote ') == 'origin\nupstream\n'
+        assert len(calls) == 1
+    finally:
+        server.shutdown()
+        thread.join(1)
+    assert not (tmp_path / 'completion.sock').exists()
+
+
+def test_daemon_loads_lazy_command_when_completed(tmp_path):
+    loads = []
+
+    def loader():
+        loads.append(1)
+
+        def deploy(env: str = 'dev'):
+            pass
+        return deploy
+
+    lazy_rule = create_lazy_subcommand(loader, 'deploy')
+    server = CompletionServer([lazy_rule], str(tmp_path / 'completion.sock'), choices_ttl=60)
+    assert server.complete('app d', None) == ['deploy']
+    assert not loads
+    assert server.complete('app deploy --e', None) == ['--env', '--env=']
+    assert server.complete('app deploy --e', None) == ['--env', '--env=']
+    assert len(loads) == 1
+
+
+def test_socket_path_per_user_and_app(monkeypatch):
+    monkeypatch.setenv('XDG_RUNTIME_DIR', '/run/user/1000')
+    assert completion_socket_path('app').startswith('/run/user/1000/nuclear-completion-')
+    assert completion_socket_path('app').endswith('-app.sock')
+    monkeypatch.delenv('XDG_RUNTIME_DIR')
+    assert completion_socket_path('app').startswith('/tmp/')
+
+
+def test_daemon_socket_private_and_not_taken_over(tmp_path):
+    rules = [subcommand('git')]
+    socket_path = str(tmp_path / 'completion.sock')
+    server = CompletionServer(rules, socket_path)
+    thread = start_server(server)
+    try:
+        assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+        with pytest.raises(RuntimeError, match='already running'):
+            CompletionServer(rules, socket_path).serve_forever()
+        assert request(socket_path, 'app g', '1') == 'git\n'
+    finally:
+        server.shutdown()
+        thread.join(1)
+
+
+def test_stale_socket_replaced(tmp_path):
+    socket_path = str(tmp_path / 'completion.sock')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+        stale.bind(socket_path)  # left by a killed daemon, nobody listens on it
+    server = CompletionServer([subcommand('git')], socket_path)
+    thread = start_server(server)
+    try:
+        assert request(socket_path, 'app g', '1') == 'git\n'
+    finally:
+        server.shutdown()
+        thread.join(1)
@@ -0,0 +1,114 @@
+import shutil
+import subprocess
+
+import pytest
+
+from nuclear import CliBuilder, subcommand, parameter, flag, argument, dictionary
+from nuclear.cli.autocomplete.script import generate_completion_script
+from nuclear.cli.parser.error import CliDefinitionError
+from tests.asserts import MockIO
+
+requires_bash = pytest.mark.skipif(shutil.which('bash') is None, reason='bash is not available')
+
+
+def list_screens():
+    return ['HDMI', 'eDP']
+
+
+def build_cli() -> CliBuilder:
+    return CliBuilder().has(
+        flag('verbose', 'v'),
+        subcommand('git').has(
+            subcommand('push').has(
+                flag('force'),
+            ),
+            parameter('remote', choices=['origin', 'upstream']),
+            dictionary('config'),
+        ),
+        subcommand('xrandr').has(
+            argument('screen', choices=list_screens),
+        ),
+    )
+
+
+def complete(script: str, *words: str) -> list:
+    """Source the completion script in bash and return COMPREPLY for the last word"""
+    words_literal = ' '.join(f"'{word}'" for word in ('app',) + words)
+    program = f"""
+app() {{ echo LIVE; }}
+{script}
+COMP_WORDS=({words_literal})
+COMP_CWORD={len(words)}
+COMP_LINE="${{COMP_WORDS[*]}}"
+_autocomplete_fn=$(complete -p app | awk '{{print $(NF-1)}}')
+$_autocomplete_fn
+printf '%s\\n' "${{COMPREPLY[@]}}"
+"""
+    result = subprocess.run(['bash', '-c', program], stdout=subprocess.PIPE, check=True)
+    return [line for line in result.stdout.decode().splitlines() if line]
+
+
+@requires_bash
+def test_complete_subcommands_and_options():
+    script = build_cli().completion_script('app')
+    assert complete(script, 'g') == ['git']
+    assert complete(script, 'git', 'p') == ['push']
+    assert complete(script, 'git', 'push', '--f') == ['--force']
+    assert complete(script, '--verb') == ['--verbose']
+    assert complete(script, 'git', 'push', '--verb') == ['--verbose']
+
+
+@requires_bash
+def test_complete_subcommands_after_flags():
+    script = build_cli().completion_script('app')
+    assert complete(script, '-v', 'g') == ['git']
+    assert complete(script, '-v', 'git', 'p') == ['push']
+    assert complete(script, '--verbose', 'git', 'push', '--f') == ['--force']
+
+
+@requires_bash
+def test_complete_parameter_values():
+    script = build_cli().completion_script('app')
+    assert complete(script, 'git', '--remote', '') == ['origin', 'upstream']
+    assert complete(script, 'git', '--remote=or') == ['--remote=origin']
+    assert complete(script, 'git', '--remote', 'origin', 'p') == ['push']
+    assert complete(script, 'git', '--config', 'key', 'value', 'p') == ['push']
+
+
+@requires_bash
+def test_dynamic_choices_call_application():
+    script = build_cli().completion_script('app')
+    assert complete(script, 'xrandr', '') == ['LIVE']
+    assert complete(script, 'git', '') != ['LIVE']
+
+
+def test_print_completion_script():
+    with MockIO('--completion-script', 'zsh', 'app') as mockio:
+        build_cli().run()
+        output = mockio.output()
+    assert output.startswith('#compdef app\n')
+    assert 'bashcompinit' in output
+    assert output.rstrip().endswith(' app')
+
+
+def test_unsupported_shell():
+    with pytest.raises(CliDefinitionError):
+        generate_completion_script([], 'app', 'fish')
+
+
+@requires_bash
+def test_lazy_command_completed_by_application():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        from tests.builder.res.lazy_commands import deploy
+        return deploy
+
+    cli = build_cli()
+    cli.add_lazy_command('deploy', target=loader, help='Deploy app')
+    script = cli.completion_script('app')
+    assert not loads
+    assert complete(script, 'd') == ['deploy']
+    assert complete(script, 'deploy', '--r') == ['LIVE']
+    assert complete(script, 'git', 'p') == ['push']
@@ -0,0 +1,33 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from nuclear.version import __version__
+from .measure import BenchmarkReport, BASELINE_DIR, load_baseline
+
+_report = BenchmarkReport()
+
+
+@pytest.fixture(scope='session')
+def benchmark_report() -> BenchmarkReport:
+    return _report
+
+
+def pytest_terminal_summary(terminalreporter):
+    """
+    Show benchmark results compared to the baseline.
+    Set NUCLEAR_BENCHMARK_SAVE=1 to store them as a baseline for the current version
+    or NUCLEAR_BENCHMARK_SAVE=path/to/file.json to store them in a custom file.
+    """
+    if not _report.results:
+        return
+    terminalreporter.section('benchmarks')
+    for line in _report.summary(load_baseline()):
+        terminalreporter.write_line(line)
+
+    save_path = os.environ.get('NUCLEAR_BENCHMARK_SAVE')
+    if save_path:
+        path = BASELINE_DIR / f'{__version__}.json' if save_path == '1' else Path(save_path)
+        _report.save(path)
+        terminalreporter.write_line(f'benchmark results saved to {path}')
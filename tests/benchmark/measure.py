@@ -0,0 +1,98 @@
+import json
+import os
+import platform
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from nuclear.version import __version__
+
+BASELINE_DIR = Path(__file__).parent / 'baseline'
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    iterations: int
+    mean_ms: float
+    min_ms: float
+    peak_alloc_kb: float
+
+
+class BenchmarkReport:
+    def __init__(self):
+        """Results of all benchmarks run in a session, comparable with the stored baseline"""
+        self.results: Dict[str, BenchmarkResult] = {}
+
+    def add(self, result: BenchmarkResult):
+        self.results[result.name] = result
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        content = {
+            'version': __version__,
+            'python': platform.python_version(),
+            'results': {name: asdict(result) for name, result in sorted(self.results.items())},
+        }
+        path.write_text(json.dumps(content, indent=2) + '\n')
+
+    def summary(self, baseline: Optional[Dict]) -> List[str]:
+        baseline_results: Dict[str, Dict] = baseline.get('results', {}) if baseline else {}
+        header = f'{"benchmark":<36} {"mean ms":>10} {"min ms":>10} {"peak KiB":>10}'
+        if baseline:
+            header += f'  vs {baseline.get("version")}'
+        lines = [header]
+        for name, result in sorted(self.results.items()):
+            line = f'{name:<36} {result.mean_ms:>10.3f} {result.min_ms:>10.3f} {result.peak_alloc_kb:>10.1f}'
+            previous = baseline_results.get(name)
+            if previous and previous['mean_ms']:
+                line += f'  x{result.mean_ms / previous["mean_ms"]:.2f} time'
+                if previous['peak_alloc_kb']:
+                    line += f', x{result.peak_alloc_kb / previous["peak_alloc_kb"]:.2f} memory'
+            lines.append(line)
+        return lines
+
+
+def measure(name: str, action: Callable[[], object], iterations: int = 5) -> BenchmarkResult:
+    """Measure latency of an action (without tracing overhead) and then its peak memory allocations"""
+    action()  # warm up
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        action()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        action()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        name=name,
+        iterations=iterations,
+        mean_ms=round(sum(timings) / len(timings) * 1000, 4),
+        min_ms=round(min(timings) * 1000, 4),
+        peak_alloc_kb=round(peak / 1024, 1),
+    )
+
+
+def load_baseline() -> Optional[Dict]:
+    """
+    Load the baseline to compare with: explicit file from NUCLEAR_BENCHMARK_BASELINE env variable
+    or the latest file stored in the baseline directory
+    """
+    explicit_path = os.environ.get('NUCLEAR_BENCHMARK_BASELINE')
+    if explicit_path:
+        return json.loads(Path(explicit_path).read_text())
+    baselines = sorted(BASELINE_DIR.glob('*.json'), key=lambda p: _version_key(p.stem))
+    if not baselines:
+        return None
+    return json.loads(baselines[-1].read_text())
+
+
+def _version_key(version: str) -> List[int]:
+    return [int(part) if part.isdigit() else 0 for part in version.split('.')]
@@ -0,0 +1,60 @@
+from typing import List
+
+from nuclear import *
+from nuclear.cli.builder.rule import CliRule
+
+
+def noop():
+    pass
+
+
+def synthetic_flags(count: int) -> List[CliRule]:
+    return [flag(f'flag-{i}', help=f'synthetic flag {i}') for i in range(count)]
+
+
+def synthetic_params(count: int) -> List[CliRule]:
+    return [
+        parameter(f'param-{i}', help=f'synthetic parameter {i}', choices=[f'choice-{i}-{c}' for c in range(5)])
+        for i in range(count)
+    ]
+
+
+def synthetic_subcommands(depth: int, breadth: int, params: int = 2, prefix: str = 'cmd') -> List[CliRule]:
+    """Build a tree of subcommands with 'breadth' children on each of the 'depth' levels"""
+    if depth <= 0:
+        return []
+    subcommands = []
+    for b in range(breadth):
+        name = f'{prefix}-{b}'
+        rule = subcommand(name, run=noop, help=f'synthetic subcommand {name}').has(
+            *[parameter(f'{name}-param-{i}') for i in range(params)],
+            *synthetic_subcommands(depth - 1, breadth, params, prefix=name),
+        )
+        subcommands.append(rule)
+    return subcommands
+
+
+def synthetic_cli(
+    flags: int = 0,
+    params: int = 0,
+    depth: int = 0,
+    breadth: int = 1,
+    many_arguments: bool = False,
+) -> List[CliRule]:
+    rules: List[CliRule] = []
+    rules += synthetic_flags(flags)
+    rules += synthetic_params(params)
+    rules += synthetic_subcommands(depth, breadth)
+    if many_arguments:
+        rules.append(arguments('files'))
+    rules.append(default_action(noop))
+    return rules
+
+
+def deepest_subcommand_path(depth: int, breadth: int) -> List[str]:
+    path = []
+    prefix = 'cmd'
+    for _ in range(depth):
+        prefix = f'{prefix}-{breadth - 1}'
+        path.append(prefix)
+    return path
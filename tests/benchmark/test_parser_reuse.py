@@ -0,0 +1,26 @@
+import pytest
+
+from nuclear import *
+from .measure import measure
+
+pytestmark = pytest.mark.benchmark
+
+ARGS = ['command-7', '--flag-3', '--param-12', 'value', '--sub-param-5=5']
+
+
+def _build_cli(reuse_parser: bool) -> CliBuilder:
+    cli = CliBuilder(reuse_parser=reuse_parser, error_unrecognized=True)
+    cli.has(*[parameter(f'param-{i}', help=f'parameter {i}') for i in range(200)])
+    cli.has(*[flag(f'flag-{i}') for i in range(100)])
+    for c in range(30):
+        cli.has(subcommand(f'command-{c}', run=lambda: None).has(
+            *[parameter(f'sub-param-{i}', type=int) for i in range(20)],
+        ))
+    return cli
+
+
+def test_reused_parser_per_call_cost(benchmark_report):
+    fresh_cli = _build_cli(reuse_parser=False)
+    reused_cli = _build_cli(reuse_parser=True)
+    benchmark_report.add(measure('cli/run-fresh-parser', lambda: fresh_cli.run_with_args(ARGS), iterations=100))
+    benchmark_report.add(measure('cli/run-reused-parser', lambda: reused_cli.run_with_args(ARGS), iterations=100))
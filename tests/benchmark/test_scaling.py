@@ -0,0 +1,66 @@
+import pytest
+
+from nuclear.cli.autocomplete.autocomplete import find_matching_completions
+from nuclear.cli.help import generate_help
+from nuclear.cli.parser.parser import Parser
+from .measure import measure
+from .synthetic import synthetic_cli, deepest_subcommand_path
+
+pytestmark = pytest.mark.benchmark
+
+
+def test_parse_many_flags_and_params(benchmark_report):
+    rules = synthetic_cli(flags=500, params=500)
+    args = [f'--flag-{i}' for i in range(0, 500, 5)] + [f'--param-{i}=value' for i in range(0, 500, 5)]
+    result = measure('parse/flags500-params500', lambda: Parser(rules).parse_args(args))
+    benchmark_report.add(result)
+
+
+def test_parse_deep_subcommands(benchmark_report):
+    rules = synthetic_cli(depth=6, breadth=3)
+    args = deepest_subcommand_path(6, 3) + ['--cmd-2-param-0', 'value']
+    result = measure('parse/subcommands-depth6', lambda: Parser(rules).parse_args(args))
+    benchmark_report.add(result)
+
+
+def test_parse_huge_arguments_list(benchmark_report):
+    rules = synthetic_cli(flags=10, params=10, many_arguments=True)
+    args = [f'path/to/file-{i}' for i in range(100_000)] + ['--flag-1', '--param-2', 'value']
+    result = measure('parse/arguments-100k', lambda: Parser(rules).parse_args(args), iterations=3)
+    benchmark_report.add(result)
+
+
+def test_help_many_rules(benchmark_report):
+    rules = synthetic_cli(flags=500, params=500, depth=4, breadth=4)
+    result = measure('help/flags500-params500-depth4',
+                     lambda: generate_help(rules, 'app', '1.0', 'synthetic', [], True))
+    benchmark_report.add(result)
+
+
+def test_help_deep_subcommand(benchmark_report):
+    rules = synthetic_cli(depth=6, breadth=3)
+    subargs = deepest_subcommand_path(6, 3)
+    result = measure('help/subcommands-depth6', lambda: generate_help(rules, 'app', '1.0', None, subargs, True))
+    benchmark_report.add(result)
+
+
+def test_autocomplete_many_rules(benchmark_report):
+    rules = synthetic_cli(flags=500, params=500, depth=4, breadth=4)
+    result = measure('autocomplete/flags500-params500',
+                     lambda: find_matching_completions('app --param-1', rules, None))
+    benchmark_report.add(result)
+
+
+def test_autocomplete_param_choices(benchmark_report):
+    rules = synthetic_cli(flags=500, params=500)
+    result = measure('autocomplete/param-choices',
+                     lambda: find_matching_completions('app --param-499 ', rules, None))
+    assert find_matching_completions('app --param-499 ', rules, None)[0] == 'choice-499-0'
+    benchmark_report.add(result)
+
+
+def test_autocomplete_deep_subcommand(benchmark_report):
+    rules = synthetic_cli(depth=6, breadth=3)
+    cmdline = ' '.join(['app'] + deepest_subcommand_path(6, 3)[:-1] + ['cmd-'])
+    result = measure('autocomplete/subcommands-depth6', lambda: find_matching_completions(cmdline, rules, None))
+    benchmark_report.add(result)
@@ -0,0 +1,27 @@
+import io
+import subprocess
+
+import pytest
+
+from nuclear import shell
+from .measure import measure
+
+pytestmark = pytest.mark.benchmark
+
+CHATTY_COMMAND = 'seq 500000'
+
+
+def readline_shell(cmd: str) -> str:
+    """Previous implementation of capturing output: readline and decode line by line"""
+    process = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    captured_stream = io.StringIO()
+    for line in iter(process.stdout.readline, b''):
+        captured_stream.write(line.decode())
+    process.wait()
+    return captured_stream.getvalue()
+
+
+def test_shell_chatty_command_throughput(benchmark_report):
+    assert shell(CHATTY_COMMAND) == readline_shell(CHATTY_COMMAND)
+    benchmark_report.add(measure('shell/seq500k-readline', lambda: readline_shell(CHATTY_COMMAND), iterations=3))
+    benchmark_report.add(measure('shell/seq500k-chunked', lambda: shell(CHATTY_COMMAND), iterations=3))
@@ -0,0 +1,6 @@
+def deploy(env: str, dry: bool = False, replicas: int = 1):
+    """
+    Deploy application
+    :param env: target environment
+    """
+    print(f'deploying to {env}: dry={dry}, replicas={replicas}')
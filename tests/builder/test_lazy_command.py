@@ -0,0 +1,58 @@
+import sys
+
+from nuclear import *
+from nuclear.cli.parser.error import CliDefinitionError
+from tests.asserts import MockIO, assert_error
+
+LAZY_MODULE = 'tests.builder.res.lazy_commands'
+
+
+def test_lazy_command_imported_only_when_used():
+    sys.modules.pop(LAZY_MODULE, None)
+    cli = CliBuilder()
+    cli.add_lazy_command('deploy', target=f'{LAZY_MODULE}:deploy', help='Deploy app')
+    cli.add_lazy_command('other', target=f'{LAZY_MODULE}.deploy')
+    assert LAZY_MODULE not in sys.modules
+
+    with MockIO('deploy', 'prod', '--replicas', '3') as mockio:
+        cli.run()
+        assert mockio.output() == 'deploying to prod: dry=False, replicas=3\n'
+    assert LAZY_MODULE in sys.modules
+
+
+def test_lazy_command_loader_called_once():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        from tests.builder.res.lazy_commands import deploy
+        return deploy
+
+    cli = CliBuilder(reuse_parser=True)
+    cli.add_lazy_command('app deploy', target=loader, help='Deploy app')
+    with MockIO() as mockio:
+        cli.run_with_args(['--help'])
+        assert not loads
+        mockio.assert_match(r'app deploy\s+- Deploy app')
+
+        cli.run_with_args(['app', 'deploy', 'dev', '--dry'])
+        cli.run_with_args(['app', 'deploy', 'dev'])
+        assert 'deploying to dev: dry=True, replicas=1' in mockio.output()
+        assert 'deploying to dev: dry=False, replicas=1' in mockio.output()
+    assert len(loads) == 1
+
+
+def test_lazy_command_loaded_for_help():
+    cli = CliBuilder()
+    cli.add_lazy_command('deploy', target=f'{LAZY_MODULE}:deploy')
+    with MockIO('--help', 'deploy') as mockio:
+        cli.run()
+        mockio.assert_match(r'--replicas REPLICAS\s+- Default: 1')
+        mockio.assert_match(r'ENV\s+- target environment')
+
+
+def test_lazy_command_not_found():
+    cli = CliBuilder(reraise_error=True)
+    cli.add_lazy_command('deploy', target=f'{LAZY_MODULE}:missing')
+    assert_error(lambda: cli.run_with_args(['deploy']), CliDefinitionError,
+                 f'failed to load command function "{LAZY_MODULE}:missing"')
@@ -0,0 +1,90 @@
+import os
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from nuclear.nuke.artifacts import LocalArtifactCache, TargetCache, config_values, parse_size
+from nuclear.nuke.config import NukeConfig
+from nuclear.nuke.incremental import inputs, outputs
+from nuclear.nuke.scheduler import TargetScheduler
+
+
+class Config(NukeConfig):
+    optimize: bool = True
+
+
+def _build_module(calls: list[str]):
+    @inputs('src/*.c')
+    @outputs('dist/*.o')
+    def build():
+        calls.append('build')
+        Path('dist').mkdir(exist_ok=True)
+        for source in Path('src').glob('*.c'):
+            (Path('dist') / f'{source.stem}.o').write_text(source.read_text().upper())
+    return SimpleNamespace(build=build)
+
+
+def test_outputs_restored_from_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path('src').mkdir()
+    Path('src/main.c').write_text('main')
+    Path('src/util.c').write_text('util')
+    calls = []
+    module = _build_module(calls)
+    backend = LocalArtifactCache(tmp_path / 'cache')
+
+    TargetScheduler(module, cache=TargetCache(backend, config=Config())).run(['build'])
+    assert calls == ['build']
+
+    shutil.rmtree('dist')  # e.g. fresh checkout on another CI agent
+    TargetScheduler(module, cache=TargetCache(backend, config=Config())).run(['build'])
+    assert calls == ['build']
+    assert Path('dist/main.o').read_text() == 'MAIN'
+    assert Path('dist/util.o').read_text() == 'UTIL'
+
+    Path('src/main.c').write_text('changed')
+    TargetScheduler(module, cache=TargetCache(backend, config=Config())).run(['build'])
+    assert calls == ['build', 'build']
+
+    config = Config()
+    config.optimize = False
+    TargetScheduler(module, cache=TargetCache(backend, config=config)).run(['build'])
+    assert calls == ['build', 'build', 'build']
+
+
+def test_least_recently_used_entries_evicted(tmp_path):
+    cache = LocalArtifactCache(tmp_path, max_size=250)
+    for index, key in enumerate(['aa01', 'bb02', 'cc03']):
+        with cache.save(key) as file:
+            file.write(b'x' * 100)
+        os.utime(tmp_path / key[:2] / f'{key}.tar', (1000 + index, 1000 + index))
+    assert cache.load('aa01') is None  # evicted when the third entry came in
+    assert cache.load('bb02') is not None  # used again, so it's the most recent one now
+
+    with cache.save('dd04') as file:
+        file.write(b'x' * 100)
+    assert cache.load('cc03') is None
+    assert cache.load('bb02') is not None
+    assert cache.load('dd04') is not None
+
+
+def test_config_values_include_inherited_fields():
+    assert config_values(Config()) == {'dry': False, 'optimize': True}
+
+
+def test_parse_size():
+    assert parse_size('1024') == 1024
+    assert parse_size('500M') == 500 * 1024 ** 2
+    assert parse_size('10g') == 10 * 1024 ** 3
+
+
+def test_failed_entry_not_stored(tmp_path):
+    cache = LocalArtifactCache(tmp_path)
+    with pytest.raises(RuntimeError):
+        with cache.save('aa01') as file:
+            file.write(b'partial')
+            raise RuntimeError('interrupted')
+    assert cache.load('aa01') is None
+    assert list(tmp_path.glob('*/*')) == []
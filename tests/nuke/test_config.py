@@ -1,4 +1,13 @@
-from nuclear.nuke.config import apply_overrides
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+import pytest
+
+from nuclear.nuke import config as config_module
+from nuclear.nuke.config import NukeConfig, apply_overrides, compile_converter, load_config
 
 
 class Config:
@@ -47,3 +56,82 @@ def test_apply_cli_overrides():
     assert config.bluey_offset == 10
     assert config.flag
     assert not config.truth
+
+
+@dataclass
+class Episode:
+    title: str
+    number: int
+    aired: Optional[datetime] = None
+
+
+@dataclass
+class Season:
+    episodes: list[Episode]
+    ratings: dict[str, float]
+
+
+def test_apply_overrides_with_inherited_and_nested_fields():
+    class Config(NukeConfig):
+        seasons: list[Season] = []
+        offset: int | None = None
+
+    config = apply_overrides(Config(), Config, {
+        'dry': 'true',
+        'offset': '3',
+        'seasons': [{
+            'episodes': [{'title': 'Magic Xylophone', 'number': '1', 'aired': '2018-10-01T00:00:00'}],
+            'ratings': '{"imdb": "8.5"}',
+        }],
+    })
+    assert config.dry
+    assert config.offset == 3
+    episode = config.seasons[0].episodes[0]
+    assert episode == Episode('Magic Xylophone', 1, datetime(2018, 10, 1, tzinfo=timezone.utc))
+    assert config.seasons[0].ratings == {'imdb': 8.5}
+
+
+def test_compiled_converters_are_reused():
+    assert compile_converter(list[Episode]) is compile_converter(list[Episode])
+    episodes = compile_converter(list[Episode])([{'title': f'{i}', 'number': i} for i in range(1000)])
+    assert episodes[999] == Episode('999', 999)
+
+    with pytest.raises(KeyError):
+        compile_converter(Episode)({'title': 'Bob Bilby', 'unknown': 1})
+    with pytest.raises(ValueError):
+        compile_converter(int | float)('1')
+
+
+def test_warn_about_fields_clashing_with_run_options(monkeypatch, tmp_path):
+    class Config(NukeConfig):
+        jobs: int = 1
+        output_dir: str = 'dist'
+
+    warnings = []
+    monkeypatch.setattr(config_module.logger, 'warn', lambda message, **ctx: warnings.append((message, ctx)))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('sys.argv', ['nuke', '--jobs=4', '--output-dir=build'])
+    config = load_config(Config)
+    assert config.jobs == 4
+    assert config.output_dir == 'build'
+    assert len(warnings) == 1
+    assert warnings[0][1] == {'fields': 'jobs'}
+
+
+def test_dataclass_converter_compiled_safely_by_concurrent_targets(monkeypatch):
+    compile_field = config_module.compile_converter
+
+    def slow_compile(field_type):
+        time.sleep(0.01)
+        return compile_field(field_type)
+
+    monkeypatch.setattr(config_module, 'compile_converter', slow_compile)
+    convert = config_module._dataclass_converter(Episode)
+
+    def convert_later(number: int) -> Episode:
+        time.sleep(number * 0.005)  # some targets come while the fields are still being compiled
+        return convert({'title': 'Bob Bilby', 'number': number})
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        episodes = list(executor.map(convert_later, range(8)))
+    assert episodes == [Episode('Bob Bilby', number) for number in range(8)]
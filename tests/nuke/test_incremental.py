@@ -0,0 +1,115 @@
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+from nuclear.nuke.incremental import BuildState, inputs, outputs, expand_paths
+from nuclear.nuke.scheduler import TargetScheduler
+
+
+def _set_mtime(path: Path, mtime: float):
+    os.utime(path, (mtime, mtime))
+
+
+def test_expand_paths_with_globs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path('src/lib').mkdir(parents=True)
+    Path('src/main.c').write_text('main')
+    Path('src/lib/util.c').write_text('util')
+    Path('src/lib/util.h').write_text('header')
+    assert expand_paths(('src/**/*.c',)) == [Path('src/lib/util.c'), Path('src/main.c')]
+    assert expand_paths(('src/lib',)) == [Path('src/lib/util.c'), Path('src/lib/util.h')]
+
+
+def test_target_skipped_when_outputs_are_newer(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calls = []
+
+    @inputs('src/*.c')
+    @outputs('dist/app')
+    def build():
+        calls.append('build')
+        Path('dist').mkdir(exist_ok=True)
+        Path('dist/app').write_text('binary')
+
+    Path('src').mkdir()
+    Path('src/main.c').write_text('main')
+    module = SimpleNamespace(build=build)
+
+    TargetScheduler(module, state=BuildState()).run(['build'])
+    TargetScheduler(module, state=BuildState()).run(['build'])
+    assert calls == ['build']
+
+    Path('src/main.c').write_text('changed')
+    _set_mtime(Path('src/main.c'), Path('dist/app').stat().st_mtime + 10)
+    TargetScheduler(module, state=BuildState()).run(['build'])
+    assert calls == ['build', 'build']
+
+    Path('dist/app').unlink()
+    TargetScheduler(module, state=BuildState()).run(['build'])
+    assert calls == ['build', 'build', 'build']
+
+
+def test_target_skipped_when_content_matches_manifest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calls = []
+
+    @inputs('input.txt')
+    @outputs('output.txt')
+    def convert():
+        calls.append('convert')
+        Path('output.txt').write_text(Path('input.txt').read_text().upper())
+
+    Path('input.txt').write_text('data')
+    module = SimpleNamespace(convert=convert)
+    TargetScheduler(module, state=BuildState()).run(['convert'])
+    assert Path('.nuke/manifest.json').is_file()
+
+    # touched, e.g. by a checkout, but the content is the same
+    _set_mtime(Path('input.txt'), Path('output.txt').stat().st_mtime + 10)
+    TargetScheduler(module, state=BuildState()).run(['convert'])
+    assert calls == ['convert']
+
+    Path('input.txt').write_text('new data')
+    _set_mtime(Path('input.txt'), Path('output.txt').stat().st_mtime + 10)
+    TargetScheduler(module, state=BuildState()).run(['convert'])
+    assert calls == ['convert', 'convert']
+    assert Path('output.txt').read_text() == 'NEW DATA'
+
+
+def test_target_without_outputs_always_runs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calls = []
+
+    @inputs('*.py')
+    def lint():
+        calls.append('lint')
+
+    module = SimpleNamespace(lint=lint)
+    TargetScheduler(module, state=BuildState()).run(['lint'])
+    TargetScheduler(module, state=BuildState()).run(['lint'])
+    assert calls == ['lint', 'lint']
+
+
+def test_target_with_unmatched_inputs_always_runs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calls = []
+
+    @inputs('src/*.c', 'Makefile')
+    @outputs('dist/app')
+    def build():
+        calls.append('build')
+        Path('dist').mkdir(exist_ok=True)
+        Path('dist/app').write_text('binary')
+
+    Path('src').mkdir()
+    Path('src/main.c').write_text('main')
+    module = SimpleNamespace(build=build)
+    TargetScheduler(module, state=BuildState()).run(['build'])
+    TargetScheduler(module, state=BuildState()).run(['build'])
+    assert calls == ['build', 'build']
+
+    Path('Makefile').write_text('build:')
+    _set_mtime(Path('Makefile'), Path('dist/app').stat().st_mtime - 10)
+    _set_mtime(Path('src/main.c'), Path('dist/app').stat().st_mtime - 10)
+    TargetScheduler(module, state=BuildState()).run(['build'])
+    assert calls == ['build', 'build']
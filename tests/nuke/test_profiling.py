@@ -0,0 +1,78 @@
+import json
+import sys
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from nuclear.nuke import invoke
+from nuclear.nuke.invoke import depends, _run_with_args
+from nuclear.nuke.profiling import Profiler
+from nuclear.nuke.scheduler import TargetScheduler
+from nuclear.nuke.shell import sh
+
+
+def test_profiler_measures_targets_and_commands():
+    runner = sh()
+
+    def build():
+        runner('sleep 0.05')
+    @depends('build')
+    def test():
+        time.sleep(0.02)
+    def lint(): pass
+
+    profiler = Profiler()
+    module = SimpleNamespace(build=build, test=test, lint=lint)
+    with patch('nuclear.nuke.profiling._active_profiler', profiler):
+        TargetScheduler(module, profiler=profiler).run(['test', 'lint'])
+
+    build_timing = profiler.targets['build']
+    assert build_timing.status == 'done'
+    assert [command.cmd for command in build_timing.commands] == ['sleep 0.05']
+    assert build_timing.shell_time >= 0.05
+    assert build_timing.wall_time >= build_timing.shell_time
+    assert profiler.targets['test'].wall_time >= 0.02
+    assert profiler.critical_path() == ['build', 'test']
+
+    summary = profiler.summary()
+    assert 'critical path: build -> test' in summary
+    assert summary.splitlines()[0].split() == ['target', 'status', 'wall', 'cpu', 'shell', 'commands']
+
+
+def test_export_chrome_trace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def build(): pass
+    build.__module__ = 'nukefile'
+    @depends('build')
+    def test(): pass
+    test.__module__ = 'nukefile'
+
+    module = SimpleNamespace(__name__='nukefile', build=build, test=test)
+    with patch.dict(sys.modules, {'__main__': module}):
+        _run_with_args(['--trace', 'trace.json', '--force', 'test'])
+
+    trace = json.loads((tmp_path / 'trace.json').read_text())
+    events = trace['traceEvents']
+    assert [event['name'] for event in events] == ['build', 'test']
+    assert all(event['ph'] == 'X' and event['cat'] == 'target' for event in events)
+    assert events[0]['ts'] <= events[1]['ts']
+
+
+def test_summary_logged_only_with_profile_option(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    messages = []
+    monkeypatch.setattr(invoke.logger, 'info', lambda message, **ctx: messages.append(message))
+
+    def build(): pass
+    build.__module__ = 'nukefile'
+
+    module = SimpleNamespace(__name__='nukefile', build=build)
+    with patch.dict(sys.modules, {'__main__': module}):
+        _run_with_args(['--force', 'build'])
+        assert not any('Profile of the targets' in message for message in messages)
+
+        _run_with_args(['--profile', '--force', 'build'])
+        summaries = [message for message in messages if 'Profile of the targets' in message]
+        assert len(summaries) == 1
+        assert 'build' in summaries[0]
@@ -0,0 +1,61 @@
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from nuclear.nuke import cli
+from nuclear.nuke.registry import find_nukefile, load_cached_target_names, save_target_names
+
+NUKEFILE = '''
+from pathlib import Path
+
+with open('imports.log', 'a') as log:
+    log.write('imported\\n')
+
+def build():
+    Path('built').write_text('ok')
+
+def test():
+    pass
+'''
+
+
+def test_find_nukefile_in_parent_directories(tmp_path):
+    (tmp_path / 'nukefile.py').write_text('')
+    nested = tmp_path / 'src' / 'module'
+    nested.mkdir(parents=True)
+    assert find_nukefile(nested) == tmp_path / 'nukefile.py'
+    assert find_nukefile(tmp_path) == tmp_path / 'nukefile.py'
+
+
+def test_cached_target_names_invalidated_on_change(tmp_path):
+    nukefile = tmp_path / 'nukefile.py'
+    nukefile.write_text('def build(): pass\n')
+    assert load_cached_target_names(nukefile) is None
+
+    save_target_names(nukefile, ['build'])
+    assert load_cached_target_names(nukefile) == ['build']
+
+    nukefile.write_text('def build(): pass\ndef test(): pass\n')
+    os.utime(nukefile, ns=(0, 0))
+    assert load_cached_target_names(nukefile) is None
+
+
+def test_run_nukefile_from_subdirectory(tmp_path, monkeypatch, capsys):
+    (tmp_path / 'nukefile.py').write_text(NUKEFILE)
+    nested = tmp_path / 'src'
+    nested.mkdir()
+    monkeypatch.chdir(nested)
+
+    with patch.object(sys, 'argv', ['nuke', 'build']):
+        cli.main()
+    assert (tmp_path / 'built').read_text() == 'ok'
+    assert Path.cwd() == tmp_path
+
+    # listing targets doesn't load the nukefile again
+    monkeypatch.chdir(nested)
+    capsys.readouterr()
+    with patch.object(sys, 'argv', ['nuke']):
+        cli.main()
+    assert capsys.readouterr().out.split() == ['build', 'test']
+    assert (tmp_path / 'imports.log').read_text() == 'imported\n'
@@ -0,0 +1,90 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from nuclear.nuke.invoke import RunOptions, depends, parse_run_options
+from nuclear.nuke.scheduler import TargetScheduler, build_target_graph
+
+
+def test_build_graph_orders_dependencies_first():
+    @depends('build', 'lint')
+    def test(): pass
+    @depends('clean')
+    def build(): pass
+    def clean(): pass
+    def lint(): pass
+
+    module = SimpleNamespace(test=test, build=build, clean=clean, lint=lint)
+    graph = build_target_graph(module, ['test'])
+    assert list(graph) == ['clean', 'build', 'lint', 'test']
+    assert graph['test'] == ['build', 'lint']
+
+
+def test_build_graph_detects_cycles():
+    @depends('b')
+    def a(): pass
+    @depends('c')
+    def b(): pass
+    @depends('a')
+    def c(): pass
+
+    with pytest.raises(ValueError) as excinfo:
+        build_target_graph(SimpleNamespace(a=a, b=b, c=c), ['a'])
+    assert 'a -> b -> c -> a' in str(excinfo.value)
+
+
+def test_independent_targets_run_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    calls = []
+
+    def build(): calls.append('build')
+    @depends('build')
+    def test():
+        barrier.wait()
+        calls.append('test')
+    @depends('build')
+    def lint():
+        barrier.wait()
+        calls.append('lint')
+
+    module = SimpleNamespace(build=build, test=test, lint=lint)
+    TargetScheduler(module, jobs=2).run(['test', 'lint'])
+    assert calls[0] == 'build'
+    assert sorted(calls[1:]) == ['lint', 'test']
+
+
+def test_failed_target_cancels_downstream_targets():
+    calls = []
+
+    def build():
+        calls.append('build')
+        raise RuntimeError('build failed')
+    @depends('build')
+    def test(): calls.append('test')
+    def lint(): calls.append('lint')
+
+    executed = set()
+    module = SimpleNamespace(build=build, test=test, lint=lint)
+    with pytest.raises(RuntimeError):
+        TargetScheduler(module, jobs=4, executed=executed).run(['test', 'lint'])
+    assert 'test' not in calls
+    assert 'build' not in executed
+
+
+def test_parse_run_options():
+    options, args = parse_run_options(['-j', '8', 'build', '--dry', 'test'])
+    assert options.jobs == 8
+    assert args == ['build', '--dry', 'test']
+    assert parse_run_options(['-j4'])[0].jobs == 4
+    assert parse_run_options(['--jobs=2', 'lint']) == (parse_run_options(['--jobs', '2'])[0], ['lint'])
+    assert parse_run_options(['build'])[0].jobs == 1
+    assert parse_run_options(['-json', '-jvm-opts', 'build']) == (RunOptions(), ['-json', '-jvm-opts', 'build'])
+
+
+def test_config_fields_take_precedence_over_run_options():
+    options, args = parse_run_options(['--force=1', '--jobs', '2', 'build', '--watch'], config_fields={'force'})
+    assert not options.force
+    assert options.jobs == 2
+    assert options.watch
+    assert args == ['--force=1', 'build']
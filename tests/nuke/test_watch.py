@@ -0,0 +1,99 @@
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import backoff
+
+from nuclear.nuke.incremental import inputs
+from nuclear.nuke.invoke import depends
+from nuclear.nuke.watch import InotifyWatcher, PollingWatcher, TargetWatcher, pattern_matches
+from nuclear.shell import BackgroundCommand
+
+
+def test_pattern_matches():
+    assert pattern_matches('src/*.c', Path('src/main.c'))
+    assert not pattern_matches('src/*.c', Path('src/lib/util.c'))
+    assert pattern_matches('src/**/*.c', Path('src/lib/util.c'))
+    assert pattern_matches('src/**/*.c', Path('src/main.c'))
+    assert pattern_matches('src', Path('src/lib/util.h'))
+    assert pattern_matches('./Makefile', Path('Makefile'))
+    assert not pattern_matches('src/*.c', Path('tests/main.c'))
+
+
+def test_affected_targets_include_dependents():
+    @inputs('src/**/*.c')
+    def build(): pass
+    @depends('build')
+    @inputs('tests/*.py')
+    def test(): pass
+    @inputs('docs/*.md')
+    def docs(): pass
+
+    module = SimpleNamespace(build=build, test=test, docs=docs)
+    watcher = TargetWatcher(module, ['test', 'docs'])
+    assert watcher.affected_targets({Path('src/lib/util.c')}) == {'build', 'test'}
+    assert watcher.affected_targets({Path('tests/test_util.py')}) == {'test'}
+    assert watcher.affected_targets({Path('docs/index.md')}) == {'docs'}
+    assert watcher.affected_targets({Path('.nuke/manifest.json'), Path('README.md')}) == set()
+
+
+def test_watchers_detect_changes(tmp_path):
+    (tmp_path / 'src').mkdir()
+    for watcher in [InotifyWatcher([tmp_path]), PollingWatcher([tmp_path], interval=0.05)]:
+        (tmp_path / 'src' / 'main.c').write_text(f'version {watcher}')
+        (tmp_path / 'new_dir').mkdir(exist_ok=True)
+        changes = set()
+        deadline = time.monotonic() + 5
+        while tmp_path / 'src' / 'main.c' not in changes and time.monotonic() < deadline:
+            changes |= watcher.poll(0.1)
+        watcher.close()
+        assert tmp_path / 'src' / 'main.c' in changes, type(watcher).__name__
+
+
+def test_watch_restarts_affected_targets(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path('src').mkdir()
+    Path('src/main.c').write_text('v1')
+    Path('docs').mkdir()
+    calls = []
+    servers: list[BackgroundCommand] = []
+
+    @inputs('src/*.c')
+    def build():
+        calls.append('build')
+    @depends('build')
+    @inputs('src/*.c')
+    def serve():
+        calls.append('serve')
+        servers.append(BackgroundCommand('sleep 30'))
+    @inputs('docs/*.md')
+    def docs():
+        calls.append('docs')
+
+    module = SimpleNamespace(build=build, serve=serve, docs=docs)
+    watcher = TargetWatcher(module, ['serve', 'docs'], debounce=0.1)
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    thread.start()
+
+    @backoff.on_exception(backoff.expo, AssertionError, factor=0.1, max_value=0.5, max_time=10, jitter=None)
+    def wait_for_first_run():
+        assert sorted(calls) == ['build', 'docs', 'serve']
+    wait_for_first_run()
+    time.sleep(0.2)
+
+    Path('src/main.c').write_text('v2')
+    Path('src/main.c').write_text('v3')
+
+    @backoff.on_exception(backoff.expo, AssertionError, factor=0.1, max_value=0.5, max_time=10, jitter=None)
+    def wait_for_restart():
+        assert len(servers) == 2
+        assert servers[1].is_running
+    wait_for_restart()
+    assert not servers[0].is_running
+    assert sorted(calls) == ['build', 'build', 'docs', 'serve', 'serve']
+
+    watcher.stop()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert not servers[1].is_running
@@ -1,5 +1,9 @@
-from nuclear import parameter
-from nuclear.cli.parser.value import generate_value_choices
+import time
+
+from nuclear import CliBuilder, argument, parameter, subcommand
+from nuclear.cli.parser import choices as choices_module
+from nuclear.cli.parser.choices import CachedChoices
+from nuclear.cli.parser.value import generate_value_choices, generate_choice_set
 
 
 def test_generate_choices_from_list():
@@ -30,3 +34,96 @@ def test_generate_choices_from_callable():
         return ['val', '2']
 
     assert generate_value_choices(parameter('key', choices=provide)) == ['val', '2']
+
+
+def test_callable_choices_are_memoized_per_current_word():
+    calls = []
+
+    def provide(current):
+        calls.append(current)
+        return [f'{current}1', f'{current}2']
+
+    rule = parameter('key', choices=provide, choices_ttl=60)
+    assert generate_value_choices(rule, current='a') == ['a1', 'a2']
+    assert generate_value_choices(rule, current='a') == ['a1', 'a2']
+    assert generate_value_choices(rule, current='b') == ['b1', 'b2']
+    assert calls == ['a', 'b']
+
+
+def test_choices_without_ttl_not_remembered_between_runs():
+    calls = []
+    available = ['dev']
+
+    def provide():
+        calls.append(1)
+        return list(available)
+
+    cli = CliBuilder(reuse_parser=True, reraise_error=True).has(
+        subcommand('deploy', run=lambda env: None).has(
+            argument('env', choices=provide, strict_choices=True),
+        ),
+    )
+    cli.run_with_args(['deploy', 'dev'])
+    assert len(calls) == 1
+    available.append('prod')
+    cli.run_with_args(['deploy', 'prod'])
+    assert len(calls) == 2
+
+
+def test_provider_signature_inspected_once(monkeypatch):
+    inspected = []
+    getfullargspec = choices_module.inspect.getfullargspec
+    monkeypatch.setattr(choices_module.inspect, 'getfullargspec',
+                        lambda function: inspected.append(function) or getfullargspec(function))
+
+    def provide(current):
+        return [f'{current}1', f'{current}2']
+
+    rule = parameter('key', choices=provide)
+    for current in ['a', 'b', 'a']:
+        assert generate_value_choices(rule, current) == [f'{current}1', f'{current}2']
+    assert inspected == [provide]
+
+
+def test_memoized_choices_expire():
+    calls = []
+
+    def provide():
+        calls.append(1)
+        return ['val']
+
+    rule = parameter('key', choices=provide, choices_ttl=0.05)
+    generate_value_choices(rule)
+    generate_value_choices(rule)
+    assert len(calls) == 1
+    time.sleep(0.06)
+    generate_value_choices(rule)
+    assert len(calls) == 2
+
+    uncached = parameter('key', choices=provide, choices_ttl=0)
+    generate_value_choices(uncached)
+    generate_value_choices(uncached)
+    assert len(calls) == 4
+
+
+def test_least_recently_used_choices_evicted():
+    calls = []
+
+    def provide(current):
+        calls.append(current)
+        return [current]
+
+    choices = CachedChoices(provide, max_size=2)
+    choices(current='a')
+    choices(current='b')
+    choices(current='a')
+    choices(current='c')  # evicts 'b'
+    choices(current='a')
+    choices(current='b')
+    assert calls == ['a', 'b', 'c', 'b']
+
+
+def test_choice_set():
+    assert generate_choice_set(parameter('key', choices=['1', '2'])) == frozenset({'1', '2'})
+    assert generate_choice_set(parameter('key', choices=lambda: ['1'])) == frozenset({'1'})
+    assert generate_choice_set(parameter('key', choices=[['unhashable']])) is None
@@ -0,0 +1,46 @@
+from nuclear import *
+from nuclear.cli.parser.rule_table import RuleTable
+from nuclear.cli.parser.transform import normalize_keywords
+
+
+def test_keyword_lookup_by_rule_type():
+    rules = [
+        flag('f', 'force'),
+        parameter('name'),
+        dictionary('c', 'config'),
+        primary_option('--version'),
+        subcommand('run'),
+    ]
+    normalize_keywords(rules[:3])
+    table = RuleTable(rules)
+    assert table.find_flag('--force') is rules[0]
+    assert table.find_flag('--name') is None
+    assert table.find_param('--name') == (rules[1], None)
+    assert table.find_dict('-c') is rules[2]
+    assert table.find_primary_option('--version') is rules[3]
+    assert table.find_subcommand('run') is rules[4]
+    assert table.find_subcommand('--force') is None
+
+
+def test_param_inline_value_is_split():
+    rules = [parameter('name'), parameter('n')]
+    normalize_keywords(rules)
+    table = RuleTable(rules)
+    assert table.find_param('--name=a=b') == (rules[0], 'a=b')
+    assert table.find_param('-n=') == (rules[1], '')
+    assert table.find_param('--nam=value') == (None, None)
+
+
+def test_combined_flags():
+    rules = [flag('a'), flag('b'), flag('long')]
+    normalize_keywords(rules)
+    table = RuleTable(rules)
+    assert table.find_combined_flags('-ab') == [rules[0], rules[1]]
+    assert table.find_combined_flags('-abc') == []
+    assert table.find_combined_flags('--long') == []
+
+
+def test_first_rule_takes_precedence():
+    rules = [flag('--dup', help='first'), flag('--dup', help='second')]
+    table = RuleTable(rules)
+    assert table.find_flag('--dup').help == 'first'
@@ -36,3 +36,52 @@ def test_run_selected_subcommand():
             subcommand('nmcli', run=print_bad),
         ).run()
         assert mockio.output() == 'ok\n'
+
+
+def test_reused_parser_has_fresh_state():
+    def print_names(names):
+        print(','.join(names))
+
+    cli = CliBuilder(reuse_parser=True).has(
+        subcommand('run', run=print_names).has(
+            parameter('names', multiple=True, default=['default']),
+        ),
+    )
+    with MockIO() as mockio:
+        cli.run_with_args(['run', '--names', 'a'])
+        cli.run_with_args(['run', '--names', 'b'])
+        cli.run_with_args(['run'])
+        assert mockio.output() == 'default,a\ndefault,b\ndefault\n'
+
+
+def test_reused_parser_recompiled_after_adding_rules():
+    cli = CliBuilder(reuse_parser=True)
+    with MockIO() as mockio:
+        cli.run_with_args([])
+
+        @cli.add_command('greet')
+        def greet(name: str):
+            print(f'hello {name}')
+
+        cli.run_with_args(['greet', 'world'])
+        assert 'hello world' in mockio.output()
+
+
+def test_reused_parser_compiled_once(monkeypatch):
+    from nuclear.cli.builder import builder
+    compiled = []
+    original_level = builder.ParserLevel
+
+    def counting_level(*args, **kwargs):
+        compiled.append(args)
+        return original_level(*args, **kwargs)
+
+    monkeypatch.setattr(builder, 'ParserLevel', counting_level)
+    cli = CliBuilder(reuse_parser=True).has(
+        subcommand('run', run=lambda: None).has(
+            parameter('count', type=int),
+        ),
+    )
+    for _ in range(5):
+        cli.run_with_args(['run', '--count', '1'])
+    assert len(compiled) == 1
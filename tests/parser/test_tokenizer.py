@@ -0,0 +1,68 @@
+from typing import List
+
+from nuclear import *
+from nuclear.cli.parser.rule_table import RuleTable
+from nuclear.cli.parser.tokenizer import tokenize_args, FlagToken, ParamToken, DictToken
+from nuclear.cli.parser.transform import normalize_keywords
+from tests.asserts import MockIO, assert_cli_error
+
+
+def _table(*rules) -> RuleTable:
+    normalize_keywords([r for r in rules if hasattr(r, 'keywords')])
+    return RuleTable(list(rules))
+
+
+def test_tokenize_options_in_single_pass():
+    table = _table(flag('f'), parameter('name'), dictionary('c'), primary_option('--version'))
+    tokenized = tokenize_args(table, ['pos1', '--name', 'val', '-c', 'k', 'v', 'pos2', '-f', '--version', 'pos3'])
+    assert tokenized.options == [
+        ParamToken(table.params['--name'], ['val']),
+        DictToken(table.dicts['-c'], ['k', 'v']),
+        FlagToken([table.flags['-f']]),
+    ]
+    assert tokenized.primary_option is table.primary_options['--version']
+    assert tokenized.remaining == ['pos1', 'pos2', 'pos3']
+
+
+def test_flag_takes_precedence_over_param_value():
+    table = _table(flag('f'), parameter('name'))
+    tokenized = tokenize_args(table, ['--name', '-f', 'val'])
+    assert tokenized.options == [
+        FlagToken([table.flags['-f']]),
+        ParamToken(table.params['--name'], ['val']),
+    ]
+
+
+def test_missing_values_at_the_end():
+    table = _table(parameter('name'), dictionary('c'))
+    assert_cli_error(lambda: tokenize_args(table, ['--name']), 'missing value argument for parameter')
+    assert_cli_error(lambda: tokenize_args(table, ['-c']), 'missing key argument for dictionary')
+    assert_cli_error(lambda: tokenize_args(table, ['-c', 'k']), 'missing value argument for dictionary')
+
+
+def test_options_after_positionals_and_subcommand():
+    def print_it(files: List[str], verbose: bool, name: str):
+        print(f'{len(files)} {verbose} {name}')
+
+    with MockIO('run', 'a', '--verbose', 'b', '--name', 'x', 'c') as mockio:
+        CliBuilder().has(
+            flag('verbose'),
+            subcommand('run', run=print_it).has(
+                parameter('name'),
+                arguments('files'),
+            ),
+        ).run()
+        assert mockio.output() == '3 True x\n'
+
+
+def test_huge_arguments_list():
+    def count_files(files: List[str], v: bool):
+        print(f'{len(files)} {files[-1]} {v}')
+
+    files = [f'file{i}' for i in range(100_000)]
+    with MockIO(*files, '-v') as mockio:
+        CliBuilder(run=count_files).has(
+            flag('v'),
+            arguments('files'),
+        ).run()
+        assert mockio.output() == '100000 file99999 True\n'
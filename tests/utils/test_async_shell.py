@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import pytest
+
+from nuclear.shell import ashell, AsyncBackgroundCommand, CommandError, SpillToFile
+from nuclear.shell.shell_utils import CommandTimeout
+
+
+def test_ashell_output():
+    assert asyncio.run(ashell('echo test; echo żółć')) == 'test\nżółć\n'
+
+
+def test_ashell_error():
+    with pytest.raises(CommandError) as exc_info:
+        asyncio.run(ashell('echo bad; exit 3'))
+    assert exc_info.value.return_code == 3
+    assert exc_info.value.stdout == 'bad\n'
+
+
+def test_ashell_runs_concurrently():
+    async def run_all():
+        return await asyncio.gather(*[ashell(f'sleep 0.5; echo {i}') for i in range(20)])
+
+    start = time.time()
+    assert asyncio.run(run_all()) == [f'{i}\n' for i in range(20)]
+    assert time.time() - start < 3
+
+
+def test_ashell_timeout_kills_process_group():
+    start = time.time()
+    with pytest.raises(CommandTimeout) as exc_info:
+        asyncio.run(ashell('echo started; sleep 10; echo finished', timeout=0.5))
+    assert time.time() - start < 5
+    assert exc_info.value.stdout == 'started\n'
+    assert 'timed out after 0.5s' in str(exc_info.value)
+
+
+def test_ashell_cancellation():
+    async def cancel_soon():
+        task = asyncio.ensure_future(ashell('sleep 10; echo finished'))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    start = time.time()
+    asyncio.run(cancel_soon())
+    assert time.time() - start < 5
+
+
+def test_async_background_command_iteration():
+    async def collect():
+        live_lines = []
+        cmd = AsyncBackgroundCommand('for i in 1 2 3; do echo $i; sleep 0.1; done', on_next_line=live_lines.append)
+        await cmd.start()
+        lines = [line async for line in cmd]
+        await cmd.wait()
+        return lines, live_lines, cmd
+
+    lines, live_lines, cmd = asyncio.run(collect())
+    assert lines == ['1\n', '2\n', '3\n']
+    assert live_lines == ['1\n', '2\n', '3\n']
+    assert cmd.stdout == '1\n2\n3\n'
+    assert not cmd.is_running
+
+
+def test_async_background_command_terminate():
+    async def run_and_terminate():
+        async with AsyncBackgroundCommand('echo running; sleep 10; sleep 10') as cmd:
+            assert cmd.is_running
+            await asyncio.sleep(0.2)
+        return cmd
+
+    start = time.time()
+    cmd = asyncio.run(run_and_terminate())
+    assert not cmd.is_running
+    assert cmd.stdout == 'running\n'
+    assert time.time() - start < 5
+
+
+def test_async_background_command_error():
+    errors = []
+
+    async def run():
+        cmd = await AsyncBackgroundCommand('exit 2', on_error=errors.append).start()
+        await cmd.wait()
+
+    asyncio.run(run())
+    assert errors[0].return_code == 2
+
+
+def test_async_background_command_closes_retention():
+    retention = SpillToFile()
+
+    async def run():
+        cmd = AsyncBackgroundCommand('seq 1 3', retention=retention)
+        await cmd.start()
+        await cmd.wait()
+        return cmd
+
+    cmd = asyncio.run(run())
+    assert retention._file.closed
+    assert cmd.stdout == '1\n2\n3\n'
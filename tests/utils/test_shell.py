@@ -1,10 +1,18 @@
 from pathlib import Path
+import gc
+import os
+import tempfile
 import time
 
 import backoff
+import pytest
 
-from nuclear import shell, CommandError
-from nuclear.shell import BackgroundCommand
+from nuclear import shell, shell_stream, CommandError
+from nuclear.shell import BackgroundCommand, KeepNothing, KeepLastLines, KeepLastBytes, OutputRetention, SpillToFile
+from nuclear.shell import shell_utils
+from nuclear.shell.output_reader import LineDecoder, OutputReader
+from nuclear.shell.process_tree import descendant_pids
+from nuclear.shell.shell_utils import OutputTail, CommandTimeout
 from tests.asserts import assert_error
 
 
@@ -96,3 +104,230 @@ def test_background_command_failed():
     cmd.wait()
     assert not cmd.is_running
     assert 'command failed: shiiiiit' in str(error)
+
+
+def test_shell_stream_lines():
+    lines = list(shell_stream('echo one; echo żółć'))
+    assert lines == ['one\n', 'żółć\n']
+
+
+def test_shell_stream_chunks():
+    chunks = list(shell_stream('seq 10000', chunk_size=4096))
+    assert all(len(chunk) <= 4096 for chunk in chunks)
+    assert b''.join(chunks).decode().splitlines() == [str(i) for i in range(1, 10001)]
+
+
+def test_shell_stream_error_contains_output_tail():
+    try:
+        for _ in shell_stream('seq 1000; exit 3', tail_lines=2):
+            pass
+        assert False, 'should fail'
+    except CommandError as e:
+        assert e.return_code == 3
+        assert e.stdout == '999\n1000\n'
+
+
+def test_shell_stream_kills_process_when_stopped():
+    stream = shell_stream('echo started; sleep 10')
+    test_start = time.time()
+    assert next(stream) == 'started\n'
+    stream.close()
+    assert time.time() - test_start <= 5, 'process has not been killed'
+
+
+def test_output_tail_keeps_last_lines():
+    tail = OutputTail(2)
+    tail.write('a\nb')
+    tail.write('c\nd\ne')
+    assert tail.getvalue() == 'bc\nd\ne'
+
+
+def test_output_tail_splits_only_on_newlines():
+    tail = OutputTail(2)
+    tail.write('progress 10%\rprogress 100%\r')
+    tail.write('\nform\x0cfeed\r')
+    tail.write('\nlast')
+    assert tail.getvalue() == 'progress 10%\rprogress 100%\r\nform\x0cfeed\r\nlast'
+
+    tail = OutputTail(3)
+    tail.write('a\nb\x1cc\u2028d\n')
+    assert tail.getvalue() == 'a\nb\x1cc\u2028d\n'
+
+
+def test_output_reader_decodes_characters_split_between_chunks():
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, 'żółć\nzażółć\ngęślą'.encode())
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as stream:
+        lines = list(OutputReader(stream, chunk_size=3).lines())
+    assert lines == ['żółć\n', 'zażółć\n', 'gęślą']
+
+
+def test_line_decoder_joins_line_spanning_many_chunks():
+    decoder = LineDecoder()
+    assert [decoder.decode(b'a' * 4) for _ in range(3)] == ['', '', '']
+    assert decoder.decode(b'b\ncd\ne') == 'a' * 12 + 'b\ncd\n'
+    assert decoder.decode(b'f') == ''
+    assert decoder.finish() == 'ef'
+    assert decoder.finish() == ''
+
+
+def test_shell_timeout_terminates_process_tree():
+    test_start = time.time()
+    try:
+        shell('echo started; sleep 10 & sleep 10; wait', timeout=0.5, timeout_grace=1)
+        assert False, 'should time out'
+    except CommandTimeout as e:
+        assert e.stdout == 'started\n'
+        assert 0.5 <= e.duration < 5
+        assert 'command timed out after 0.5s' in str(e)
+    assert time.time() - test_start < 5, 'subprocesses have not been terminated'
+
+
+def test_shell_timeout_escalates_to_kill():
+    test_start = time.time()
+    try:
+        shell('trap "" TERM; sleep 10', timeout=0.3, timeout_grace=0.3)
+        assert False, 'should time out'
+    except CommandTimeout:
+        pass
+    assert time.time() - test_start < 5, 'subprocess ignoring SIGTERM has not been killed'
+
+
+def test_command_error_reports_elapsed_time():
+    try:
+        shell('sleep 0.2; exit 4')
+        assert False, 'should fail'
+    except CommandError as e:
+        assert e.duration >= 0.2
+        assert 'exit code 4 after' in str(e)
+
+
+def test_shell_without_timeout_stays_in_caller_session():
+    session_cmd = 'python3 -c "import os; print(os.getsid(0))"'
+    assert shell(session_cmd).strip() == str(os.getsid(0))
+    assert shell(session_cmd, timeout=10).strip() != str(os.getsid(0))
+
+
+def test_shell_timeout_in_terminal_walks_process_tree(monkeypatch):
+    monkeypatch.setattr(shell_utils, '_is_terminal_attached', lambda: True)
+    test_start = time.time()
+    try:
+        shell('sleep 10 & sleep 10; wait', timeout=0.5, timeout_grace=1)
+        assert False, 'should time out'
+    except CommandTimeout:
+        pass
+    assert time.time() - test_start < 5, 'subprocesses have not been terminated'
+
+
+def test_background_command_retention_policies():
+    script = 'for i in $(seq 1 1000); do echo line-$i; done'
+    expected = ''.join(f'line-{i}\n' for i in range(1, 1001))
+
+    policies = {
+        'nothing': (KeepNothing(), ''),
+        'lines': (KeepLastLines(3), 'line-998\nline-999\nline-1000\n'),
+        'bytes': (KeepLastBytes(10), 'line-1000\n'[-10:]),
+        'file': (SpillToFile(), expected),
+    }
+    for name, (retention, retained) in policies.items():
+        cmd = BackgroundCommand(script, retention=retention)
+        cmd.wait()
+        assert cmd.stdout == retained, name
+
+
+def test_background_command_error_reports_retained_output(tmp_path):
+    errors = []
+    cmd = BackgroundCommand('seq 1 100; exit 3', on_error=errors.append, retention=KeepLastLines(2))
+    cmd.wait()
+    assert errors[0].stdout == '99\n100\n'
+    assert errors[0].return_code == 3
+
+    log_file = tmp_path / 'output.log'
+    cmd = BackgroundCommand('echo żółć', retention=SpillToFile(log_file))
+    cmd.wait()
+    assert cmd.stdout == 'żółć\n'
+    assert log_file.read_text() == 'żółć\n'
+
+
+def test_spilled_output_file_closed_when_command_finishes(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    cmd = BackgroundCommand('seq 1 3', retention=SpillToFile())
+    cmd.wait()
+    assert not [path for path in _open_file_paths() if path.startswith(str(tmp_path))]
+    assert cmd.stdout == '1\n2\n3\n'
+
+    del cmd
+    gc.collect()
+    assert list(tmp_path.iterdir()) == []
+
+    with pytest.raises(TypeError):
+        OutputRetention()
+
+
+def _open_file_paths() -> list[str]:
+    paths = []
+    for fd_path in Path('/proc/self/fd').iterdir():
+        try:
+            paths.append(os.readlink(fd_path))
+        except OSError:
+            pass  # closed in the meantime
+    return paths
+
+
+def test_background_command_streams_stderr_separately():
+    stdout_lines, stderr_lines = [], []
+    cmd = BackgroundCommand(
+        'echo out; echo err >&2; echo out2',
+        on_next_line=stdout_lines.append,
+        on_next_stderr_line=stderr_lines.append,
+    )
+    cmd.wait()
+    assert stdout_lines == ['out\n', 'out2\n']
+    assert stderr_lines == ['err\n']
+    assert cmd.stdout == 'out\nout2\n'
+    assert cmd.stderr == 'err\n'
+
+
+def test_background_command_with_chatty_stderr_does_not_block():
+    cmd = BackgroundCommand('yes 0123456789 | head -n 100000 >&2; echo done',
+                            print_stderr=False, stderr_retention=KeepLastLines(1))
+    assert cmd.wait(timeout=10)
+    assert not cmd.is_running
+    assert cmd.stdout == 'done\n'
+    assert cmd.stderr == '0123456789\n'
+
+
+def test_background_command_terminates_whole_process_tree():
+    cmd = BackgroundCommand('bash -c "bash -c \'sleep 30; echo leaked\' & wait" & wait')
+    time.sleep(0.2)
+    descendants = descendant_pids(cmd._process.pid)
+    assert len(descendants) >= 3
+    cmd.terminate()
+    assert not cmd.is_running
+    for pid in descendants:
+        stat_file = Path(f'/proc/{pid}/stat')
+        assert not stat_file.exists() or ') Z ' in stat_file.read_text(), 'descendant process survived'
+
+
+def test_background_command_killed_after_graceful_timeout():
+    cmd = BackgroundCommand('trap "" TERM; echo ready; while true; do sleep 0.1; done')
+
+    @backoff.on_exception(backoff.expo, AssertionError, factor=0.1, max_value=0.5, max_time=5, jitter=None)
+    def check():
+        assert cmd.stdout == 'ready\n'
+    check()
+
+    test_start = time.time()
+    cmd.terminate(timeout=0.5)
+    assert not cmd.is_running
+    assert 0.5 <= time.time() - test_start < 3
+
+
+def test_terminate_many_background_commands():
+    cmds = [BackgroundCommand('sleep 30') for _ in range(100)]
+    test_start = time.time()
+    for cmd in cmds:
+        cmd.terminate()
+    assert not any(cmd.is_running for cmd in cmds)
+    assert time.time() - test_start < 5
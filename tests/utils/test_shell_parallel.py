@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from nuclear.nuke import sh
+from nuclear.shell import shell_many, CommandError, ParallelCommandError
+
+
+def test_commands_run_concurrently():
+    start = time.time()
+    results = shell_many([f'sleep 0.5; echo {i}' for i in range(4)], max_workers=4)
+    assert time.time() - start < 1.5
+    assert [result.stdout for result in results] == ['0\n', '1\n', '2\n', '3\n']
+    assert all(result.return_code == 0 and result.duration >= 0.5 for result in results)
+
+
+def test_collect_all_failures():
+    with pytest.raises(ParallelCommandError) as exc_info:
+        shell_many(['echo ok', 'echo bad; exit 2', 'exit 3'], max_workers=2)
+    error = exc_info.value
+    assert isinstance(error, CommandError)
+    assert [result.cmd for result in error.failed] == ['echo bad; exit 2', 'exit 3']
+    assert len(error.results) == 3
+    assert error.return_code == 2
+    assert '2 of 3 commands failed' in str(error)
+    assert 'bad\n' in error.stdout
+
+
+def test_fail_fast_kills_remaining_commands():
+    start = time.time()
+    with pytest.raises(ParallelCommandError) as exc_info:
+        shell_many(['exit 1', 'sleep 10', 'sleep 10', 'sleep 10'], max_workers=2, fail_fast=True)
+    assert time.time() - start < 5
+    assert [result.cmd for result in exc_info.value.failed] == ['exit 1']
+
+
+def test_prefixed_live_output(capsys):
+    shell_many(['echo one; echo two', 'echo three'], print_stdout=True)
+    lines = capsys.readouterr().out.splitlines()
+    assert sorted(lines) == ['[echo one; echo two] one', '[echo one; echo two] two', '[echo three] three']
+
+
+def test_shell_runner_map():
+    results = sh().map(['echo 1', 'echo 2'])
+    assert [result.stdout for result in results] == ['1\n', '2\n']
+    assert sh(dry=True).map(['exit 1'])[0].return_code == 0
+
+
+def test_fail_fast_reports_commands_finished_on_their_own():
+    with pytest.raises(ParallelCommandError) as exc_info:
+        shell_many(['echo done', 'sleep 0.3; exit 1', 'sleep 10'], max_workers=3, fail_fast=True)
+    assert [result.cmd for result in exc_info.value.results] == ['echo done', 'sleep 0.3; exit 1']
+
+
+def test_commands_timeout():
+    start = time.time()
+    with pytest.raises(ParallelCommandError) as exc_info:
+        sh(timeout=0.3).map(['echo fast', 'sleep 10'])
+    assert time.time() - start < 5
+    assert [result.cmd for result in exc_info.value.failed] == ['sleep 10']
+    assert exc_info.value.failed[0].timed_out
+    assert 'sleep 10 (timed out)' in str(exc_info.value)
+
+
+def test_shell_runner_map_rejects_unsupported_options():
+    with pytest.raises(ValueError, match='raw_output'):
+        sh(raw_output=True).map(['echo 1'])
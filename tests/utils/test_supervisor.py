@@ -0,0 +1,111 @@
+import os
+import signal
+import subprocess
+import threading
+import time
+
+from nuclear.shell import BackgroundCommand
+from nuclear.shell import supervisor as supervisor_module
+from nuclear.shell.supervisor import ProcessSupervisor
+
+
+def test_many_background_commands_share_threads():
+    threads_before = threading.active_count()
+    cmds = [BackgroundCommand(f'for i in 1 2 3; do echo {n}-$i; sleep 0.05; done') for n in range(50)]
+    assert threading.active_count() - threads_before <= 5
+    for n, cmd in enumerate(cmds):
+        cmd.wait()
+        assert cmd.stdout == f'{n}-1\n{n}-2\n{n}-3\n'
+        assert not cmd.is_running
+
+
+def test_callbacks_keep_output_order():
+    lines = []
+    cmd = BackgroundCommand('seq 20000', on_next_line=lines.append)
+    cmd.wait()
+    assert lines == [f'{i}\n' for i in range(1, 20001)]
+
+
+def test_exit_tracked_without_pidfd(monkeypatch):
+    monkeypatch.setattr(supervisor_module, '_open_pidfd', lambda pid: None)
+    supervisor = ProcessSupervisor(workers=1)
+    exit_codes = []
+    outputs = []
+    process = subprocess.Popen('echo done; exit 3', shell=True, stdout=subprocess.PIPE)
+    supervised = supervisor.watch(process, {process.stdout: outputs.append}, exit_codes.append)
+    assert supervised.finished.wait(5)
+    assert outputs == ['done\n']
+    assert exit_codes == [3]
+
+
+def test_stop_doesnt_wait_for_orphaned_descendants():
+    supervisor = ProcessSupervisor(workers=1)
+    process = subprocess.Popen('sleep 10 & echo started', shell=True, stdout=subprocess.PIPE)
+    supervised = supervisor.watch(process, {process.stdout: lambda block: None}, lambda code: None)
+    assert not supervised.finished.wait(0.3)  # orphaned sleep holds the pipe
+    supervised.stop()
+    assert supervised.finished.wait(5)
+
+
+def test_slow_callbacks_pause_reading_output():
+    supervisor = ProcessSupervisor(workers=1, max_queued=4)
+    worker_queue = supervisor._workers[0]
+    lines = []
+    queue_sizes = []
+
+    def slow_callback(block: str):
+        queue_sizes.append(worker_queue.qsize())
+        time.sleep(0.001)
+        lines.extend(block.splitlines())
+
+    process = subprocess.Popen('seq 300000', shell=True, stdout=subprocess.PIPE)
+    supervised = supervisor.watch(process, {process.stdout: slow_callback}, lambda code: None)
+    assert supervised.finished.wait(30)
+    assert lines == [str(i) for i in range(1, 300001)]
+    assert max(queue_sizes) <= 4
+
+
+def test_supervisor_restarted_in_forked_child():
+    supervisor_module.get_supervisor()
+    pid = os.fork()
+    if pid == 0:
+        signal.alarm(10)  # don't hang forever if the child uses the parent's supervisor
+        try:
+            cmd = BackgroundCommand('echo forked')
+            cmd.wait()
+            os._exit(0 if cmd.stdout == 'forked\n' and supervisor_module.get_supervisor()._thread.is_alive() else 1)
+        except BaseException:
+            os._exit(2)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
+def test_failed_supervision_reported_as_finished(monkeypatch):
+    supervisor = ProcessSupervisor(workers=1)
+
+    def broken_read(supervised, fd):
+        raise OSError('broken pipe')
+
+    monkeypatch.setattr(supervisor, '_read', broken_read)
+    exit_codes = []
+    process = subprocess.Popen('echo started; sleep 10', shell=True, stdout=subprocess.PIPE)
+    supervised = supervisor.watch(process, {process.stdout: lambda block: None}, exit_codes.append)
+    assert supervised.finished.wait(5)
+    assert exit_codes == [-signal.SIGKILL]
+
+    monkeypatch.undo()  # loop keeps serving other processes
+    outputs = []
+    process = subprocess.Popen('echo ok', shell=True, stdout=subprocess.PIPE)
+    supervised = supervisor.watch(process, {process.stdout: outputs.append}, lambda code: None)
+    assert supervised.finished.wait(5)
+    assert outputs == ['ok\n']
+
+
+def test_exit_tracked_when_process_reaped_before_registration():
+    supervisor = ProcessSupervisor(workers=1)
+    exit_codes = []
+    process = subprocess.Popen('exit 4', shell=True, stdout=subprocess.PIPE)
+    supervised = supervisor.watch(process, {process.stdout: lambda block: None}, exit_codes.append)
+    process.wait()  # e.g. reaped by terminate_process_tree
+    assert supervised.finished.wait(5)
+    assert exit_codes == [4]